@@ -1,5 +1,15 @@
+// Scoring configuration and lookup tables exported from the Python engine
+let scoringBundle = null;
+
+// Multi-day forecast payload written by `python outdoor_risk_assessment.py forecast`
+let forecastPayload = null;
+
 // Set up the current date
 document.addEventListener('DOMContentLoaded', function() {
+    // Load the scoring bundle once; all scoring happens locally afterwards
+    loadScoringBundle().catch(error => console.error('Could not load scoring bundle', error));
+    loadForecast();
+    
     const currentDateElement = document.getElementById('current-date');
     const today = new Date();
     currentDateElement.textContent = today.toLocaleDateString('en-US', {
@@ -64,6 +74,14 @@ function celsiusToFahrenheit(celsius) {
 
 // Process form data and calculate risk
 function processFormData() {
+    // Score locally once the bundle has been loaded
+    if (!scoringBundle) {
+        loadScoringBundle()
+            .then(processFormData)
+            .catch(() => alert('Risk scoring data could not be loaded. Please try again.'));
+        return;
+    }
+    
     // Get user inputs
     const age = parseInt(document.getElementById('age').value);
     const gender = document.getElementById('gender').value;
@@ -71,8 +89,10 @@ function processFormData() {
     const weightPounds = parseFloat(document.getElementById('weight').value);
     const weightCarriedPounds = parseFloat(document.getElementById('weight-carried').value);
     
-    // Get location and activity details
-    const location = document.getElementById('location').value.replace(/-/g, ' ');
+    // Get location and activity details; data lookups use the option value, the text is for display
+    const locationSelect = document.getElementById('location');
+    const locationId = locationSelect.value;
+    const location = locationSelect.options[locationSelect.selectedIndex].text;
     const searchRadius = parseFloat(document.getElementById('search-radius').value);
     const activityType = document.getElementById('activity-type').value.replace(/-/g, '_');
     const experience = document.getElementById('experience-level').value;
@@ -84,25 +104,29 @@ function processFormData() {
     let weatherData;
     
     if (useRealWeather) {
-        // Simulate weather data from API
-        weatherData = getSimulatedWeatherData(location);
+        // Today's forecast from the server-side forecast service
+        weatherData = getForecastWeather(locationId) || getSimulatedWeatherData(location);
     } else {
         // This would normally get data from form fields, but for simplicity we'll use simulated data
         weatherData = getSimulatedWeatherData(location);
     }
     
-    // Get terrain data (simulated)
+    // Get terrain data (simulated), preferring the Python engine's values for catalog locations
     const terrainData = getTerrainData(location);
+    const catalogEntry = scoringBundle.locations[locationId];
+    if (catalogEntry) {
+        Object.assign(terrainData, catalogEntry.terrain);
+    }
     
     // Calculate risk factors
     const riskFactors = calculateRiskFactors(
         age, gender, heightInches, weightPounds, weightCarriedPounds,
-        location, activityType, experience, groupSize,
+        locationId, activityType, experience, groupSize,
         equipmentQuality, weatherData, terrainData
     );
     
     // Update the UI with the risk assessment
-    updateRiskAssessment(riskFactors, location, activityType, weatherData, terrainData);
+    updateRiskAssessment(riskFactors, location, activityType, weatherData, terrainData, getForecastDays(locationId));
     
     // Display the results section and hide the form
     document.getElementById('assessment-form').style.display = 'none';
@@ -112,7 +136,43 @@ function processFormData() {
     document.getElementById('results').scrollIntoView({ behavior: 'smooth' });
 }
 
-// Simulated weather data - would be replaced with API call to weather service
+// Load the server-side forecast payload once per page view
+function loadForecast() {
+    return fetch('forecast.json')
+        .then(response => response.json())
+        .then(payload => {
+            forecastPayload = payload;
+            return payload;
+        })
+        .catch(error => console.warn('Forecast unavailable', error));
+}
+
+// Get the forecast days for a location (its option value) from the payload
+function getForecastDays(locationId) {
+    if (!forecastPayload || !(locationId in forecastPayload.locations)) {
+        return null;
+    }
+    return forecastPayload.cells[forecastPayload.locations[locationId]].days;
+}
+
+// Today's forecast weather in the units used by the page
+function getForecastWeather(locationId) {
+    const days = getForecastDays(locationId);
+    if (!days) {
+        return null;
+    }
+    
+    const weather = days[0].weather;
+    return {
+        temperature: Math.round(weather.temperature),
+        precipitation: weather.precipitation,
+        windSpeed: Math.round(weather.wind_speed),
+        thunderstormRisk: weather.thunderstorm_risk * 10,  // page uses a 0-10 scale
+        uvIndex: weather.uv_index
+    };
+}
+
+// Simulated weather data - used when no forecast is available for the location
 function getSimulatedWeatherData(location) {
     // Base temperature varies by location
     let temperature, precipitation, windSpeed, thunderstormRisk, uvIndex;
@@ -203,182 +263,223 @@ function getTerrainData(location) {
     };
 }
 
-// Calculate individual risk factors
-function calculateRiskFactors(age, gender, heightInches, weightPounds, weightCarriedPounds,
-                             location, activityType, experience, groupSize,
-                             equipmentQuality, weatherData, terrainData) {
-    
-    // Base activity risk
-    let activityRisk = 0;
-    switch (activityType) {
-        case 'hiking':
-            activityRisk = 3;
-            break;
-        case 'rock_climbing':
-            activityRisk = 7;
-            break;
-        case 'mountain_biking':
-            activityRisk = 6;
-            break;
-        case 'backcountry_skiing':
-            activityRisk = 8;
-            break;
-        case 'kayaking':
-            activityRisk = 7;
-            break;
-        case 'trail_running':
-            activityRisk = 5;
-            break;
+// Load the scoring bundle exported by `python outdoor_risk_assessment.py bundle`
+function loadScoringBundle() {
+    return fetch('scoring_bundle.json')
+        .then(response => response.json())
+        .then(bundle => {
+            // Decode the human risk index (base64 little-endian uint16)
+            const binary = atob(bundle.tables.human_risk.index);
+            const view = new DataView(Uint8Array.from(binary, c => c.charCodeAt(0)).buffer);
+            bundle.humanRiskIndex = new Uint16Array(binary.length / 2);
+            for (let i = 0; i < bundle.humanRiskIndex.length; i++) {
+                bundle.humanRiskIndex[i] = view.getUint16(i * 2, true);
+            }
+            
+            verifyScoringBundle(bundle);
+            scoringBundle = bundle;
+            return bundle;
+        });
+}
+
+// Check that local scoring reproduces the Python reference assessments
+function verifyScoringBundle(bundle) {
+    bundle.checks.forEach(check => {
+        const result = scoreAssessment(bundle, check.inputs);
+        if (result.riskScore !== check.risk_score || result.riskCategory !== check.risk_category) {
+            console.warn('Scoring bundle parity check failed', check, result);
+        }
+    });
+}
+
+// Get the category of a value from a list of [name, min, max] ranges
+function getRangeCategory(ranges, value, fallback, maxExclusive) {
+    for (const [name, min, max] of ranges) {
+        if (min <= value && (maxExclusive ? value < max : value <= max)) {
+            return name;
+        }
+    }
+    return fallback;
+}
+
+// Terrain risk (mirrors OutdoorRiskAssessment.assess_terrain_difficulty)
+function getTerrainRisk(bundle, terrain, activityType) {
+    const elevationScore = Math.min(10, terrain.elevation / 1640);
+    const slopeScore = Math.min(10, terrain.slope / 4.5);
+    const ruggednessScore = terrain.ruggedness * 10;
+    
+    let terrainRisk = 0.3 * elevationScore + 0.4 * slopeScore + 0.3 * ruggednessScore;
+    
+    // Avalanche terrain weighting for snow activities
+    const avalanche = bundle.config.avalanche_terrain;
+    if (avalanche.activities.includes(activityType) && 'avalanche_terrain_fraction' in terrain) {
+        const avalancheScore = Math.min(10, 10 * terrain.avalanche_terrain_fraction / avalanche.full_score_fraction);
+        terrainRisk = (1 - avalanche.weight) * terrainRisk + avalanche.weight * avalancheScore;
     }
     
-    // Experience modifier (inverse relationship)
-    const experienceModifier = {
-        'beginner': 2.0,
-        'intermediate': 1.5,
-        'advanced': 1.0,
-        'expert': 0.7
-    };
+    // Remoteness weighting from the walk-out time to safety
+    const remoteness = bundle.config.remoteness;
+    if ('walkout_time' in terrain) {
+        const remotenessScore = Math.min(10, 10 * terrain.walkout_time / remoteness.full_score_hours);
+        terrainRisk = (1 - remoteness.weight) * terrainRisk + remoteness.weight * remotenessScore;
+    }
     
-    // Equipment quality modifier (inverse relationship)
-    const equipmentModifier = {
-        'poor': 2.0,
-        'basic': 1.5,
-        'good': 1.0,
-        'excellent': 0.7
-    };
+    return terrainRisk;
+}
+
+// Weather risk (mirrors OutdoorRiskAssessment.calculate_weather_risk)
+function getWeatherRisk(bundle, weather, activityType, terrain) {
+    const thresholds = bundle.config.weather_thresholds;
+    const temperature = weather.temperature;
+    const precipitation = weather.precipitation;
+    const windSpeed = weather.wind_speed;
+    
+    let tempRisk = 0;
+    const tempMin = thresholds.temperature.min;
+    const tempMax = thresholds.temperature.max;
+    if (!(tempMin <= temperature && temperature <= tempMax)) {
+        tempRisk = Math.min(10, Math.abs(temperature - (temperature < tempMin ? tempMin : tempMax)) / 3.6);
+    }
     
-    // Group size risk - solo is risky, 2-4 is optimal, more than 4 increases risk slightly
-    let groupRisk = 0;
-    if (groupSize === 1) {
-        groupRisk = 3;
-    } else if (groupSize >= 2 && groupSize <= 4) {
-        groupRisk = 1;
-    } else {
-        groupRisk = 2;
+    let precipRisk = 10;
+    if (precipitation < thresholds.precipitation.light) {
+        precipRisk = 0;
+    } else if (precipitation < thresholds.precipitation.moderate) {
+        precipRisk = 3;
+    } else if (precipitation < thresholds.precipitation.heavy) {
+        precipRisk = 7;
     }
     
-    // Calculate BMI (height in inches, weight in pounds)
-    const bmi = (weightPounds / (heightInches * heightInches)) * 703;
+    let windRisk = 10;
+    if (windSpeed < thresholds.wind_speed.light) {
+        windRisk = 0;
+    } else if (windSpeed < thresholds.wind_speed.moderate) {
+        windRisk = 3;
+    } else if (windSpeed < thresholds.wind_speed.strong) {
+        windRisk = 7;
+    }
     
-    // Physical factors risk
-    let physicalRisk = 0;
+    let lightningRisk = weather.thunderstorm_risk * 10;
     
-    // Age risk
-    if (age < 25) {
-        physicalRisk += 1;
-    } else if (age >= 25 && age < 40) {
-        physicalRisk += 0;
-    } else if (age >= 40 && age < 60) {
-        physicalRisk += 1;
-    } else {
-        physicalRisk += 2;
+    // Exposed terrain amplifies wind and lightning risk
+    if (terrain && 'wind_exposure' in terrain) {
+        windRisk = Math.min(10, windRisk * terrain.wind_exposure);
     }
-    
-    // BMI risk
-    if (bmi < 18.5) {
-        physicalRisk += 1; // Underweight
-    } else if (bmi >= 18.5 && bmi < 25) {
-        physicalRisk += 0; // Normal
-    } else if (bmi >= 25 && bmi < 30) {
-        physicalRisk += 1; // Overweight
-    } else {
-        physicalRisk += 2; // Obese
+    if (terrain && 'lightning_exposure' in terrain) {
+        lightningRisk = Math.min(10, lightningRisk * terrain.lightning_exposure);
     }
+    const weatherSensitivity = bundle.config.activity_types[activityType].weather_sensitivity;
     
-    // Weight carried risk (as percentage of body weight)
-    const weightCarriedRatio = weightCarriedPounds / weightPounds;
-    let weightCarriedRisk = 0;
-    if (weightCarriedRatio < 0.05) {
-        weightCarriedRisk = 0;
-    } else if (weightCarriedRatio < 0.15) {
-        weightCarriedRisk = 1;
-    } else if (weightCarriedRatio < 0.25) {
-        weightCarriedRisk = 2;
-    } else {
-        weightCarriedRisk = 3;
+    return (0.3 * tempRisk + 0.3 * precipRisk + 0.2 * windRisk + 0.2 * lightningRisk) * weatherSensitivity;
+}
+
+// Score an assessment with the bundle (mirrors OutdoorRiskAssessment.calculate_risk_score)
+function scoreAssessment(bundle, inputs) {
+    const config = bundle.config;
+    const tables = bundle.tables;
+    
+    // Canonical categories for the precomputed tables
+    const weightThresholds = config.weight_thresholds;
+    let weightCategory = 'very_heavy';
+    if (inputs.weight_carried <= weightThresholds.light) {
+        weightCategory = 'light';
+    } else if (inputs.weight_carried <= weightThresholds.moderate) {
+        weightCategory = 'moderate';
+    } else if (inputs.weight_carried <= weightThresholds.heavy) {
+        weightCategory = 'heavy';
     }
     
-    // Add weight carried risk to physical risk
-    physicalRisk += weightCarriedRisk;
-    
-    // Terrain risk
-    let terrainRisk = 0;
-    terrainRisk += terrainData.slope * 0.1;
-    terrainRisk += terrainData.ruggedness * 3;
-    
-    // Elevation risk is based on elevation and elevation change
-    const elevationRisk = (terrainData.elevation / 14000) * 5 + (terrainData.elevationChange / 7000) * 5;
-    
-    // Weather risk
-    let weatherRisk = 0;
-    
-    // Temperature risk (extremes increase risk)
-    const tempF = weatherData.temperature;
-    if (tempF < 32) {
-        weatherRisk += 3; // Freezing
-    } else if (tempF < 45) {
-        weatherRisk += 2; // Cold
-    } else if (tempF > 90) {
-        weatherRisk += 3; // Very hot
-    } else if (tempF > 80) {
-        weatherRisk += 2; // Hot
+    let groupCategory = 'large';
+    if (inputs.group_size === 1) {
+        groupCategory = 'solo';
+    } else if (inputs.group_size >= 2 && inputs.group_size <= 4) {
+        groupCategory = 'small';
+    } else if (inputs.group_size >= 5 && inputs.group_size <= 8) {
+        groupCategory = 'medium';
     }
     
-    // Precipitation risk
-    weatherRisk += weatherData.precipitation * 10;
+    const ratio = inputs.height_weight_ratio;
+    const heightWeightCategory = ratio < 18.5 ? 'underweight' : ratio < 25 ? 'normal' : ratio < 30 ? 'overweight' : 'obese';
+    const ageCategory = getRangeCategory(config.age_categories, inputs.age, 'senior', false);
     
-    // Wind risk
-    if (weatherData.windSpeed > 30) {
-        weatherRisk += 3;
-    } else if (weatherData.windSpeed > 20) {
-        weatherRisk += 2;
-    } else if (weatherData.windSpeed > 10) {
-        weatherRisk += 1;
-    }
+    // Row-major lookup into the human risk table
+    const keys = [inputs.activity_type, inputs.user_experience, groupCategory, weightCategory,
+                  ageCategory, heightWeightCategory, inputs.gender];
+    let flatIndex = 0;
+    tables.human_risk.axes.forEach((axis, i) => {
+        flatIndex = flatIndex * axis.length + axis.indexOf(keys[i]);
+    });
     
-    // Thunderstorm risk
-    weatherRisk += weatherData.thunderstormRisk * 0.5;
+    const componentScores = {
+        terrain_risk: getTerrainRisk(bundle, inputs.terrain, inputs.activity_type),
+        weather_risk: getWeatherRisk(bundle, inputs.weather, inputs.activity_type, inputs.terrain),
+        human_risk: tables.human_risk.values[bundle.humanRiskIndex[flatIndex]],
+        equipment_risk: tables.equipment_risk[inputs.activity_type][inputs.equipment_quality_level],
+        weight_risk: tables.weight_risk[inputs.activity_type][weightCategory]
+    };
     
-    // UV Index risk
-    if (weatherData.uvIndex >= 11) {
-        weatherRisk += 3; // Extreme
-    } else if (weatherData.uvIndex >= 8) {
-        weatherRisk += 2; // Very High
-    } else if (weatherData.uvIndex >= 6) {
-        weatherRisk += 1; // High
-    }
+    const weights = config.component_weights;
+    let totalRisk = (componentScores.terrain_risk * weights.terrain_risk +
+                     componentScores.weather_risk * weights.weather_risk +
+                     componentScores.human_risk * weights.human_risk +
+                     componentScores.equipment_risk * weights.equipment_risk +
+                     componentScores.weight_risk * weights.weight_risk);
+    totalRisk *= config.location_modifiers[inputs.location] || 1.0;
+    componentScores.total_risk = totalRisk;
     
-    // Calculate final risk scores (0-10 scale)
-    const activityFactorRisk = Math.min(10, activityRisk * experienceModifier[experience]);
-    const humanFactorsRisk = Math.min(10, physicalRisk + groupRisk);
-    const terrainFactorsRisk = Math.min(10, terrainRisk + elevationRisk * 0.5);
-    const weatherFactorsRisk = Math.min(10, weatherRisk);
-    const equipmentFactorsRisk = Math.min(10, activityRisk * equipmentModifier[equipmentQuality]);
-    
-    // Calculate overall risk (weighted average)
-    const overallRisk = Math.min(10, (
-        activityFactorRisk * 0.2 +
-        humanFactorsRisk * 0.2 +
-        terrainFactorsRisk * 0.2 +
-        weatherFactorsRisk * 0.3 +
-        equipmentFactorsRisk * 0.1
-    ));
+    return {
+        riskCategory: getRangeCategory(config.risk_categories, totalRisk, 'extreme', true),
+        riskScore: totalRisk,
+        componentScores: componentScores
+    };
+}
+
+// Calculate individual risk factors (locationId is the location's option value)
+function calculateRiskFactors(age, gender, heightInches, weightPounds, weightCarriedPounds,
+                             locationId, activityType, experience, groupSize,
+                             equipmentQuality, weatherData, terrainData) {
+    
+    // Calculate BMI (height in inches, weight in pounds)
+    const bmi = (weightPounds / (heightInches * heightInches)) * 703;
+    
+    // Weight carried as a fraction of body weight
+    const weightCarriedRatio = weightCarriedPounds / weightPounds;
+    
+    const result = scoreAssessment(scoringBundle, {
+        location: locationId,
+        activity_type: activityType,
+        user_experience: experience,
+        group_size: groupSize,
+        equipment_quality_level: equipmentQuality,
+        weight_carried: weightCarriedPounds,
+        age: age,
+        height_weight_ratio: bmi,
+        gender: gender,
+        weather: {
+            temperature: weatherData.temperature,
+            precipitation: weatherData.precipitation,
+            wind_speed: weatherData.windSpeed,
+            thunderstorm_risk: weatherData.thunderstormRisk / 10  // page uses a 0-10 scale
+        },
+        terrain: terrainData
+    });
     
     // Return all risk factors
     return {
-        overallRisk: overallRisk,
-        activityRisk: activityFactorRisk,
-        humanFactors: humanFactorsRisk,
-        terrainRisk: terrainFactorsRisk,
-        weatherRisk: weatherFactorsRisk,
-        equipmentRisk: equipmentFactorsRisk,
+        overallRisk: result.riskScore,
+        riskCategory: result.riskCategory,
+        humanFactors: result.componentScores.human_risk,
+        terrainRisk: result.componentScores.terrain_risk,
+        weatherRisk: result.componentScores.weather_risk,
+        equipmentRisk: result.componentScores.equipment_risk,
+        weightRisk: result.componentScores.weight_risk,
         bmi: bmi,
         weightCarriedRatio: weightCarriedRatio
     };
 }
 
 // Update the UI with risk assessment results
-function updateRiskAssessment(riskFactors, location, activityType, weatherData, terrainData) {
+function updateRiskAssessment(riskFactors, location, activityType, weatherData, terrainData, forecastDays) {
     // Format the activity name for display
     const formattedActivityType = formatActivityName(activityType);
     
@@ -388,23 +489,13 @@ function updateRiskAssessment(riskFactors, location, activityType, weatherData,
     // Calculate total risk
     const totalRisk = riskFactors.overallRisk;
     
-    // Determine risk level based on total risk
-    let riskLevel = 'LOW';
-    let riskPercentage = 0;
-    
-    if (totalRisk <= 3) {
-        riskLevel = 'LOW';
-        riskPercentage = (totalRisk / 3) * 25;
-    } else if (totalRisk <= 5) {
-        riskLevel = 'MODERATE';
-        riskPercentage = 25 + ((totalRisk - 3) / 2) * 25;
-    } else if (totalRisk <= 8) {
-        riskLevel = 'HIGH';
-        riskPercentage = 50 + ((totalRisk - 5) / 3) * 25;
-    } else {
-        riskLevel = 'EXTREME';
-        riskPercentage = 75 + ((totalRisk - 8) / 2) * 25;
-    }
+    // Risk level comes from the same category ranges as the Python engine
+    const riskLevel = riskFactors.riskCategory.toUpperCase();
+    const categories = scoringBundle.config.risk_categories;
+    const categoryIndex = categories.findIndex(([name]) => name === riskFactors.riskCategory);
+    const [, categoryMin, categoryMax] = categories[categoryIndex];
+    const categoryFraction = Math.min(1, Math.max(0, (totalRisk - categoryMin) / (categoryMax - categoryMin)));
+    const riskPercentage = (categoryIndex + categoryFraction) * 25;
     
     // Update risk indicator position
     document.getElementById('risk-indicator').style.left = `${riskPercentage}%`;
@@ -437,11 +528,11 @@ function updateRiskAssessment(riskFactors, location, activityType, weatherData,
     
     // Create list of risk factors
     const riskFactorsList = [
-        {name: 'Activity Difficulty', value: riskFactors.activityRisk.toFixed(1)},
         {name: 'Human Factors (Based on User Entered Attributes)', value: riskFactors.humanFactors.toFixed(1)},
         {name: 'Terrain Difficulty', value: riskFactors.terrainRisk.toFixed(1)},
         {name: 'Weather Risk', value: riskFactors.weatherRisk.toFixed(1)},
         {name: 'Equipment Risk', value: riskFactors.equipmentRisk.toFixed(1)},
+        {name: 'Weight Carried Risk', value: riskFactors.weightRisk.toFixed(1)},
         {name: 'UV Index', value: weatherData.uvIndex.toFixed(1)},
         {name: 'Elevation Change (feet)', value: terrainData.elevationChange}
     ];
@@ -494,7 +585,7 @@ function updateRiskAssessment(riskFactors, location, activityType, weatherData,
     displayGISContext(location, terrainData, riskFactors);
     
     // Display weather forecast
-    displayForecast(generateWeatherForecast(location));
+    displayForecast(forecastDays, activityType);
 }
 
 // Generate activity-specific recommendations
@@ -677,108 +768,31 @@ function getNearbyTrails(location) {
     return trails.sort((a, b) => a.distance - b.distance);
 }
 
-// Generate weather forecast (simulated)
-function generateWeatherForecast(location) {
-    const forecast = [];
-    const today = new Date();
-    const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
-    
-    // Possible weather conditions and corresponding icons
-    const conditions = ['Sunny', 'Partly Cloudy', 'Cloudy', 'Rain', 'Thunderstorm', 'Snow'];
-    const icons = {
-        'Sunny': 'sun',
-        'Partly Cloudy': 'cloud-sun',
-        'Cloudy': 'cloud',
-        'Rain': 'cloud-rain',
-        'Thunderstorm': 'bolt',
-        'Snow': 'snowflake'
-    };
-    
-    // Start with weather appropriate for the location's climate
-    let baseConditionIndex;
-    let baseTempHigh;
-    
-    if (location.toLowerCase().includes('peak') || location.toLowerCase().includes('mountain')) {
-        // Cooler and more variable weather for mountain locations
-        baseTempHigh = 55 + Math.floor(Math.random() * 15);
-        baseConditionIndex = Math.floor(Math.random() * conditions.length);
-    } else {
-        // Warmer and more stable weather for lower elevation locations
-        baseTempHigh = 65 + Math.floor(Math.random() * 20);
-        baseConditionIndex = Math.min(2, Math.floor(Math.random() * conditions.length));
-    }
-    
-    // Generate 4-day forecast
-    for (let i = 0; i < 4; i++) {
-        const dayDate = new Date(today);
-        dayDate.setDate(today.getDate() + i);
-        
-        // Temperature variation day-to-day
-        const tempVariation = Math.floor(Math.random() * 10) - 5;
-        const tempHigh = baseTempHigh + tempVariation;
-        const tempLow = tempHigh - 10 - Math.floor(Math.random() * 10);
-        
-        // Weather condition variation (weather tends to persist with gradual changes)
-        let conditionIndex;
-        if (i === 0) {
-            conditionIndex = baseConditionIndex;
-        } else {
-            // 70% chance of same condition as previous day, 30% chance of change
-            if (Math.random() < 0.7) {
-                conditionIndex = forecast[i - 1].conditionIndex;
-            } else {
-                // More likely to shift by just one step
-                const shift = Math.random() < 0.7 ? (Math.random() < 0.5 ? 1 : -1) : Math.floor(Math.random() * conditions.length - 1) + 1;
-                conditionIndex = (forecast[i - 1].conditionIndex + shift + conditions.length) % conditions.length;
-            }
-        }
-        
-        // Precipitation chance based on condition
-        let precipChance = 0;
-        if (conditions[conditionIndex] === 'Partly Cloudy') {
-            precipChance = Math.floor(Math.random() * 20);
-        } else if (conditions[conditionIndex] === 'Cloudy') {
-            precipChance = 20 + Math.floor(Math.random() * 40);
-        } else if (conditions[conditionIndex] === 'Rain') {
-            precipChance = 60 + Math.floor(Math.random() * 40);
-        } else if (conditions[conditionIndex] === 'Thunderstorm') {
-            precipChance = 70 + Math.floor(Math.random() * 30);
-        } else if (conditions[conditionIndex] === 'Snow') {
-            precipChance = 60 + Math.floor(Math.random() * 40);
-        }
-        
-        forecast.push({
-            day: days[(today.getDay() + i) % 7],
-            date: dayDate.toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
-            tempHigh: tempHigh,
-            tempLow: tempLow,
-            condition: conditions[conditionIndex],
-            icon: icons[conditions[conditionIndex]],
-            precipChance: precipChance,
-            conditionIndex: conditionIndex,
-            isToday: i === 0
-        });
-    }
-    
-    return forecast;
-}
-
 // Display forecast
-function displayForecast(forecast) {
+function displayForecast(forecast, activityType) {
     const forecastContainer = document.getElementById('forecast-container');
     forecastContainer.innerHTML = '';
     
-    forecast.forEach(day => {
+    if (!forecast) {
+        forecastContainer.textContent = 'Forecast currently unavailable for this location.';
+        return;
+    }
+    
+    const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
+    
+    forecast.forEach((day, i) => {
+        const dayDate = new Date(`${day.date}T12:00:00`);
         const forecastDay = document.createElement('div');
-        forecastDay.className = day.isToday ? 'forecast-day today' : 'forecast-day';
+        forecastDay.className = i === 0 ? 'forecast-day today' : 'forecast-day';
         
         forecastDay.innerHTML = `
-            <div class="forecast-date">${day.day}</div>
+            <div class="forecast-date">${days[dayDate.getDay()]}</div>
             <div class="weather-icon"><i class="fas fa-${day.icon}"></i></div>
-            <div class="forecast-temp">${day.tempHigh}°F / ${day.tempLow}°F</div>
+            <div class="forecast-temp">${day.temp_high}°F / ${day.temp_low}°F</div>
             <div class="forecast-details">
                 <div>${day.condition}</div>
-                <div>${day.precipChance}% precipitation</div>
+                <div>${day.precip_chance}% precipitation</div>
+                <div>Weather risk ${day.weather_risk[activityType].toFixed(1)}/10</div>
             </div>
         `;
         forecastContainer.appendChild(forecastDay);
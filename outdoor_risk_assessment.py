@@ -1,13 +1,55 @@
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
+from collections import OrderedDict, deque
+import threading
+import asyncio
+import time
+import warnings
 import requests
 import rasterio
+from rasterio.merge import merge
+from rasterio.enums import Resampling
+from rasterio.transform import Affine
+from rasterio.io import MemoryFile
+from rasterio.errors import NotGeoreferencedWarning
 import os
+import sys
+import csv
+import sqlite3
+import json
+import base64
+import hashlib
+import itertools
+from xml.etree import ElementTree
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from pyproj import CRS
-from scipy.ndimage import sobel
+from scipy.ndimage import sobel, uniform_filter, maximum_filter, minimum_filter
+from shapely import STRtree, points as shapely_points
+from shapely.geometry import shape
+from scipy.optimize import minimize
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
+from scipy.sparse.csgraph import dijkstra
 
 class OutdoorRiskAssessment:
-    def __init__(self):
+    # Risk categories and their default score ranges, lowest first
+    DEFAULT_RISK_CATEGORIES = {
+        'low': {'min': 0, 'max': 3},
+        'moderate': {'min': 3, 'max': 6},
+        'high': {'min': 6, 'max': 8},
+        'extreme': {'min': 8, 'max': 10}
+    }
+    
+    def __init__(self, component_cache_size=4096):
+        """
+        Initialize the risk assessment system
+        
+        Parameters:
+        component_cache_size (int): Maximum number of memoized human, weight and
+            equipment risk results (0 disables memoization)
+        """
         # Define activity types and their base difficulty
         self.activity_types = {
             'hiking': {'base_difficulty': 2, 'weather_sensitivity': 0.7, 'equipment_importance': 0.5, 'weight_sensitivity': 0.8},
@@ -43,10 +85,7 @@ class OutdoorRiskAssessment:
         
         # Risk categories
         self.risk_categories = {
-            'low': {'min': 0, 'max': 3},
-            'moderate': {'min': 3, 'max': 6},
-            'high': {'min': 6, 'max': 8},
-            'extreme': {'min': 8, 'max': 10}
+            category: dict(thresholds) for category, thresholds in self.DEFAULT_RISK_CATEGORIES.items()
         }
         
         # Weight carried risk thresholds (in pounds)
@@ -78,22 +117,167 @@ class OutdoorRiskAssessment:
             }
         }
 
-        # Location specific additional risk factors
+        # Location specific additional risk factors, with the area each applies to (GeoJSON)
         self.location_specific_risks = {
             'Manitou Incline': {
                 'altitude_gain': 2000,  # feet
                 'inclination': 40,  # average degrees
-                'risk_modifier': 1.8   # higher risk modifier
+                'risk_modifier': 1.8,   # higher risk modifier
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [[
+                        [-104.93033, 38.85757], [-104.94683, 38.86257],
+                        [-104.94717, 38.86143], [-104.93067, 38.85643],
+                        [-104.93033, 38.85757]
+                    ]]
+                }
             }
         }
+        
+        # How modifiers of nested or overlapping areas combine:
+        # 'max' (strongest applies), 'product' (all compound) or 'smallest' (most specific area wins)
+        self.risk_area_combination = 'max'
+        self._risk_area_index = None
+
+        # Avalanche terrain weighting for snow activities
+        self.avalanche_terrain = {
+            'activities': ['backcountry_skiing'],
+            'weight': 0.4,                # share of terrain risk driven by avalanche terrain
+            'full_score_fraction': 0.5    # 30-45 degree area fraction that scores 10
+        }
+        
+        # Remoteness weighting from the walk-out time to safety
+        self.remoteness = {
+            'weight': 0.2,           # share of terrain risk driven by remoteness
+            'full_score_hours': 6    # walk-out time that scores 10
+        }
+        
+        # Standard deviations of the input perturbations used for uncertainty bands
+        self.input_uncertainty = {
+            'temperature': 4.0,         # degrees Fahrenheit
+            'precipitation': 0.05,      # inches
+            'wind_speed': 4.0,          # mph
+            'thunderstorm_risk': 0.1,   # probability
+            'elevation': 100,           # feet
+            'slope': 3.0,               # degrees
+            'ruggedness': 0.05          # index
+        }
+        
+        # Share of the day's thunderstorm risk faced by an outing starting at each hour
+        # (afternoon convection; early starts are down before storms build)
+        self.start_hour_thunderstorm = {
+            'hours': [0, 5, 8, 11, 14, 18, 24],
+            'factors': [0.4, 0.4, 0.6, 1.0, 1.2, 0.8, 0.4]
+        }
+        
+        # Relative cost of changing each user-controllable input (for what-if sweeps)
+        self.change_costs = {
+            'weight_carried': 0.2,           # per pound dropped
+            'equipment_quality_level': 2.0,  # per quality level upgraded
+            'group_size': 1.0,               # per person added or removed
+            'start_hour': 0.5                # per hour moved
+        }
+        
+        # Weights used to combine component risks into the total risk
+        self.component_weights = {
+            'terrain_risk': 0.35,
+            'weather_risk': 0.25,
+            'human_risk': 0.20,
+            'equipment_risk': 0.10,
+            'weight_risk': 0.10
+        }
+        
+        # Logistic link from total risk to incident probability, fitted by
+        # calibrate_risk_model and loaded by apply_calibration (empty until then)
+        self.incident_link = {}
+        
+        # Memoized component scores keyed by canonical input categories
+        self.component_cache_size = component_cache_size
+        self._component_cache = OrderedDict()
+        self._component_cache_lock = threading.Lock()
+        self._component_cache_stats = {'hits': 0, 'misses': 0}
+    
+    def _memoize_component(self, key, compute):
+        """
+        Return a memoized component score, computing and caching it on a miss
+        
+        Parameters:
+        key (tuple): Canonical cache key
+        compute (callable): Computes the score on a cache miss
+        
+        Returns:
+        Cached or freshly computed score
+        """
+        if self.component_cache_size <= 0:
+            return compute()
+        
+        with self._component_cache_lock:
+            if key in self._component_cache:
+                self._component_cache.move_to_end(key)
+                self._component_cache_stats['hits'] += 1
+                return self._component_cache[key]
+        
+        value = compute()
+        
+        with self._component_cache_lock:
+            self._component_cache_stats['misses'] += 1
+            self._component_cache[key] = value
+            while len(self._component_cache) > self.component_cache_size:
+                self._component_cache.popitem(last=False)
+        
+        return value
+    
+    def clear_component_cache(self):
+        """
+        Invalidate all memoized component scores
+        
+        Must be called after modifying any threshold or modifier dict directly.
+        """
+        with self._component_cache_lock:
+            self._component_cache.clear()
+    
+    def update_thresholds(self, name, values):
+        """
+        Update a scoring configuration dict and invalidate memoized scores
+        
+        Parameters:
+        name (str): Attribute name, e.g. 'weight_thresholds', 'activity_types' or 'experience_levels'
+        values (dict): Entries to merge into the configuration
+        """
+        getattr(self, name).update(values)
+        self.clear_component_cache()
+        if name == 'location_specific_risks':
+            self._risk_area_index = None
+    
+    def get_component_cache_stats(self):
+        """
+        Get hit statistics for the component score memoization
+        
+        Returns:
+        dict: Hits, misses, hit rate, current size and maximum size
+        """
+        with self._component_cache_lock:
+            hits = self._component_cache_stats['hits']
+            misses = self._component_cache_stats['misses']
+            size = len(self._component_cache)
+        
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'size': size,
+            'max_size': self.component_cache_size
+        }
     
-    def assess_terrain_difficulty(self, location, terrain_data):
+    def assess_terrain_difficulty(self, location, terrain_data, activity_type=None):
         """
         Assess terrain difficulty based on elevation, slope, and ruggedness
         
         Parameters:
         location (tuple): (latitude, longitude)
-        terrain_data (dict): Contains 'elevation', 'slope', 'ruggedness' metrics
+        terrain_data (dict): Contains 'elevation', 'slope', 'ruggedness' metrics and
+            optionally 'avalanche_terrain_fraction' and 'walkout_time' (hours)
+        activity_type (str): Type of outdoor activity (enables avalanche terrain weighting)
         
         Returns:
         float: Terrain difficulty score (0-10)
@@ -113,15 +297,68 @@ class OutdoorRiskAssessment:
                              0.4 * slope_score + 
                              0.3 * ruggedness_score)
         
+        # Avalanche risk concentrates in 30-45 degree slopes, which the mean slope hides
+        if activity_type in self.avalanche_terrain['activities'] and 'avalanche_terrain_fraction' in terrain_data:
+            avalanche_score = min(10, 10 * terrain_data['avalanche_terrain_fraction'] /
+                                  self.avalanche_terrain['full_score_fraction'])
+            weight = self.avalanche_terrain['weight']
+            terrain_difficulty = (1 - weight) * terrain_difficulty + weight * avalanche_score
+        
+        # Remote terrain is riskier because help and safety are further away
+        if 'walkout_time' in terrain_data:
+            remoteness_score = min(10, 10 * terrain_data['walkout_time'] / self.remoteness['full_score_hours'])
+            weight = self.remoteness['weight']
+            terrain_difficulty = (1 - weight) * terrain_difficulty + weight * remoteness_score
+        
+        return terrain_difficulty
+    
+    def assess_terrain_difficulty_array(self, elevation, slope, ruggedness, activity_type=None,
+                                        avalanche_terrain_fraction=None, walkout_time=None):
+        """
+        Vectorized version of assess_terrain_difficulty
+        
+        Parameters:
+        elevation (array): Elevation in feet
+        slope (array): Slope in degrees
+        ruggedness (array): Ruggedness index 0-1
+        activity_type (str): Type of outdoor activity (enables avalanche terrain weighting)
+        avalanche_terrain_fraction (array): Optional share of 30-45 degree terrain
+        walkout_time (array): Optional walk-out time in hours
+        
+        Returns:
+        ndarray: Terrain difficulty scores (0-10)
+        """
+        elevation_score = np.minimum(10, np.asarray(elevation, dtype=np.float64) / 1640)
+        slope_score = np.minimum(10, np.asarray(slope, dtype=np.float64) / 4.5)
+        ruggedness_score = np.asarray(ruggedness, dtype=np.float64) * 10
+        
+        terrain_difficulty = (0.3 * elevation_score + 
+                              0.4 * slope_score + 
+                              0.3 * ruggedness_score)
+        
+        if activity_type in self.avalanche_terrain['activities'] and avalanche_terrain_fraction is not None:
+            avalanche_score = np.minimum(10, 10 * np.asarray(avalanche_terrain_fraction, dtype=np.float64) /
+                                         self.avalanche_terrain['full_score_fraction'])
+            weight = self.avalanche_terrain['weight']
+            terrain_difficulty = (1 - weight) * terrain_difficulty + weight * avalanche_score
+        
+        if walkout_time is not None:
+            remoteness_score = np.minimum(10, 10 * np.asarray(walkout_time, dtype=np.float64) /
+                                          self.remoteness['full_score_hours'])
+            weight = self.remoteness['weight']
+            terrain_difficulty = (1 - weight) * terrain_difficulty + weight * remoteness_score
+        
         return terrain_difficulty
     
-    def calculate_weather_risk(self, weather_data, activity_type):
+    def calculate_weather_risk(self, weather_data, activity_type, exposure=None):
         """
         Calculate weather-related risk based on forecast and activity
         
         Parameters:
         weather_data (dict): Contains weather metrics
         activity_type (str): Type of outdoor activity
+        exposure (dict): Optional terrain exposure with 'wind_exposure' and
+            'lightning_exposure' multipliers (see GISTerrainAnalyzer.get_exposure)
         
         Returns:
         float: Weather risk score (0-10)
@@ -163,6 +400,12 @@ class OutdoorRiskAssessment:
         # Thunderstorm risk (0-10)
         lightning_risk = thunderstorm_risk * 10
         
+        # Exposed terrain (ridges, above treeline) amplifies wind and lightning risk
+        if exposure and 'wind_exposure' in exposure:
+            wind_risk = min(10, wind_risk * exposure['wind_exposure'])
+        if exposure and 'lightning_exposure' in exposure:
+            lightning_risk = min(10, lightning_risk * exposure['lightning_exposure'])
+        
         # Get activity's weather sensitivity
         weather_sensitivity = self.activity_types[activity_type]['weather_sensitivity']
         
@@ -174,6 +417,63 @@ class OutdoorRiskAssessment:
         
         return weather_risk
     
+    def calculate_weather_risk_array(self, temperature, precipitation, wind_speed,
+                                     thunderstorm_risk, weather_sensitivity,
+                                     wind_exposure=None, lightning_exposure=None):
+        """
+        Vectorized version of calculate_weather_risk
+        
+        All arguments are broadcast against each other, so e.g. daily weather
+        of shape (days, 1) and sensitivities of shape (activities,) give a
+        (days, activities) result. Results are identical to the scalar method.
+        
+        Parameters:
+        temperature (array): Temperature in Fahrenheit
+        precipitation (array): Precipitation in inches
+        wind_speed (array): Wind speed in mph
+        thunderstorm_risk (array): Thunderstorm probability 0-1
+        weather_sensitivity (array): Activity weather sensitivities
+        wind_exposure (array): Optional terrain wind exposure multipliers
+        lightning_exposure (array): Optional terrain lightning exposure multipliers
+        
+        Returns:
+        ndarray: Weather risk scores (0-10)
+        """
+        temperature = np.asarray(temperature, dtype=np.float64)
+        precipitation = np.asarray(precipitation, dtype=np.float64)
+        wind_speed = np.asarray(wind_speed, dtype=np.float64)
+        thunderstorm_risk = np.asarray(thunderstorm_risk, dtype=np.float64)
+        
+        # Temperature risk (higher for extreme temps)
+        temp_min = self.weather_thresholds['temperature']['min']
+        temp_max = self.weather_thresholds['temperature']['max']
+        temp_risk = np.minimum(10, np.abs(temperature - np.where(temperature < temp_min, temp_min, temp_max)) / 3.6)
+        temp_risk = np.where((temp_min <= temperature) & (temperature <= temp_max), 0.0, temp_risk)
+        
+        # Precipitation and wind risk levels by threshold band
+        precip_thresholds = self.weather_thresholds['precipitation']
+        precip_risk = np.array([0.0, 3.0, 7.0, 10.0])[np.searchsorted(
+            [precip_thresholds['light'], precip_thresholds['moderate'], precip_thresholds['heavy']],
+            precipitation, side='right')]
+        wind_thresholds = self.weather_thresholds['wind_speed']
+        wind_risk = np.array([0.0, 3.0, 7.0, 10.0])[np.searchsorted(
+            [wind_thresholds['light'], wind_thresholds['moderate'], wind_thresholds['strong']],
+            wind_speed, side='right')]
+        
+        # Thunderstorm risk (0-10)
+        lightning_risk = thunderstorm_risk * 10
+        
+        # Exposed terrain amplifies wind and lightning risk
+        if wind_exposure is not None:
+            wind_risk = np.minimum(10, wind_risk * wind_exposure)
+        if lightning_exposure is not None:
+            lightning_risk = np.minimum(10, lightning_risk * lightning_exposure)
+        
+        return (0.3 * temp_risk + 
+                0.3 * precip_risk + 
+                0.2 * wind_risk + 
+                0.2 * lightning_risk) * np.asarray(weather_sensitivity, dtype=np.float64)
+    
     def calculate_weight_risk(self, weight_carried, activity_type):
         """
         Calculate risk related to weight carried
@@ -185,15 +485,44 @@ class OutdoorRiskAssessment:
         Returns:
         float: Weight risk score (0-10)
         """
-        # Base weight risk calculation
+        weight_category = self.get_weight_category(weight_carried)
+        return self._memoize_component(
+            ('weight', activity_type, weight_category),
+            lambda: self._calculate_weight_risk(weight_category, activity_type)
+        )
+    
+    def get_weight_category(self, weight_carried):
+        """
+        Get the weight carried category
+        
+        Parameters:
+        weight_carried (float): Weight carried in pounds
+        
+        Returns:
+        str: 'light', 'moderate', 'heavy' or 'very_heavy'
+        """
         if weight_carried <= self.weight_thresholds['light']:
-            weight_base_risk = 1
+            return 'light'
         elif weight_carried <= self.weight_thresholds['moderate']:
-            weight_base_risk = 3
+            return 'moderate'
         elif weight_carried <= self.weight_thresholds['heavy']:
-            weight_base_risk = 6
+            return 'heavy'
         else:
-            weight_base_risk = 9
+            return 'very_heavy'
+    
+    def _calculate_weight_risk(self, weight_category, activity_type):
+        """
+        Calculate weight risk from the weight carried category
+        
+        Parameters:
+        weight_category (str): Weight carried category
+        activity_type (str): Type of outdoor activity
+        
+        Returns:
+        float: Weight risk score (0-10)
+        """
+        # Base weight risk calculation
+        weight_base_risk = {'light': 1, 'moderate': 3, 'heavy': 6, 'very_heavy': 9}[weight_category]
         
         # Apply activity-specific weight sensitivity
         weight_sensitivity = self.activity_types[activity_type]['weight_sensitivity']
@@ -218,7 +547,50 @@ class OutdoorRiskAssessment:
         gender (str): User gender
         
         Returns:
-        float: Human factor risk score (0-10)
+        tuple: (human_risk, weight_risk)
+        """
+        # Canonicalize the inputs to the categories the score depends on
+        key = ('human', activity_type, user_experience, self.get_group_size_category(group_size),
+               self.get_weight_category(weight_carried), self.get_age_category(age),
+               self.get_height_weight_category(height_weight_ratio), gender)
+        
+        return self._memoize_component(key, lambda: self._calculate_human_risk(*key[1:]))
+    
+    def get_group_size_category(self, group_size):
+        """
+        Get the group size category
+        
+        Parameters:
+        group_size (int): Number of people in group
+        
+        Returns:
+        str: 'solo', 'small', 'medium' or 'large'
+        """
+        if group_size == 1:
+            return 'solo'
+        elif 2 <= group_size <= 4:
+            return 'small'
+        elif 5 <= group_size <= 8:
+            return 'medium'
+        else:
+            return 'large'
+    
+    def _calculate_human_risk(self, activity_type, user_experience, group_category, weight_category,
+                              age_category, height_weight_category, gender):
+        """
+        Calculate human factor risk from canonical input categories
+        
+        Parameters:
+        activity_type (str): Type of outdoor activity
+        user_experience (str): Experience level
+        group_category (str): Group size category
+        weight_category (str): Weight carried category
+        age_category (str): Age category
+        height_weight_category (str): Height-weight ratio category
+        gender (str): User gender
+        
+        Returns:
+        tuple: (human_risk, weight_risk)
         """
         # Base activity difficulty
         activity_difficulty = self.activity_types[activity_type]['base_difficulty']
@@ -227,26 +599,23 @@ class OutdoorRiskAssessment:
         experience_modifier = self.experience_levels[user_experience]
         
         # Group size factor
-        if group_size == 1:
-            # Solo activities are riskier
-            group_factor = 1.5
-        elif 2 <= group_size <= 4:
-            # Optimal group size
-            group_factor = 1.0
-        elif 5 <= group_size <= 8:
-            # Larger groups can be safer but may move slower
-            group_factor = 1.2
-        else:
-            # Very large groups add complexity
-            group_factor = 1.4
+        group_factor = {
+            'solo': 1.5,     # Solo activities are riskier
+            'small': 1.0,    # Optimal group size
+            'medium': 1.2,   # Larger groups can be safer but may move slower
+            'large': 1.4     # Very large groups add complexity
+        }[group_category]
         
         # Weight factor calculation
-        weight_risk = self.calculate_weight_risk(weight_carried, activity_type)
+        weight_risk = self._memoize_component(
+            ('weight', activity_type, weight_category),
+            lambda: self._calculate_weight_risk(weight_category, activity_type)
+        )
         weight_factor = 0.5 + (weight_risk / 20)  # Scale to 0.5-1.0 range
         
         # Physical attributes risk modifiers
-        age_modifier = self.get_age_modifier(age)
-        height_weight_modifier = self.get_height_weight_modifier(height_weight_ratio)
+        age_modifier = self.physical_attributes['age'][age_category]['modifier']
+        height_weight_modifier = self.physical_attributes['height_weight_ratio'][height_weight_category]['modifier']
         gender_modifier = self.get_gender_modifier(gender)
         
         # Calculate human risk factor with weight consideration
@@ -267,12 +636,24 @@ class OutdoorRiskAssessment:
         Returns:
         float: Age modifier
         """
+        return self.physical_attributes['age'][self.get_age_category(age)]['modifier']
+    
+    def get_age_category(self, age):
+        """
+        Get age category
+        
+        Parameters:
+        age (int): User age
+        
+        Returns:
+        str: Age category
+        """
         for category, thresholds in self.physical_attributes['age'].items():
             if thresholds['min'] <= age <= thresholds['max']:
-                return thresholds['modifier']
+                return category
         
         # If outside all ranges, use the highest modifier
-        return self.physical_attributes['age']['senior']['modifier']
+        return 'senior'
     
     def get_height_weight_modifier(self, height_weight_ratio):
         """
@@ -284,14 +665,27 @@ class OutdoorRiskAssessment:
         Returns:
         float: Height-weight ratio modifier
         """
+        category = self.get_height_weight_category(height_weight_ratio)
+        return self.physical_attributes['height_weight_ratio'][category]['modifier']
+    
+    def get_height_weight_category(self, height_weight_ratio):
+        """
+        Get height-weight ratio category
+        
+        Parameters:
+        height_weight_ratio (float): User height-weight ratio
+        
+        Returns:
+        str: 'underweight', 'normal', 'overweight' or 'obese'
+        """
         if height_weight_ratio < 18.5:
-            return self.physical_attributes['height_weight_ratio']['underweight']['modifier']
+            return 'underweight'
         elif height_weight_ratio < 25:
-            return self.physical_attributes['height_weight_ratio']['normal']['modifier']
+            return 'normal'
         elif height_weight_ratio < 30:
-            return self.physical_attributes['height_weight_ratio']['overweight']['modifier']
+            return 'overweight'
         else:
-            return self.physical_attributes['height_weight_ratio']['obese']['modifier']
+            return 'obese'
     
     def get_gender_modifier(self, gender):
         """
@@ -313,6 +707,22 @@ class OutdoorRiskAssessment:
         equipment_quality_level (str): Quality of equipment
         activity_type (str): Type of outdoor activity
         
+        Returns:
+        float: Equipment risk score (0-10)
+        """
+        return self._memoize_component(
+            ('equipment', activity_type, equipment_quality_level),
+            lambda: self._assess_equipment_risk(equipment_quality_level, activity_type)
+        )
+    
+    def _assess_equipment_risk(self, equipment_quality_level, activity_type):
+        """
+        Assess equipment risk without memoization
+        
+        Parameters:
+        equipment_quality_level (str): Quality of equipment
+        activity_type (str): Type of outdoor activity
+        
         Returns:
         float: Equipment risk score (0-10)
         """
@@ -347,6 +757,159 @@ class OutdoorRiskAssessment:
         # If outside all ranges, it's extreme
         return 'extreme', risk_score
     
+    def incident_probability(self, risk_score):
+        """
+        Map a total risk score to the calibrated probability of an incident
+        
+        Parameters:
+        risk_score (float or array): Total risk score(s)
+        
+        Returns:
+        float or ndarray: sigmoid(scale * risk_score + offset) with the fitted
+            self.incident_link, or None if the system is not calibrated
+        """
+        if not self.incident_link:
+            return None
+        z = self.incident_link['scale'] * np.asarray(risk_score, dtype=np.float64) + self.incident_link['offset']
+        probability = 1 / (1 + np.exp(-z))
+        return float(probability) if probability.ndim == 0 else probability
+    
+    def categorize_risk_array(self, risk_scores):
+        """
+        Vectorized version of categorize_risk
+        
+        Parameters:
+        risk_scores (array): Numerical risk scores
+        
+        Returns:
+        ndarray: Indexes into list(self.risk_categories)
+        """
+        risk_scores = np.asarray(risk_scores, dtype=np.float64)
+        categories = list(self.risk_categories)
+        codes = np.full(risk_scores.shape, categories.index('extreme'), dtype=np.int64)
+        
+        # Reverse order so the first matching category wins, as in categorize_risk
+        for code in range(len(categories) - 1, -1, -1):
+            thresholds = self.risk_categories[categories[code]]
+            codes[(thresholds['min'] <= risk_scores) & (risk_scores < thresholds['max'])] = code
+        
+        return codes
+    
+    def load_risk_areas(self, path):
+        """
+        Add location-specific risk areas from a GeoJSON FeatureCollection
+        
+        Each feature needs 'name' and 'risk_modifier' properties; other
+        properties are kept alongside the modifier.
+        
+        Parameters:
+        path (str): GeoJSON file path
+        """
+        with open(path) as f:
+            collection = json.load(f)
+        
+        self.update_thresholds('location_specific_risks', {
+            feature['properties']['name']: dict(feature['properties'], geometry=feature['geometry'])
+            for feature in collection['features']
+        })
+    
+    def _get_risk_area_index(self):
+        """
+        Get the spatial index over the location-specific risk areas
+        
+        Returns:
+        tuple: (STRtree of area polygons, modifiers array, areas array)
+        """
+        if self._risk_area_index is None:
+            areas = [(shape(risk['geometry']), risk['risk_modifier'])
+                     for risk in self.location_specific_risks.values() if 'geometry' in risk]
+            geometries = [geometry for geometry, _ in areas]
+            self._risk_area_index = (
+                STRtree(geometries),
+                np.array([modifier for _, modifier in areas], dtype=np.float64),
+                np.array([geometry.area for geometry in geometries], dtype=np.float64)
+            )
+        return self._risk_area_index
+    
+    def get_location_modifiers(self, lats, lons):
+        """
+        Get the location-specific risk modifiers of many points at once
+        
+        Areas containing each point are found with one STRtree query and
+        combined by self.risk_area_combination.
+        
+        Parameters:
+        lats (array): Latitudes
+        lons (array): Longitudes
+        
+        Returns:
+        ndarray: Risk modifiers (1.0 where no area applies)
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        modifiers = np.ones(len(lats))
+        tree, area_modifiers, area_sizes = self._get_risk_area_index()
+        if len(area_modifiers) == 0:
+            return modifiers
+        
+        point_index, area_index = tree.query(shapely_points(lons, lats), predicate='intersects')
+        if self.risk_area_combination == 'product':
+            np.multiply.at(modifiers, point_index, area_modifiers[area_index])
+        elif self.risk_area_combination == 'smallest':
+            # Sort hits by point, then area size; the first hit of each point is its smallest area
+            order = np.lexsort((area_sizes[area_index], point_index))
+            points, first = np.unique(point_index[order], return_index=True)
+            modifiers[points] = area_modifiers[area_index[order[first]]]
+        else:
+            modifiers[np.unique(point_index)] = 0
+            np.maximum.at(modifiers, point_index, area_modifiers[area_index])
+        
+        return modifiers
+    
+    def get_location_modifier(self, location):
+        """
+        Get the location-specific risk modifier
+        
+        Parameters:
+        location (tuple or str): (latitude, longitude), or the name of a location-specific risk
+        
+        Returns:
+        float: Risk modifier (1.0 if no location-specific risk applies)
+        """
+        if location is None:
+            return 1.0
+        
+        if isinstance(location, str):
+            risk = self.location_specific_risks.get(location)
+            return risk['risk_modifier'] if risk else 1.0
+        
+        lat, lon = location
+        return float(self.get_location_modifiers(lat, lon)[0])
+    
+    def combine_component_risks(self, component_scores, location):
+        """
+        Combine component risk scores into the weighted total risk
+        
+        Parameters:
+        component_scores (dict): Contains 'terrain_risk', 'weather_risk', 'human_risk',
+            'equipment_risk' and 'weight_risk'
+        location (tuple): (latitude, longitude)
+        
+        Returns:
+        float: Total risk score
+        """
+        weights = self.component_weights
+        total_risk = (component_scores['terrain_risk'] * weights['terrain_risk'] + 
+                     component_scores['weather_risk'] * weights['weather_risk'] + 
+                     component_scores['human_risk'] * weights['human_risk'] + 
+                     component_scores['equipment_risk'] * weights['equipment_risk'] +
+                     component_scores['weight_risk'] * weights['weight_risk'])
+        
+        # Apply location-specific risk factors
+        total_risk *= self.get_location_modifier(location)
+        
+        return total_risk
+    
     def calculate_risk_score(self, location, activity_type, user_experience, 
                             group_size, weather_data, equipment_quality_level, 
                             terrain_data, weight_carried, age, height_weight_ratio, gender):
@@ -370,76 +933,259 @@ class OutdoorRiskAssessment:
         tuple: (risk_category, risk_score, component_scores)
         """
         # Calculate component risk scores
-        terrain_risk = self.assess_terrain_difficulty(location, terrain_data)
-        weather_risk = self.calculate_weather_risk(weather_data, activity_type)
+        terrain_risk = self.assess_terrain_difficulty(location, terrain_data, activity_type)
+        weather_risk = self.calculate_weather_risk(weather_data, activity_type, terrain_data)
         human_risk, weight_risk = self.calculate_human_risk(user_experience, group_size, activity_type, weight_carried, age, height_weight_ratio, gender)
         equipment_risk = self.assess_equipment_risk(equipment_quality_level, activity_type)
         
-        # Calculate weighted total risk
-        total_risk = (terrain_risk * 0.35 + 
-                     weather_risk * 0.25 + 
-                     human_risk * 0.20 + 
-                     equipment_risk * 0.10 +
-                     weight_risk * 0.10)
-        
-        # Apply location-specific risk factors
-        if location in self.location_specific_risks:
-            total_risk *= self.location_specific_risks[location]['risk_modifier']
-        
         # Store component scores for detailed report
         component_scores = {
             'terrain_risk': terrain_risk,
             'weather_risk': weather_risk,
             'human_risk': human_risk,
             'equipment_risk': equipment_risk,
-            'weight_risk': weight_risk,
-            'total_risk': total_risk
+            'weight_risk': weight_risk
         }
         
+        # Calculate weighted total risk with location-specific risk factors
+        total_risk = self.combine_component_risks(component_scores, location)
+        component_scores['total_risk'] = total_risk
+        
         # Categorize risk level
         risk_category, risk_score = self.categorize_risk(total_risk)
         
         return risk_category, risk_score, component_scores
     
-    def generate_risk_report(self, risk_category, risk_score, component_scores, 
-                           location, activity_type, weather_data, weight_carried, equipment_quality_level, age, height_weight_ratio, gender):
+    def calculate_risk_uncertainty(self, location, activity_type, user_experience, 
+                                   group_size, weather_data, equipment_quality_level, 
+                                   terrain_data, weight_carried, age, height_weight_ratio, gender,
+                                   samples=10000, percentiles=(5, 25, 50, 75, 95), seed=None):
         """
-        Generate a detailed risk assessment report
+        Estimate the spread of the risk score under forecast and terrain uncertainty
+        
+        Weather and terrain inputs are perturbed with the standard deviations
+        in self.input_uncertainty (additively, clipped to each input's valid
+        range, so calm and dry forecasts still carry uncertainty) and every
+        sample is scored in one vectorized pass. Human, equipment and weight
+        risks do not depend on the perturbed inputs and are computed once.
         
         Parameters:
-        risk_category (str): Risk category
-        risk_score (float): Numerical risk score
-        component_scores (dict): Individual component risk scores
-        location (tuple): (latitude, longitude)
-        activity_type (str): Type of outdoor activity
-        weather_data (dict): Weather forecast data
-        weight_carried (float): Weight carried in pounds
-        equipment_quality_level (str): Quality level of equipment
-        age (int): User age
-        height_weight_ratio (float): User height-weight ratio
-        gender (str): User gender
+        location, activity_type, ..., gender: As for calculate_risk_score
+        samples (int): Number of Monte Carlo samples
+        percentiles (tuple): Percentiles of the risk score to report
+        seed (int): Random seed for reproducible samples
         
         Returns:
-        dict: Detailed risk assessment report
+        dict: Point 'risk_score' and 'risk_category', sample 'mean' and 'std',
+            'percentiles' and 'category_probabilities'
         """
-        # Format location
-        lat, lon = location
-        location_str = f"{lat:.4f}°N, {lon:.4f}°W"
+        rng = np.random.default_rng(seed)
+        sigma = self.input_uncertainty
         
-        # Format date and time
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
+        def perturb(value, std):
+            return value + rng.standard_normal(samples) * std
         
-        # Generate recommendations based on risk level
-        if risk_category == 'low':
-            recommendations = [
-                "Standard precautions recommended",
-                "Always inform someone of your plans",
-                "Carry basic safety equipment"
-            ]
-        elif risk_category == 'moderate':
-            recommendations = [
-                "Enhanced preparedness recommended",
-                "Check conditions before departing",
+        temperature = perturb(weather_data.get('temperature', 68), sigma['temperature'])
+        precipitation = np.maximum(0, perturb(weather_data.get('precipitation', 0), sigma['precipitation']))
+        wind_speed = np.maximum(0, perturb(weather_data.get('wind_speed', 0), sigma['wind_speed']))
+        thunderstorm_risk = np.clip(perturb(weather_data.get('thunderstorm_risk', 0), sigma['thunderstorm_risk']), 0, 1)
+        
+        elevation = perturb(terrain_data.get('elevation', 0), sigma['elevation'])
+        slope = np.maximum(0, perturb(terrain_data.get('slope', 0), sigma['slope']))
+        ruggedness = np.clip(perturb(terrain_data.get('ruggedness', 0), sigma['ruggedness']), 0, 1)
+        
+        terrain_risk = self.assess_terrain_difficulty_array(
+            elevation, slope, ruggedness, activity_type,
+            terrain_data.get('avalanche_terrain_fraction'), terrain_data.get('walkout_time')
+        )
+        weather_risk = self.calculate_weather_risk_array(
+            temperature, precipitation, wind_speed, thunderstorm_risk,
+            self.activity_types[activity_type]['weather_sensitivity'],
+            terrain_data.get('wind_exposure'), terrain_data.get('lightning_exposure')
+        )
+        human_risk, weight_risk = self.calculate_human_risk(user_experience, group_size, activity_type, weight_carried, age, height_weight_ratio, gender)
+        equipment_risk = self.assess_equipment_risk(equipment_quality_level, activity_type)
+        
+        total_risk = self.combine_component_risks({
+            'terrain_risk': terrain_risk,
+            'weather_risk': weather_risk,
+            'human_risk': human_risk,
+            'equipment_risk': equipment_risk,
+            'weight_risk': weight_risk
+        }, location)
+        
+        categories = list(self.risk_categories)
+        category_counts = np.bincount(self.categorize_risk_array(total_risk), minlength=len(categories))
+        risk_category, risk_score, _ = self.calculate_risk_score(
+            location, activity_type, user_experience, group_size, weather_data, equipment_quality_level,
+            terrain_data, weight_carried, age, height_weight_ratio, gender
+        )
+        
+        return {
+            'risk_score': risk_score,
+            'risk_category': risk_category,
+            'mean': float(total_risk.mean()),
+            'std': float(total_risk.std()),
+            'percentiles': dict(zip(percentiles, np.percentile(total_risk, percentiles).tolist())),
+            'category_probabilities': {
+                category: float(count) / samples for category, count in zip(categories, category_counts)
+            }
+        }
+    
+    def sensitivity_sweep(self, location, activity_type, user_experience, 
+                          group_size, weather_data, equipment_quality_level, 
+                          terrain_data, weight_carried, age, height_weight_ratio, gender,
+                          start_hour=9, weights=None, equipment_levels=None, group_sizes=None, start_hours=None):
+        """
+        Score every combination of the user-controllable inputs
+        
+        The grid spans weight carried x equipment quality x group size x
+        start hour. Component risks are computed once per axis value and
+        broadcast into the full grid; the start hour scales the day's
+        thunderstorm risk by self.start_hour_thunderstorm relative to the
+        planned start hour, so the baseline matches calculate_risk_score. The cheapest
+        change (by self.change_costs) that lowers the risk category is
+        reported.
+        
+        Parameters:
+        location, activity_type, ..., gender: As for calculate_risk_score
+        start_hour (int): Planned start hour (0-23)
+        weights (list): Weights to try in pounds (defaults to 5 lb steps down from weight_carried)
+        equipment_levels (list): Equipment quality levels to try (defaults to all)
+        group_sizes (list): Group sizes to try (defaults to 1, 2, 4, 6 and the current size)
+        start_hours (list): Start hours to try (defaults to 4-14)
+        
+        Returns:
+        dict: 'axes' (axis name -> values), 'risk_score' grid, 'risk_category' grid,
+            'baseline' and 'cheapest_change' (None if no change lowers the category)
+        """
+        def axis(values, current):
+            return sorted(set(values) | {current})
+        
+        equipment_order = list(self.equipment_quality)
+        axes = OrderedDict([
+            ('weight_carried', axis(weights if weights is not None else np.arange(weight_carried, -1, -5).tolist(), weight_carried)),
+            ('equipment_quality_level', axis(equipment_levels or equipment_order, equipment_quality_level)),
+            ('group_size', axis(group_sizes or [1, 2, 4, 6], group_size)),
+            ('start_hour', axis(start_hours if start_hours is not None else range(4, 15), start_hour))
+        ])
+        axes['equipment_quality_level'].sort(key=equipment_order.index)
+        
+        # Component risks per axis value, shaped to broadcast over (weight, equipment, group, hour).
+        # Human risk depends on weight and group size only through their categories, so it is
+        # scored once per category pair and gathered back onto the axes.
+        _, weight_first, weight_index = np.unique(
+            [self.get_weight_category(weight) for weight in axes['weight_carried']],
+            return_index=True, return_inverse=True)
+        _, group_first, group_index = np.unique(
+            [self.get_group_size_category(size) for size in axes['group_size']],
+            return_index=True, return_inverse=True)
+        category_risks = np.array([[self.calculate_human_risk(
+            user_experience, axes['group_size'][j], activity_type, axes['weight_carried'][i],
+            age, height_weight_ratio, gender) for j in group_first] for i in weight_first])
+        human_risk = category_risks[weight_index[:, np.newaxis], group_index[np.newaxis, :], 0]
+        weight_risk = category_risks[weight_index, 0, 1][:, np.newaxis]
+        equipment_risk = np.array([self.assess_equipment_risk(level, activity_type)
+                                   for level in axes['equipment_quality_level']])
+        
+        # The forecast thunderstorm risk already describes the planned start hour
+        hour_factor = (np.interp(axes['start_hour'], self.start_hour_thunderstorm['hours'],
+                                 self.start_hour_thunderstorm['factors']) /
+                       np.interp(start_hour, self.start_hour_thunderstorm['hours'],
+                                 self.start_hour_thunderstorm['factors']))
+        weather_risk = self.calculate_weather_risk_array(
+            weather_data.get('temperature', 68), weather_data.get('precipitation', 0),
+            weather_data.get('wind_speed', 0), np.minimum(1, weather_data.get('thunderstorm_risk', 0) * hour_factor),
+            self.activity_types[activity_type]['weather_sensitivity'],
+            terrain_data.get('wind_exposure'), terrain_data.get('lightning_exposure')
+        )
+        terrain_risk = self.assess_terrain_difficulty(location, terrain_data, activity_type)
+        
+        risk_score = self.combine_component_risks({
+            'terrain_risk': terrain_risk,
+            'weather_risk': weather_risk[np.newaxis, np.newaxis, np.newaxis, :],
+            'human_risk': human_risk[:, np.newaxis, :, np.newaxis],
+            'equipment_risk': equipment_risk[np.newaxis, :, np.newaxis, np.newaxis],
+            'weight_risk': weight_risk[:, :, np.newaxis, np.newaxis]
+        }, location)
+        category_codes = self.categorize_risk_array(risk_score)
+        categories = np.array(list(self.risk_categories))
+        
+        # Cost of moving from the current inputs to each grid cell
+        current = [axes[name].index(value) for name, value in
+                   zip(axes, [weight_carried, equipment_quality_level, group_size, start_hour])]
+        costs = self.change_costs
+        cost = (costs['weight_carried'] * np.maximum(0, weight_carried - np.array(axes['weight_carried']))[:, None, None, None] +
+                costs['equipment_quality_level'] * np.maximum(0, np.arange(len(axes['equipment_quality_level'])) - current[1])[None, :, None, None] +
+                costs['group_size'] * np.abs(np.array(axes['group_size']) - group_size)[None, None, :, None] +
+                costs['start_hour'] * np.abs(np.array(axes['start_hour']) - start_hour)[None, None, None, :])
+        
+        baseline_code = category_codes[tuple(current)]
+        cheapest_change = None
+        improved = category_codes < baseline_code
+        if improved.any():
+            # Lowest cost first, then lowest score
+            candidates = np.flatnonzero(improved)
+            order = np.lexsort((risk_score.ravel()[candidates], cost.ravel()[candidates]))
+            best = np.unravel_index(candidates[order[0]], risk_score.shape)
+            cheapest_change = {
+                'changes': {name: axes[name][index] for name, index, current_index in zip(axes, best, current)
+                            if index != current_index},
+                'cost': float(cost[best]),
+                'risk_score': float(risk_score[best]),
+                'risk_category': str(categories[category_codes[best]])
+            }
+        
+        return {
+            'axes': axes,
+            'risk_score': risk_score,
+            'risk_category': categories[category_codes],
+            'baseline': {
+                'risk_score': float(risk_score[tuple(current)]),
+                'risk_category': str(categories[baseline_code])
+            },
+            'cheapest_change': cheapest_change
+        }
+    
+    def generate_risk_report(self, risk_category, risk_score, component_scores, 
+                           location, activity_type, weather_data, weight_carried, equipment_quality_level, age, height_weight_ratio, gender):
+        """
+        Generate a detailed risk assessment report
+        
+        Parameters:
+        risk_category (str): Risk category
+        risk_score (float): Numerical risk score
+        component_scores (dict): Individual component risk scores
+        location (tuple): (latitude, longitude)
+        activity_type (str): Type of outdoor activity
+        weather_data (dict): Weather forecast data
+        weight_carried (float): Weight carried in pounds
+        equipment_quality_level (str): Quality level of equipment
+        age (int): User age
+        height_weight_ratio (float): User height-weight ratio
+        gender (str): User gender
+        
+        Returns:
+        dict: Detailed risk assessment report
+        """
+        # Format location
+        lat, lon = location
+        location_str = f"{lat:.4f}°N, {lon:.4f}°W"
+        
+        # Format date and time
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
+        
+        # Generate recommendations based on risk level
+        if risk_category == 'low':
+            recommendations = [
+                "Standard precautions recommended",
+                "Always inform someone of your plans",
+                "Carry basic safety equipment"
+            ]
+        elif risk_category == 'moderate':
+            recommendations = [
+                "Enhanced preparedness recommended",
+                "Check conditions before departing",
                 "Carry appropriate safety gear",
                 "Have backup plans in place"
             ]
@@ -520,10 +1266,338 @@ def kg_to_pounds(kg):
     """Convert kilograms to pounds"""
     return kg * 2.20462
 
-def fetch_weather_data(api_key, location):
+# OpenWeather API key (override with the OPENWEATHER_API_KEY environment variable)
+OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY', "4a83bd4fc2b689e8056e4bb5fe026641")
+
+def weather_code_thunderstorm_risk(weather_id):
+    """
+    Estimate thunderstorm risk from an OpenWeather condition code
+    
+    Parameters:
+    weather_id (int): OpenWeather condition code
+    
+    Returns:
+    float: Thunderstorm probability 0-1
+    """
+    if 200 <= weather_id < 300:  # Thunderstorm codes
+        return 0.8
+    elif 300 <= weather_id < 400:  # Drizzle codes
+        return 0.1
+    elif 500 <= weather_id < 600:  # Rain codes
+        return 0.3
+    return 0
+
+def weather_code_condition(weather_id):
+    """
+    Map an OpenWeather condition code to the condition and icon shown on the web page
+    
+    Parameters:
+    weather_id (int): OpenWeather condition code
+    
+    Returns:
+    tuple: (condition, Font Awesome icon name)
+    """
+    if 200 <= weather_id < 300:
+        return 'Thunderstorm', 'bolt'
+    elif 300 <= weather_id < 600:
+        return 'Rain', 'cloud-rain'
+    elif 600 <= weather_id < 700:
+        return 'Snow', 'snowflake'
+    elif weather_id == 800:
+        return 'Sunny', 'sun'
+    elif weather_id in (801, 802):
+        return 'Partly Cloudy', 'cloud-sun'
+    return 'Cloudy', 'cloud'
+
+def parse_daily_forecast(data, days=5):
+    """
+    Convert the daily entries of a One Call response for risk assessment and display
+    
+    Parameters:
+    data (dict): OpenWeather One Call response (metric units)
+    days (int): Number of days to keep
+    
+    Returns:
+    list: One dict per day with display fields and 'weather' data for the risk model
+    """
+    forecast = []
+    for daily in data.get('daily', [])[:days]:
+        temp = daily.get('temp', {})
+        weather_id = daily.get('weather', [{}])[0].get('id', 800)
+        condition, icon = weather_code_condition(weather_id)
+        
+        forecast.append({
+            'date': datetime.fromtimestamp(daily.get('dt', 0)).strftime("%Y-%m-%d"),
+            'temp_high': round(celsius_to_fahrenheit(temp.get('max', 20))),
+            'temp_low': round(celsius_to_fahrenheit(temp.get('min', 20))),
+            'condition': condition,
+            'icon': icon,
+            'precip_chance': round(daily.get('pop', 0) * 100),
+            'weather': {
+                'temperature': round(celsius_to_fahrenheit(temp.get('day', 20)), 1),
+                'precipitation': round(mm_to_inches(daily.get('rain', 0) + daily.get('snow', 0)), 2),
+                'wind_speed': round(kmh_to_mph(daily.get('wind_speed', 0) * 3.6), 1),  # Convert m/s to mph
+                'thunderstorm_risk': weather_code_thunderstorm_risk(weather_id),
+                'uv_index': daily.get('uvi', 0)
+            }
+        })
+    
+    return forecast
+
+def fetch_forecast_data(api_key, location, days=5, timeout=10):
+    """
+    Fetch the multi-day forecast from OpenWeather API
+    
+    Parameters:
+    api_key (str): OpenWeather API key
+    location (tuple): (latitude, longitude)
+    days (int): Number of days to keep
+    timeout (float): Request timeout in seconds
+    
+    Returns:
+    list: Daily forecast (see parse_daily_forecast), or None if the request failed
+    """
+    lat, lon = location
+    url = f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={lon}&exclude=current,minutely,hourly,alerts&units=metric&appid={api_key}"
+    
+    try:
+        response = requests.get(url, timeout=timeout)
+        data = response.json()
+        
+        if response.status_code != 200:
+            print(f"Error fetching forecast data: {data.get('message', 'Unknown error')}")
+            return None
+        
+        return parse_daily_forecast(data, days)
+    
+    except Exception as e:
+        print(f"Exception when fetching forecast data: {str(e)}")
+        return None
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one computation
+
+    The first caller for a key runs the function; callers arriving while
+    it is in flight wait for the same result instead of repeating the work.
+    Threads and asyncio tasks share the same in-flight calls.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty set of in-flight calls
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'executions': 0, 'deduplicated': 0}
+
+    def _join(self, key):
+        with self._lock:
+            self.stats['calls'] += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats['deduplicated'] += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.stats['executions'] += 1
+            return future, True
+
+    def _run(self, key, future, func, args, kwargs):
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Call func, or wait for the identical call already in flight
+
+        Parameters:
+        key (hashable): Identifies identical calls
+        func (callable): Function to run
+        *args, **kwargs: Arguments for func
+
+        Returns:
+        The result of func (shared by all coalesced callers)
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, func, args, kwargs)
+        return future.result()
+
+    async def do_async(self, key, func, *args, **kwargs):
+        """
+        Asyncio version of do(); func runs in the loop's default executor
+
+        Parameters:
+        key (hashable): Identifies identical calls
+        func (callable): Blocking function to run
+        *args, **kwargs: Arguments for func
+
+        Returns:
+        The result of func (shared by all coalesced callers)
+        """
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(None, self._run, key, future, func, args, kwargs)
+        return await asyncio.wrap_future(future)
+
+
+# Coalesces concurrent weather requests for the same location
+weather_single_flight = SingleFlight()
+
+
+class SpatialCache:
+    """
+    Cache of per-location results answered by the nearest cached centre
+
+    Centres are kept in a cKDTree of Earth-centred coordinates in meters, so
+    tolerances are true distances. New entries go to a short pending list
+    that is scanned directly and merged into the tree in batches. Entries
+    can be put under a scope (e.g. an API key) and are only returned for
+    lookups in the same scope.
+    """
+
+    def __init__(self, tolerance=50, radius_tolerance=0.1, max_age=None, max_entries=10000, rebuild_every=64):
+        """
+        Initialize the cache
+
+        Parameters:
+        tolerance (float): Largest distance in meters from a cached centre to reuse it
+        radius_tolerance (float): Largest relative radius difference to reuse an entry
+        max_age (float): Seconds an entry stays valid (None for no expiry)
+        max_entries (int): Most entries kept; the oldest are dropped in a batch on insert when exceeded
+        rebuild_every (int): Pending entries that trigger a tree rebuild
+        """
+        self.tolerance = tolerance
+        self.radius_tolerance = radius_tolerance
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.rebuild_every = rebuild_every
+
+        self._xyz = []
+        self._entries = []
+        self._tree = None
+        self._tree_size = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'rebuilds': 0}
+
+    @staticmethod
+    def _to_xyz(location):
+        lat, lon = np.radians(location[0]), np.radians(location[1])
+        return 6371000 * np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+    def get(self, location, radius=0, now=None, scope=None):
+        """
+        Get the cached value of the nearest matching centre
+
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (float): Query radius the value must have been computed for
+        now (float): Current time in seconds (defaults to time.time())
+        scope (hashable): Scope the value must have been put under
+
+        Returns:
+        Cached value, or None if no centre is within tolerance
+        """
+        xyz = self._to_xyz(location)
+        now = time.time() if now is None else now
+
+        with self._lock:
+            candidates = list(self._tree.query_ball_point(xyz, self.tolerance)) if self._tree is not None else []
+            if len(self._xyz) > self._tree_size:
+                pending = np.array(self._xyz[self._tree_size:])
+                near = np.flatnonzero(np.linalg.norm(pending - xyz, axis=1) <= self.tolerance)
+                candidates.extend(self._tree_size + near)
+
+            best, best_distance = None, None
+            for index in candidates:
+                cached_radius, cached_scope, value, stored = self._entries[index]
+                if cached_scope != scope:
+                    continue
+                if abs(cached_radius - radius) > self.radius_tolerance * max(radius, cached_radius):
+                    continue
+                if self.max_age is not None and now - stored > self.max_age:
+                    continue
+                distance = np.linalg.norm(self._xyz[index] - xyz)
+                if best_distance is None or distance < best_distance:
+                    best, best_distance = value, distance
+
+            self.stats['hits' if best_distance is not None else 'misses'] += 1
+            return best
+
+    def put(self, location, radius, value, now=None, scope=None):
+        """
+        Cache a value computed for a location
+
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (float): Query radius the value was computed for
+        value: Value to cache
+        now (float): Current time in seconds (defaults to time.time())
+        scope (hashable): Scope the value belongs to
+        """
+        with self._lock:
+            self._xyz.append(self._to_xyz(location))
+            self._entries.append((radius, scope, value, time.time() if now is None else now))
+            if (len(self._xyz) - self._tree_size >= self.rebuild_every or
+                    len(self._entries) > self.max_entries):
+                self._rebuild(now)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _rebuild(self, now=None):
+        now = time.time() if now is None else now
+        # Evict in batches, so a full cache is not rebuilt on every insert
+        limit = self.max_entries
+        if len(self._entries) > self.max_entries:
+            limit -= min(self.rebuild_every, self.max_entries // 4)
+        keep = [i for i, (_, _, _, stored) in enumerate(self._entries)
+                if self.max_age is None or now - stored <= self.max_age][-limit:] if limit > 0 else []
+        self._xyz = [self._xyz[i] for i in keep]
+        self._entries = [self._entries[i] for i in keep]
+        self._tree = cKDTree(np.array(self._xyz)) if self._xyz else None
+        self._tree_size = len(self._xyz)
+        self.stats['rebuilds'] += 1
+
+
+# Recent weather per API key, reused for requests within 1 km for 10 minutes
+_weather_cache = SpatialCache(tolerance=1000, max_age=600)
+
+
+def fetch_weather_data(api_key, location, scheduler=None):
     """
     Fetch weather data from OpenWeather API
     
+    Successful responses are reused for nearby requests for a few minutes
+    (see _weather_cache), and concurrent requests for the same location
+    share one API call (see weather_single_flight). With a scheduler, the
+    weather comes from its per-cell cache within the API quota instead.
+    
+    Parameters:
+    api_key (str): OpenWeather API key
+    location (tuple): (latitude, longitude)
+    scheduler (WeatherFetchScheduler): Quota-aware scheduler to serve the request
+    
+    Returns:
+    dict: Weather data formatted for risk assessment
+    """
+    if scheduler is not None:
+        return scheduler.get(location)
+    
+    key = (api_key, float(location[0]), float(location[1]))
+    return dict(weather_single_flight.do(key, _fetch_weather_data, api_key, location))
+
+
+def _fetch_weather_data(api_key, location):
+    """
+    Fetch weather data from OpenWeather API without request coalescing
+    
     Parameters:
     api_key (str): OpenWeather API key
     location (tuple): (latitude, longitude)
@@ -531,22 +1605,41 @@ def fetch_weather_data(api_key, location):
     Returns:
     dict: Weather data formatted for risk assessment
     """
+    cached = _weather_cache.get(location, scope=api_key)
+    if cached is not None:
+        return dict(cached)
+    
+    weather_data = request_current_weather(api_key, location)
+    if weather_data is None:
+        # Return default weather data
+        return dict(DEFAULT_WEATHER)
+    
+    _weather_cache.put(location, 0, dict(weather_data), scope=api_key)
+    return weather_data
+
+
+def request_current_weather(api_key, location, timeout=10):
+    """
+    Request current weather from OpenWeather API (one API call, no caching)
+    
+    Parameters:
+    api_key (str): OpenWeather API key
+    location (tuple): (latitude, longitude)
+    timeout (float): Request timeout in seconds
+    
+    Returns:
+    dict: Weather data formatted for risk assessment, or None if the request failed
+    """
     lat, lon = location
     url = f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={lon}&exclude=minutely,hourly&units=metric&appid={api_key}"
     
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=timeout)
         data = response.json()
         
         if response.status_code != 200:
             print(f"Error fetching weather data: {data.get('message', 'Unknown error')}")
-            # Return default weather data
-            return {
-                'temperature': 68,     # Fahrenheit
-                'precipitation': 0,    # inches
-                'wind_speed': 6,       # mph
-                'thunderstorm_risk': 0 # probability 0-1
-            }
+            return None
         
         # Extract relevant weather data
         current = data.get('current', {})
@@ -562,151 +1655,550 @@ def fetch_weather_data(api_key, location):
         
         # Calculate thunderstorm risk from weather ID
         weather_id = current.get('weather', [{}])[0].get('id', 800)
-        if 200 <= weather_id < 300:  # Thunderstorm codes
-            weather_data['thunderstorm_risk'] = 0.8
-        elif 300 <= weather_id < 400:  # Drizzle codes
-            weather_data['thunderstorm_risk'] = 0.1
-        elif 500 <= weather_id < 600:  # Rain codes
-            weather_data['thunderstorm_risk'] = 0.3
+        weather_data['thunderstorm_risk'] = weather_code_thunderstorm_risk(weather_id)
         
         return weather_data
     
     except Exception as e:
         print(f"Exception when fetching weather data: {str(e)}")
-        # Return default weather data
-        return {
-            'temperature': 68,     # Fahrenheit
-            'precipitation': 0,    # inches
-            'wind_speed': 6,       # mph
-            'thunderstorm_risk': 0 # probability 0-1
-        }
+        return None
 
 
-class GISTerrainAnalyzer:
-    def __init__(self, dem_cache_dir="dem_cache"):
-        """
-        Initialize GIS terrain analyzer
-        
-        Parameters:
-        dem_cache_dir (str): Directory to cache DEM files
-        """
-        self.dem_cache_dir = dem_cache_dir
-        
-        # Create cache directory if it doesn't exist
-        if not os.path.exists(dem_cache_dir):
-            os.makedirs(dem_cache_dir)
+def weather_cell_key(location, cell_size=0.1):
+    """
+    Get the weather grid cell containing a location
     
-    def get_elevation_data(self, location, radius=1000):
-        """
-        Get elevation data for a location within a specified radius
-        
-        Parameters:
-        location (tuple): (latitude, longitude)
-        radius (int): Radius in meters to analyze around the point
-        
-        Returns:
-        dict: DEM data including file path and metadata
-        """
-        lat, lon = location
-        
-        # Generate a filename for the cached DEM
-        cache_filename = f"{self.dem_cache_dir}/dem_{lat:.4f}_{lon:.4f}_{radius}.tif"
-        
-        # Check if we have a cached version
-        if os.path.exists(cache_filename):
-            print(f"Using cached DEM data for location {lat:.4f}, {lon:.4f}")
-            return {"filepath": cache_filename}
-        
-        # If not cached, download from Open-Elevation API or similar
-        # Note: For production use, you should use a more robust elevation API
-        # Options include: USGS 3DEP, SRTM, ASTER GDEM, or commercial APIs like Mapbox
-        print(f"Fetching DEM data for location {lat:.4f}, {lon:.4f}")
-        
-        # Calculate bounding box
-        # Approximate conversion from degrees to meters at equator: 111,320 m per degree
-        # This is a simplification; for more precise calculations use a proper geospatial library
-        m_per_deg = 111320
-        deg_offset = radius / m_per_deg
-        
-        # Create bounding box
-        xmin = lon - deg_offset
-        xmax = lon + deg_offset
-        ymin = lat - deg_offset
-        ymax = lat + deg_offset
-        
-        # For this example, we'll use Open-Elevation API
-        # In a production environment, replace with a more robust source
-        url = f"https://api.open-elevation.com/api/v1/bounds?bounds={xmin},{ymin},{xmax},{ymax}&resolution=30"
+    Locations in the same cell share one forecast.
+    
+    Parameters:
+    location (tuple): (latitude, longitude)
+    cell_size (float): Cell size in degrees
+    
+    Returns:
+    tuple: (row, column) cell indices
+    """
+    lat, lon = location
+    return (int(np.floor(lat / cell_size)), int(np.floor(lon / cell_size)))
+
+
+def load_route(path):
+    """
+    Load a route from a GPX or GeoJSON file
+    
+    GPX track and route points are read in order; GeoJSON LineString and
+    MultiLineString geometries (bare or inside Features) are concatenated.
+    
+    Parameters:
+    path (str): Path to a .gpx or .geojson/.json file
+    
+    Returns:
+    ndarray: (N, 2) array of (latitude, longitude) vertices
+    """
+    if path.lower().endswith('.gpx'):
+        points = [
+            (float(element.get('lat')), float(element.get('lon')))
+            for element in ElementTree.parse(path).iter()
+            if element.tag.rsplit('}', 1)[-1] in ('trkpt', 'rtept')
+        ]
+        return np.array(points, dtype=np.float64)
+    
+    with open(path) as f:
+        data = json.load(f)
+    
+    features = data.get('features', [data])
+    lines = []
+    for feature in features:
+        geometry = feature.get('geometry', feature)
+        if geometry['type'] == 'LineString':
+            lines.append(geometry['coordinates'])
+        elif geometry['type'] == 'MultiLineString':
+            lines.extend(geometry['coordinates'])
+    
+    # GeoJSON stores (longitude, latitude[, elevation])
+    coords = np.array([point[:2] for line in lines for point in line], dtype=np.float64)
+    return coords[:, ::-1]
+
+def densify_route(route, spacing=30):
+    """
+    Insert points along a route so that no two samples are more than spacing apart
+    
+    Parameters:
+    route (ndarray): (N, 2) array of (latitude, longitude) vertices
+    spacing (float): Maximum distance between samples in meters
+    
+    Returns:
+    tuple: ((M, 2) densified vertices, (M,) cumulative distance in meters)
+    """
+    route = np.asarray(route, dtype=np.float64)
+    
+    # Equirectangular distances are accurate to well under 1% at segment scale
+    m_per_deg = 111320
+    lat_rad = np.radians(route[:, 0])
+    dy = np.diff(route[:, 0]) * m_per_deg
+    dx = np.diff(route[:, 1]) * m_per_deg * np.cos((lat_rad[1:] + lat_rad[:-1]) / 2)
+    vertex_distance = np.concatenate([[0.0], np.cumsum(np.hypot(dx, dy))])
+    
+    # Keep the original vertices and add evenly spaced samples between them
+    num_samples = max(2, int(np.ceil(vertex_distance[-1] / spacing)) + 1)
+    distance = np.union1d(np.linspace(0, vertex_distance[-1], num_samples), vertex_distance)
+    points = np.column_stack([
+        np.interp(distance, vertex_distance, route[:, 0]),
+        np.interp(distance, vertex_distance, route[:, 1])
+    ])
+    
+    return points, distance
+
+def sample_raster_bilinear(raster, transform, lats, lons):
+    """
+    Sample a north-up raster at many points with bilinear interpolation
+    
+    Parameters:
+    raster (ndarray): 2D raster
+    transform (Affine): Raster geotransform
+    lats, lons (ndarray): Sample coordinates
+    
+    Returns:
+    ndarray: Interpolated values (edge values are extended outside the raster)
+    """
+    inverse = ~transform
+    cols = inverse.a * lons + inverse.b * lats + inverse.c - 0.5
+    rows = inverse.d * lons + inverse.e * lats + inverse.f - 0.5
+    
+    height, width = raster.shape
+    col0 = np.clip(np.floor(cols).astype(np.int64), 0, width - 2)
+    row0 = np.clip(np.floor(rows).astype(np.int64), 0, height - 2)
+    fx = np.clip(cols - col0, 0, 1)
+    fy = np.clip(rows - row0, 0, 1)
+    
+    top = raster[row0, col0] * (1 - fx) + raster[row0, col0 + 1] * fx
+    bottom = raster[row0 + 1, col0] * (1 - fx) + raster[row0 + 1, col0 + 1] * fx
+    
+    return top * (1 - fy) + bottom * fy
+
+
+class ElevationProvider:
+    """
+    Base class for DEM sources used by GISTerrainAnalyzer
+    
+    Subclasses implement fetch(bounds). Bounding boxes loaded with prefetch()
+    are written to prefetch_dir and served from disk by later reads, so
+    queries inside a prefetched region never reach the backend.
+    """
+    
+    def __init__(self, prefetch_dir=None):
+        """
+        Initialize the provider
         
-        try:
-            # Make the request but don't store the response since we're not using it
-            requests.get(url)
-            
-            # Process the response to create a GeoTIFF
-            # This is a simplified example and would need to be expanded
-            # for a production implementation
-            
-            # For now, we'll create a dummy DEM file for demonstration
-            # In a real implementation, you would process the actual API response
-            self._create_dummy_dem(cache_filename, lat, lon, radius)
-            
-            return {"filepath": cache_filename}
-            
-        except Exception as e:
-            print(f"Error fetching elevation data: {str(e)}")
-            return None
+        Parameters:
+        prefetch_dir (str): Directory for prefetched GeoTIFFs (None disables prefetch)
+        """
+        self.prefetch_dir = prefetch_dir
+        self._prefetched = []
+        
+        if prefetch_dir:
+            if not os.path.exists(prefetch_dir):
+                os.makedirs(prefetch_dir)
+            for filename in sorted(os.listdir(prefetch_dir)):
+                if filename.endswith('.tif'):
+                    path = os.path.join(prefetch_dir, filename)
+                    with rasterio.open(path) as src:
+                        self._prefetched.append((tuple(src.bounds), path))
+    
+    def read(self, bounds, res=None):
+        """
+        Read elevations for a bounding box
+        
+        Parameters:
+        bounds (tuple): (xmin, ymin, xmax, ymax) in degrees
+        res (tuple): Optional coarser (x, y) cell size in degrees to read at
+        
+        Returns:
+        tuple: (elevation grid in meters, transform)
+        """
+        xmin, ymin, xmax, ymax = bounds
+        for (pxmin, pymin, pxmax, pymax), path in self._prefetched:
+            if pxmin <= xmin and pymin <= ymin and xmax <= pxmax and ymax <= pymax:
+                return read_raster_window([path], bounds, res)
+        return self.fetch(bounds, res)
+    
+    def fetch(self, bounds, res=None):
+        """
+        Load elevations for a bounding box from the backend
+        
+        Parameters:
+        bounds (tuple): (xmin, ymin, xmax, ymax) in degrees
+        res (tuple): Optional coarser (x, y) cell size in degrees (backends may ignore it)
+        
+        Returns:
+        tuple: (elevation grid in meters, transform)
+        """
+        raise NotImplementedError
+    
+    def prefetch(self, bounds):
+        """
+        Load a whole bounding box once and keep it on disk for later reads
+        
+        Parameters:
+        bounds (tuple): (xmin, ymin, xmax, ymax) in degrees
+        
+        Returns:
+        str: Path of the prefetched GeoTIFF
+        """
+        if not self.prefetch_dir:
+            raise ValueError("prefetch_dir is required for prefetching")
+        
+        dem, transform = self.fetch(bounds)
+        path = os.path.join(
+            self.prefetch_dir,
+            "prefetch_{:.4f}_{:.4f}_{:.4f}_{:.4f}.tif".format(*bounds)
+        )
+        write_raster(path, dem, transform)
+        
+        with rasterio.open(path) as src:
+            self._prefetched.append((tuple(src.bounds), path))
+        return path
+
+
+class SyntheticElevationProvider(ElevationProvider):
+    """Generated peak-shaped DEMs for demos and offline tests"""
+    
+    def __init__(self, size=100, prefetch_dir=None):
+        """
+        Initialize the synthetic provider
+        
+        Parameters:
+        size (int): Grid size of each generated DEM
+        prefetch_dir (str): Directory for prefetched GeoTIFFs
+        """
+        super().__init__(prefetch_dir)
+        self.size = size
+    
+    def fetch(self, bounds, res=None):
+        xmin, ymin, xmax, ymax = bounds
+        size = self.size
+        
+        # Simple mountain peak at the center, built in float32 in place
+        offsets = np.arange(size, dtype=np.float32) - size // 2
+        np.square(offsets, out=offsets)
+        dem = offsets[:, np.newaxis] + offsets[np.newaxis, :]
+        dem *= np.float32(-0.01)
+        np.exp(dem, out=dem)
+        dem *= np.float32(1000)
+        
+        # Add some random variation, seeded by the bounds for repeatability
+        seed = int(((ymin + ymax) / 2 + 180) * 1000) + int(((xmin + xmax) / 2 + 360) * 1000)
+        noise = np.random.default_rng(seed).standard_normal(dem.shape, dtype=np.float32)
+        noise *= np.float32(50)
+        dem += noise
+        
+        transform = rasterio.transform.from_bounds(xmin, ymin, xmax, ymax, size, size)
+        return dem, transform
+
+
+class LocalElevationProvider(ElevationProvider):
+    """Windowed reads from a directory of GeoTIFFs (e.g. USGS 3DEP tiles) or a VRT"""
     
-    def _create_dummy_dem(self, filename, lat, lon, radius):
+    def __init__(self, path, prefetch_dir=None):
         """
-        Create a dummy DEM file for demonstration purposes
-        In a real implementation, you would use actual elevation data
+        Initialize the local provider
         
         Parameters:
-        filename (str): Output file path
-        lat, lon (float): Center coordinates
-        radius (int): Radius in meters
+        path (str): Directory of geographic-CRS GeoTIFF tiles, or a .vrt/.tif mosaic
+        prefetch_dir (str): Directory for prefetched GeoTIFFs
         """
-        # Create a simple elevation model with a peak at the center
-        # This is just for demonstration
-        size = 100  # grid size
-        dem = np.zeros((size, size), dtype=np.float32)
+        super().__init__(prefetch_dir)
+        self.path = path
         
-        # Create a simple mountain peak at the center
-        x, y = np.mgrid[0:size, 0:size]
-        center = size // 2
-        dem = 1000 * np.exp(-0.01 * ((x - center)**2 + (y - center)**2))
+        # Index tile footprints once so reads only open the tiles they need
+        if os.path.isdir(path):
+            filenames = [os.path.join(path, f) for f in sorted(os.listdir(path))
+                         if f.lower().endswith(('.tif', '.tiff', '.vrt'))]
+        else:
+            filenames = [path]
         
-        # Add some random variation
-        dem += np.random.normal(0, 50, dem.shape)
+        self.tiles = []
+        for filename in filenames:
+            with rasterio.open(filename) as src:
+                self.tiles.append((tuple(src.bounds), filename))
+    
+    def fetch(self, bounds, res=None):
+        xmin, ymin, xmax, ymax = bounds
+        paths = [path for (txmin, tymin, txmax, tymax), path in self.tiles
+                 if txmin < xmax and xmin < txmax and tymin < ymax and ymin < tymax]
+        if not paths:
+            raise ValueError(f"No elevation tiles cover bounds {bounds}")
+        return read_raster_window(paths, bounds, res)
+
+
+class OpenElevationProvider(ElevationProvider):
+    """Elevations from an Open-Elevation compatible lookup API"""
+    
+    def __init__(self, url="https://api.open-elevation.com/api/v1/lookup", resolution=30,
+                 batch_size=1000, timeout=30, prefetch_dir=None):
+        """
+        Initialize the HTTP provider
         
-        # Calculate the transform
+        Parameters:
+        url (str): Lookup endpoint accepting POSTed {"locations": [...]}
+        resolution (float): Grid spacing in meters
+        batch_size (int): Points per request
+        timeout (float): Request timeout in seconds
+        prefetch_dir (str): Directory for prefetched GeoTIFFs
+        """
+        super().__init__(prefetch_dir)
+        self.url = url
+        self.resolution = resolution
+        self.batch_size = batch_size
+        self.timeout = timeout
+    
+    def fetch(self, bounds, res=None):
+        xmin, ymin, xmax, ymax = bounds
         m_per_deg = 111320
-        deg_offset = radius / m_per_deg
+        resolution = max(self.resolution, res[1] * m_per_deg) if res else self.resolution
+        rows = max(2, int(round((ymax - ymin) * m_per_deg / resolution)))
+        cols = max(2, int(round((xmax - xmin) * m_per_deg * np.cos(np.radians((ymin + ymax) / 2)) / resolution)))
+        transform = rasterio.transform.from_bounds(xmin, ymin, xmax, ymax, cols, rows)
         
-        transform = rasterio.transform.from_bounds(
-            lon - deg_offset, lat - deg_offset, 
-            lon + deg_offset, lat + deg_offset, 
-            size, size
-        )
+        # Cell-center coordinates, row-major from the north edge
+        lats = ymax - (np.arange(rows) + 0.5) * (ymax - ymin) / rows
+        lons = xmin + (np.arange(cols) + 0.5) * (xmax - xmin) / cols
+        grid_lats = np.repeat(lats, cols)
+        grid_lons = np.tile(lons, rows)
+        
+        elevations = np.empty(rows * cols, dtype=np.float32)
+        for start in range(0, rows * cols, self.batch_size):
+            stop = min(start + self.batch_size, rows * cols)
+            locations = [
+                {'latitude': float(lat), 'longitude': float(lon)}
+                for lat, lon in zip(grid_lats[start:stop], grid_lons[start:stop])
+            ]
+            response = requests.post(self.url, json={'locations': locations}, timeout=self.timeout)
+            response.raise_for_status()
+            results = response.json()['results']
+            if len(results) != stop - start:
+                raise ValueError(f"Expected {stop - start} elevations, got {len(results)}")
+            elevations[start:stop] = [result['elevation'] for result in results]
+        
+        return elevations.reshape(rows, cols), transform
+
+
+# Creation options for every raster written by the analyzer (Cloud-Optimized GeoTIFF)
+COG_PROFILE = {
+    'driver': 'COG',
+    'blocksize': 256,
+    'compress': 'ZSTD',
+    'predictor': 'YES',        # horizontal differencing for ints, floating point predictor for floats
+    'overviews': 'AUTO'        # halve until the raster fits in one tile
+}
+
+
+def read_raster_window(paths, bounds, res=None):
+    """
+    Read the first band of one or more rasters clipped to a bounding box
+    
+    Parameters:
+    paths (list): Raster file paths (tiles are mosaicked where they overlap)
+    bounds (tuple): (xmin, ymin, xmax, ymax) in the rasters' CRS
+    res (tuple): Optional coarser (x, y) cell size, read with average resampling
+    
+    Returns:
+    tuple: (elevation grid, transform)
+    """
+    if res is None:
+        mosaic, transform = merge(paths, bounds=bounds, indexes=[1])
+    else:
+        mosaic, transform = merge(paths, bounds=bounds, res=res, indexes=[1], resampling=Resampling.average)
+    return mosaic[0], transform
+
+
+def write_raster(path, data, transform, crs=None, resampling='average'):
+    """
+    Write one or more bands as a Cloud-Optimized GeoTIFF
+
+    Rasters are tiled and compressed with a predictor (see COG_PROFILE) and
+    carry internal overviews, so windowed and coarse reads only decode the
+    tiles and levels they need.
+
+    Parameters:
+    path (str): Output file path
+    data (ndarray): 2D grid, or 3D (bands, rows, cols) stack
+    transform (Affine): Geotransform of the grid
+    crs (CRS): Coordinate reference system (WGS84 by default)
+    resampling (str): Overview resampling ('nearest' for class codes)
+    """
+    data = data[np.newaxis] if data.ndim == 2 else data
+    with rasterio.open(
+        path,
+        'w',
+        height=data.shape[1],
+        width=data.shape[2],
+        count=data.shape[0],
+        dtype=data.dtype,
+        crs=crs or CRS.from_epsg(4326),
+        transform=transform,
+        overview_resampling=resampling,
+        **COG_PROFILE
+    ) as dst:
+        dst.write(data)
+
+
+def read_raster_overview(path, max_size, indexes=1):
+    """
+    Read a raster decimated so neither side exceeds max_size
+
+    GDAL serves decimated reads from the closest internal overview, so a
+    coarse read of a large COG touches only a fraction of the data.
+
+    Parameters:
+    path (str): Raster file path
+    max_size (int): Largest number of rows or columns to return
+    indexes (int or list): Band index or indexes to read
+
+    Returns:
+    tuple: (data, transform scaled to the returned grid)
+    """
+    with rasterio.open(path) as src:
+        factor = max(1, int(np.ceil(max(src.height, src.width) / max_size)))
+        rows = int(np.ceil(src.height / factor))
+        cols = int(np.ceil(src.width / factor))
+        out_shape = (rows, cols) if isinstance(indexes, int) else (len(indexes), rows, cols)
+        data = src.read(indexes, out_shape=out_shape,
+                        resampling=Resampling.average)
+        transform = src.transform * Affine.scale(src.width / cols, src.height / rows)
+    return data, transform
+
+
+class GISTerrainAnalyzer:
+    def __init__(self, dem_cache_dir="dem_cache", elevation_provider=None):
+        """
+        Initialize GIS terrain analyzer
+        
+        Parameters:
+        dem_cache_dir (str): Directory to cache DEM files
+        elevation_provider (ElevationProvider): DEM source (synthetic DEMs by default)
+        """
+        self.dem_cache_dir = dem_cache_dir
+        self.elevation_provider = elevation_provider or SyntheticElevationProvider()
+        
+        # Slope-angle band edges (degrees) for avalanche terrain classification
+        self.avalanche_slope_bands = [0, 25, 30, 35, 40, 45, 90]
+        
+        # Aspect classes (direction a slope faces)
+        self.aspects = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+        
+        # Radius in meters over which avalanche terrain rasters average start zones
+        # (get_terrain_context's default radius)
+        self.avalanche_neighbourhood = 1000
+        
+        # Most DEM cells analyze_terrain reads; larger tiles are decimated
+        self.terrain_pixel_budget = 256 * 256
+        
+        # float32 work arrays reused across analyze_terrain calls (per thread)
+        self._buffers = threading.local()
+        
+        # Coalesces concurrent identical DEM fetches and terrain analyses
+        self.single_flight = SingleFlight()
+        
+        # Analyses reused for queries within 50 m of an analyzed centre (and a similar radius)
+        self.terrain_cache = SpatialCache(tolerance=50)
+        self.context_cache = SpatialCache(tolerance=50)
+        
+        # Create cache directory if it doesn't exist
+        if not os.path.exists(dem_cache_dir):
+            os.makedirs(dem_cache_dir)
+    
+    def get_elevation_data(self, location, radius=1000, res=None):
+        """
+        Get elevation data for a location within a specified radius
+        
+        Concurrent identical requests share one fetch (see self.single_flight).
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        res (tuple): Optional coarser (x, y) cell size in degrees to read at
+        
+        Returns:
+        dict: DEM data including file path and metadata
+        """
+        key = ('dem', float(location[0]), float(location[1]), radius, res)
+        dem_data = self.single_flight.do(key, self._get_elevation_data, location, radius, res)
+        return dict(dem_data) if dem_data else dem_data
+    
+    def _get_elevation_data(self, location, radius=1000, res=None):
+        """
+        Get elevation data without request coalescing
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        res (tuple): Optional coarser (x, y) cell size in degrees to read at
+        
+        Returns:
+        dict: DEM data including file path and metadata
+        """
+        lat, lon = location
+        
+        # Generate a filename for the cached DEM
+        res_key = "" if res is None else "_{:.4g}x{:.4g}".format(*res)
+        cache_filename = f"{self.dem_cache_dir}/dem_{lat:.4f}_{lon:.4f}_{radius}{res_key}.tif"
+        
+        # Check if we have a cached version
+        if os.path.exists(cache_filename):
+            print(f"Using cached DEM data for location {lat:.4f}, {lon:.4f}")
+            return {"filepath": cache_filename}
+        
+        print(f"Fetching DEM data for location {lat:.4f}, {lon:.4f}")
+        
+        # Calculate bounding box
+        # Approximate conversion from degrees to meters at equator: 111,320 m per degree
+        # This is a simplification; for more precise calculations use a proper geospatial library
+        m_per_deg = 111320
+        deg_offset = radius / m_per_deg
+        bounds = (lon - deg_offset, lat - deg_offset, lon + deg_offset, lat + deg_offset)
         
-        # Write to GeoTIFF
-        with rasterio.open(
-            filename,
-            'w',
-            driver='GTiff',
-            height=dem.shape[0],
-            width=dem.shape[1],
-            count=1,
-            dtype=dem.dtype,
-            crs=CRS.from_epsg(4326),  # WGS84
-            transform=transform,
-        ) as dst:
-            dst.write(dem, 1)
+        try:
+            dem, transform = self.elevation_provider.read(bounds, res)
+            write_raster(cache_filename, dem, transform)
+            
+            return {"filepath": cache_filename}
+            
+        except Exception as e:
+            print(f"Error fetching elevation data: {str(e)}")
+            return None
     
     def analyze_terrain(self, location, radius=1000):
         """
         Analyze terrain for an outdoor activity location
         
+        Tiles larger than terrain_pixel_budget are read decimated (from the
+        COG overviews), so cost stays roughly constant as the radius grows.
+        Slope uses the effective cell size of the grid actually read.
+        Concurrent identical requests share one analysis (see self.single_flight).
+        
+        Error bounds versus full resolution, for decimation factor f
+        (measured on 4096x4096 fractal DEMs with 10 m cells):
+        - elevation mean: unchanged (average resampling)
+        - elevation min/max: range narrower by 0.5-1% at f=2, up to 2-6% at f=16
+        - slope mean: lower by 19-25% at f=2, 34-45% at f=4, 46-60% at f=8, 57-72% at f=16
+        - slope max: lower by 8-16% at f=2, up to 50-58% at f=16
+        Slopes describe terrain at the effective cell size, so large-radius
+        slopes are broad-scale, not local steepness.
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        
+        Returns:
+        dict: Terrain analysis results
+        """
+        key = ('terrain', float(location[0]), float(location[1]), radius)
+        return dict(self.single_flight.do(key, self._analyze_terrain, location, radius))
+    
+    def _analyze_terrain(self, location, radius=1000):
+        """
+        Analyze terrain without request coalescing
+        
         Parameters:
         location (tuple): (latitude, longitude)
         radius (int): Radius in meters to analyze around the point
@@ -714,6 +2206,10 @@ class GISTerrainAnalyzer:
         Returns:
         dict: Terrain analysis results
         """
+        cached = self.terrain_cache.get(location, radius)
+        if cached is not None:
+            return dict(cached)
+        
         # Get elevation data
         dem_data = self.get_elevation_data(location, radius)
         
@@ -725,30 +2221,28 @@ class GISTerrainAnalyzer:
                 'ruggedness': 0.5   # Default ruggedness
             }
         
-        # Open the DEM file
-        with rasterio.open(dem_data["filepath"]) as dem_src:
-            dem = dem_src.read(1)
-            
-            # Extract elevation statistics and convert to feet
-            elevation_min = float(meters_to_feet(np.min(dem)))
-            elevation_max = float(meters_to_feet(np.max(dem)))
-            elevation_mean = float(meters_to_feet(np.mean(dem)))
-            
-            # Calculate slope
-            dx = sobel(dem, axis=1)
-            dy = sobel(dem, axis=0)
-            slope = np.degrees(np.arctan(np.sqrt(dx**2 + dy**2)))
-            slope_mean = float(np.mean(slope))
-            slope_max = float(np.max(slope))
-            
-            # Calculate terrain ruggedness index (TRI)
-            # Simple implementation: standard deviation of elevation
-            ruggedness = float(np.std(dem) / (elevation_max - elevation_min) if elevation_max > elevation_min else 0.5)
-            # Normalize to 0-1 scale
-            ruggedness = min(1.0, ruggedness)
+        # Read the DEM within the pixel budget
+        dem, transform = read_raster_overview(dem_data["filepath"], int(np.sqrt(self.terrain_pixel_budget)))
+        
+        # Extract elevation statistics and convert to feet
+        elevation_min = float(meters_to_feet(np.min(dem)))
+        elevation_max = float(meters_to_feet(np.max(dem)))
+        elevation_mean = float(meters_to_feet(np.mean(dem)))
+        
+        # Calculate slope
+        slope = self.compute_slope(dem, transform, out=self._work_buffer('slope', dem.shape),
+                                   work=self._work_buffer('gradient', dem.shape))
+        slope_mean = float(np.mean(slope))
+        slope_max = float(np.max(slope))
+        
+        # Calculate terrain ruggedness index (TRI)
+        # Simple implementation: standard deviation of elevation
+        ruggedness = float(np.std(dem) / (elevation_max - elevation_min) if elevation_max > elevation_min else 0.5)
+        # Normalize to 0-1 scale
+        ruggedness = min(1.0, ruggedness)
         
         # Return terrain analysis results
-        return {
+        terrain_analysis = {
             'elevation': elevation_mean,
             'elevation_min': elevation_min,
             'elevation_max': elevation_max,
@@ -756,44 +2250,650 @@ class GISTerrainAnalyzer:
             'slope_max': slope_max,
             'ruggedness': ruggedness
         }
+        self.terrain_cache.put(location, radius, dict(terrain_analysis))
+        return terrain_analysis
     
-    def get_land_cover(self, location, radius=1000):
+    def _work_buffer(self, name, shape):
         """
-        Get land cover information for a location
+        Get a reusable float32 work array for this thread
         
         Parameters:
-        location (tuple): (latitude, longitude)
-        radius (int): Radius in meters to analyze around the point
+        name (str): Buffer name
+        shape (tuple): Array shape
         
         Returns:
-        dict: Land cover information
+        ndarray: Uninitialized float32 array of the given shape
         """
-        # This would normally use a land cover dataset like NLCD (National Land Cover Database)
-        # or Corine Land Cover for Europe
-        # For this example, we'll return dummy data
+        buffers = self._buffers.__dict__
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = buffers[name] = np.empty(shape, dtype=np.float32)
+        return buffer
+    
+    def compute_slope(self, dem, transform, out=None, work=None):
+        """
+        Calculate a slope raster from a DEM
         
-        land_cover_types = [
-            'forest', 'grassland', 'barren', 'developed', 'water', 'wetland', 'shrubland', 'snow'
-        ]
+        Computed in float32 in place: only the out and work arrays are
+        written, with no float64 upcasts or per-step temporaries. Scratch
+        space defaults to this thread's reusable work buffer, which is never
+        returned; the result is only written to a reused array when the
+        caller passes one as out.
         
-        # Mock different land cover distributions based on location
-        # In a real implementation, you would query a land cover dataset
-        lat, lon = location
+        Parameters:
+        dem (ndarray): Elevation grid in meters
+        transform (Affine): DEM geotransform (degrees)
+        out (ndarray): float32 array for the result (a new array if None)
+        work (ndarray): float32 scratch array of the same shape (this thread's work buffer if None)
         
-        # Use the coordinates to seed a random generator for consistency
-        np.random.seed(int((lat + 180) * 1000) + int((lon + 360) * 1000))
+        Returns:
+        ndarray: Slope in degrees (out if given, otherwise a new array owned by the caller)
+        """
+        dem = np.asarray(dem, dtype=np.float32)
+        out = np.empty(dem.shape, dtype=np.float32) if out is None else out
+        work = self._work_buffer('gradient', dem.shape) if work is None else work
         
-        # Generate random proportions and normalize
-        proportions = np.random.rand(len(land_cover_types))
-        proportions = proportions / proportions.sum()
+        # The Sobel kernel spans two cells with weights summing to 4
+        cell_x, cell_y = self.cell_size_meters(transform, dem.shape[0])
+        sobel(dem, axis=1, output=out)
+        out *= np.float32(1 / (8 * cell_x))
+        np.square(out, out=out)
+        sobel(dem, axis=0, output=work)
+        work *= np.float32(1 / (8 * cell_y))
+        np.square(work, out=work)
         
-        land_cover = {land_type: float(prop) for land_type, prop in zip(land_cover_types, proportions)}
+        out += work
+        np.sqrt(out, out=out)
+        np.arctan(out, out=out)
+        np.degrees(out, out=out)
+        return out
+    
+    def analyze_route(self, route, segment_length=1000, spacing=30, tile_size=2000):
+        """
+        Analyze terrain along a route in fixed-length segments
         
-        # Determine dominant land cover
-        dominant_type = max(land_cover.items(), key=lambda x: x[1])[0]
+        The route is densified and its samples are grouped into square
+        tiles of tile_size meters. Each tile's terrain layers (see
+        get_terrain_layers) are read for a window just large enough to
+        cover the tile and the avalanche neighbourhood around it, so the
+        cells read grow with the route's length rather than its extent.
+        Per-segment statistics are aggregated with reduceat.
         
-        return {
-            'land_cover': land_cover,
+        Parameters:
+        route (ndarray): (N, 2) array of (latitude, longitude) vertices
+        segment_length (float): Segment length in meters
+        spacing (float): Maximum distance between samples in meters
+        tile_size (float): Side of the tiles the route is read in, in meters
+        
+        Returns:
+        dict: Per-segment arrays ('start', 'end' in meters, 'elevation', 'elevation_min',
+            'elevation_max' in feet, 'slope', 'slope_max', 'ruggedness', the highest
+            'avalanche_terrain_fraction', 'wind_exposure' and 'lightning_exposure' along
+            the segment, and (latitude, longitude) 'midpoint'), 'distance' and 'elevation_gain'
+        """
+        points, distance = densify_route(route, spacing)
+        
+        # Group samples by tile
+        m_per_deg = 111320
+        step = tile_size / m_per_deg
+        tiles, tile_index = np.unique(np.floor(points / step).astype(np.int64), axis=0, return_inverse=True)
+        order = np.argsort(tile_index.ravel(), kind='stable')
+        bounds = np.searchsorted(tile_index.ravel()[order], np.arange(len(tiles) + 1))
+        
+        layer_names = ['elevation', 'slope', 'avalanche_terrain_fraction', 'wind_exposure', 'lightning_exposure']
+        sampled = {name: np.empty(len(points)) for name in layer_names}
+        for i, (row, col) in enumerate(tiles):
+            # Tile centre, with a margin for the avalanche neighbourhood (narrower in
+            # meters along longitude, since the DEM window is square in degrees)
+            center = ((row + 0.5) * step, (col + 0.5) * step)
+            margin = (self.avalanche_neighbourhood + spacing) / np.cos(np.radians(center[0]))
+            layers = self.get_terrain_layers(center, int(np.ceil(tile_size / 2 + margin)))
+            
+            if layers is None:
+                print("Error: Could not get elevation data")
+                return None
+            
+            members = order[bounds[i]:bounds[i + 1]]
+            for name in layer_names:
+                sampled[name][members] = sample_raster_bilinear(
+                    layers[name], layers['transform'], points[members, 0], points[members, 1])
+        
+        elevation = sampled['elevation']
+        slope = sampled['slope']
+        elevation_ft = meters_to_feet(elevation)
+        
+        # Segment boundaries as sample indices
+        num_segments = max(1, int(np.ceil(distance[-1] / segment_length)))
+        starts = np.searchsorted(distance, np.arange(num_segments) * segment_length, side='left')
+        starts = np.unique(np.minimum(starts, len(distance) - 1))
+        counts = np.diff(np.append(starts, len(distance)))
+        
+        elevation_min = np.minimum.reduceat(elevation_ft, starts)
+        elevation_max = np.maximum.reduceat(elevation_ft, starts)
+        elevation_mean = np.add.reduceat(elevation_ft, starts) / counts
+        elevation_m_mean = np.add.reduceat(elevation, starts) / counts
+        elevation_m_std = np.sqrt(np.maximum(
+            np.add.reduceat(elevation ** 2, starts) / counts - elevation_m_mean ** 2, 0))
+        
+        # Same ruggedness definition as analyze_terrain
+        elevation_range = elevation_max - elevation_min
+        ruggedness = np.where(elevation_range > 0, elevation_m_std / np.where(elevation_range > 0, elevation_range, 1), 0.5)
+        ruggedness = np.minimum(1.0, ruggedness)
+        
+        ends = np.append(distance[starts[1:]], distance[-1])
+        middle = (distance[starts] + ends) / 2
+        
+        return {
+            'start': distance[starts],
+            'end': ends,
+            'elevation': elevation_mean,
+            'elevation_min': elevation_min,
+            'elevation_max': elevation_max,
+            'slope': np.add.reduceat(slope, starts) / counts,
+            'slope_max': np.maximum.reduceat(slope, starts),
+            'ruggedness': ruggedness,
+            'avalanche_terrain_fraction': np.maximum.reduceat(sampled['avalanche_terrain_fraction'], starts),
+            'wind_exposure': np.maximum.reduceat(sampled['wind_exposure'], starts),
+            'lightning_exposure': np.maximum.reduceat(sampled['lightning_exposure'], starts),
+            'midpoint': np.column_stack([np.interp(middle, distance, points[:, 0]),
+                                         np.interp(middle, distance, points[:, 1])]),
+            'distance': float(distance[-1]),
+            'elevation_gain': float(meters_to_feet(np.sum(np.maximum(np.diff(elevation), 0))))
+        }
+    
+    def cell_size_meters(self, transform, height):
+        """
+        Get the DEM cell size in meters at the DEM's central latitude
+        
+        Parameters:
+        transform (Affine): DEM geotransform (degrees)
+        height (int): Number of DEM rows
+        
+        Returns:
+        tuple: (cell width, cell height) in meters
+        """
+        m_per_deg = 111320
+        center_lat = transform.f + transform.e * height / 2
+        return (abs(transform.a) * m_per_deg * np.cos(np.radians(center_lat)),
+                abs(transform.e) * m_per_deg)
+    
+    def compute_slope_aspect(self, dem, transform):
+        """
+        Calculate true slope angle and aspect from a DEM
+        
+        Parameters:
+        dem (ndarray): Elevation grid in meters
+        transform (Affine): DEM geotransform (degrees)
+        
+        Returns:
+        tuple: (slope in degrees, aspect in degrees clockwise from north that the slope faces)
+        """
+        cell_x, cell_y = self.cell_size_meters(transform, dem.shape[0])
+        dz_row, dz_col = np.gradient(np.asarray(dem, dtype=np.float64), cell_y, cell_x)
+        
+        slope = np.degrees(np.arctan(np.hypot(dz_row, dz_col)))
+        
+        # Downslope direction: rows increase southwards, columns eastwards
+        aspect = np.degrees(np.arctan2(-dz_col, dz_row)) % 360
+        
+        return slope, aspect
+    
+    def get_avalanche_classes(self, location, radius=1000, res=None):
+        """
+        Get (and cache) the avalanche terrain classification of a DEM tile
+        
+        Each cell is coded as slope_band * 8 + aspect_index, using the bands
+        in self.avalanche_slope_bands and the aspects in self.aspects. The
+        classification is static, so it is stored next to the DEM.
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters of the DEM tile
+        res (tuple): Optional coarser (x, y) DEM cell size in degrees
+        
+        Returns:
+        tuple: (uint8 class raster, transform), or None if no DEM is available
+        """
+        lat, lon = location
+        res_key = "" if res is None else "_{:.4g}x{:.4g}".format(*res)
+        cache_filename = f"{self.dem_cache_dir}/avalanche_{lat:.4f}_{lon:.4f}_{radius}{res_key}.tif"
+        
+        if os.path.exists(cache_filename):
+            with rasterio.open(cache_filename) as src:
+                return src.read(1), src.transform
+        
+        dem_data = self.get_elevation_data(location, radius, res)
+        if not dem_data:
+            return None
+        
+        with rasterio.open(dem_data["filepath"]) as dem_src:
+            dem = dem_src.read(1)
+            transform = dem_src.transform
+            crs = dem_src.crs
+        
+        slope, aspect = self.compute_slope_aspect(dem, transform)
+        slope_band = np.digitize(slope, self.avalanche_slope_bands[1:-1])
+        aspect_index = np.round(aspect / 45).astype(np.int64) % 8
+        classes = (slope_band * 8 + aspect_index).astype(np.uint8)
+        
+        write_raster(cache_filename, classes, transform, crs, resampling='nearest')
+        
+        return classes, transform
+    
+    def get_avalanche_terrain(self, location, radius=1000):
+        """
+        Get slope-angle band and aspect area fractions within the query radius
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        
+        Returns:
+        dict: Area fraction per slope band, per aspect and band, and the
+            'avalanche_terrain_fraction' of 30-45 degree slopes
+        """
+        result = self.get_avalanche_classes(location, radius)
+        if result is None:
+            return None
+        classes, transform = result
+        
+        # Cells within the radius of the location
+        height, width = classes.shape
+        cell_x, cell_y = self.cell_size_meters(transform, height)
+        inverse = ~transform
+        col, row = inverse * (location[1], location[0])
+        dy = (np.arange(height) + 0.5 - row) * cell_y
+        dx = (np.arange(width) + 0.5 - col) * cell_x
+        mask = dy[:, np.newaxis] ** 2 + dx[np.newaxis, :] ** 2 <= radius ** 2
+        
+        # One histogram pass over the class codes
+        bands = self.avalanche_slope_bands
+        band_labels = [f"{bands[i]}-{bands[i + 1]}" for i in range(len(bands) - 1)]
+        counts = np.bincount(classes[mask], minlength=len(band_labels) * 8)[:len(band_labels) * 8]
+        fractions = counts.reshape(len(band_labels), 8) / max(1, int(mask.sum()))
+        
+        # 30-45 degree bands, where most avalanches start
+        start_zone = [i for i in range(len(band_labels)) if bands[i] >= 30 and bands[i + 1] <= 45]
+        
+        return {
+            'slope_bands': {label: float(fractions[i].sum()) for i, label in enumerate(band_labels)},
+            'by_aspect': {
+                aspect: {label: float(fractions[i, j]) for i, label in enumerate(band_labels)}
+                for j, aspect in enumerate(self.aspects)
+            },
+            'avalanche_terrain_fraction': float(fractions[start_zone].sum()),
+            'avalanche_aspect_fractions': {
+                aspect: float(fractions[start_zone, j].sum()) for j, aspect in enumerate(self.aspects)
+            }
+        }
+    
+    def compute_walkout_time(self, dem, transform, sources, off_trail_factor=0.6, max_grade=1.0):
+        """
+        Compute the walking time from every DEM cell to the nearest source
+        
+        Travel speed on each of the 8 neighbour moves follows Tobler's hiking
+        function, so uphill and downhill moves cost differently. A multi-source
+        Dijkstra over the reversed move graph gives each cell's time to reach
+        safety (trailhead or road).
+        
+        Parameters:
+        dem (ndarray): Elevation grid in meters
+        transform (Affine): DEM geotransform (degrees)
+        sources (list): (latitude, longitude) of trailheads / road access points
+        off_trail_factor (float): Speed multiplier for off-trail travel
+        max_grade (float): Steepest grade (rise/run) walked directly
+        
+        Returns:
+        ndarray: Walk-out time in hours (inf where unreachable)
+        """
+        dem = np.asarray(dem, dtype=np.float64)
+        height, width = dem.shape
+        cell_x, cell_y = self.cell_size_meters(transform, height)
+        cell_ids = np.arange(height * width).reshape(height, width)
+        
+        from_ids, to_ids, hours = [], [], []
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr == 0 and dc == 0:
+                    continue
+                rows_from = slice(max(0, -dr), height - max(0, dr))
+                cols_from = slice(max(0, -dc), width - max(0, dc))
+                rows_to = slice(max(0, dr), height - max(0, -dr))
+                cols_to = slice(max(0, dc), width - max(0, -dc))
+                
+                distance = np.hypot(dr * cell_y, dc * cell_x)
+                grade = (dem[rows_to, cols_to] - dem[rows_from, cols_from]) / distance
+                # Steeper ground is switchbacked rather than climbed straight
+                np.clip(grade, -max_grade, max_grade, out=grade)
+                speed = 6 * np.exp(-3.5 * np.abs(grade + 0.05)) * off_trail_factor  # km/h
+                
+                from_ids.append(cell_ids[rows_from, cols_from].ravel())
+                to_ids.append(cell_ids[rows_to, cols_to].ravel())
+                hours.append((distance / 1000 / speed).ravel())
+        
+        # Reversed edges, so distances from the sources are times to reach them
+        graph = csr_matrix(
+            (np.concatenate(hours), (np.concatenate(to_ids), np.concatenate(from_ids))),
+            shape=(height * width, height * width)
+        )
+        
+        inverse = ~transform
+        source_ids = []
+        for lat, lon in sources:
+            col, row = inverse * (lon, lat)
+            row = min(max(int(row), 0), height - 1)
+            col = min(max(int(col), 0), width - 1)
+            source_ids.append(cell_ids[row, col])
+        
+        times = dijkstra(graph, directed=True, indices=sorted(set(source_ids)), min_only=True)
+        return times.reshape(height, width)
+    
+    def get_walkout_raster(self, location, radius=1000, sources=None):
+        """
+        Get (and cache) the walk-out time raster for a DEM tile
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters of the DEM tile
+        sources (list): (latitude, longitude) trailheads / road access points
+        
+        Returns:
+        tuple: (walk-out time raster in hours, transform), or None if no access points
+               are given or no DEM is available
+        """
+        if not sources:
+            return None
+        lat, lon = location
+        source_key = hashlib.md5(
+            ";".join(f"{s_lat:.5f},{s_lon:.5f}" for s_lat, s_lon in sources).encode()
+        ).hexdigest()[:8]
+        cache_filename = f"{self.dem_cache_dir}/walkout_{lat:.4f}_{lon:.4f}_{radius}_{source_key}.tif"
+        
+        if os.path.exists(cache_filename):
+            with rasterio.open(cache_filename) as src:
+                return src.read(1), src.transform
+        
+        dem_data = self.get_elevation_data(location, radius)
+        if not dem_data:
+            return None
+        
+        with rasterio.open(dem_data["filepath"]) as dem_src:
+            dem = dem_src.read(1)
+            transform = dem_src.transform
+            crs = dem_src.crs
+        
+        times = self.compute_walkout_time(dem, transform, sources).astype(np.float32)
+        
+        write_raster(cache_filename, times, transform, crs)
+        
+        return times, transform
+    
+    def get_walkout_time(self, location, radius=1000, sources=None):
+        """
+        Get walk-out times to the nearest access point within the query radius
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        sources (list): (latitude, longitude) trailheads / road access points
+        
+        Returns:
+        dict: 'walkout_time' (worst case within the radius) and 'walkout_time_mean' in hours,
+              or None if no access points are given
+        """
+        result = self.get_walkout_raster(location, radius, sources)
+        if result is None:
+            return None
+        times, transform = result
+        
+        height, width = times.shape
+        cell_x, cell_y = self.cell_size_meters(transform, height)
+        col, row = ~transform * (location[1], location[0])
+        dy = (np.arange(height) + 0.5 - row) * cell_y
+        dx = (np.arange(width) + 0.5 - col) * cell_x
+        mask = (dy[:, np.newaxis] ** 2 + dx[np.newaxis, :] ** 2 <= radius ** 2) & np.isfinite(times)
+        
+        return {
+            'walkout_time': float(times[mask].max()) if mask.any() else 0.0,
+            'walkout_time_mean': float(times[mask].mean()) if mask.any() else 0.0
+        }
+    
+    def compute_exposure(self, dem, transform, treeline=11500, search_distance=300, directions=16):
+        """
+        Compute terrain exposure rasters from a DEM
+        
+        The topographic position index (elevation minus the neighbourhood
+        mean) uses an integral image, so its cost does not depend on the
+        neighbourhood size. The sky-view factor is estimated from the
+        horizon angle in each direction, scanned with whole-array shifts.
+        
+        Parameters:
+        dem (ndarray): Elevation grid in meters
+        transform (Affine): DEM geotransform (degrees)
+        treeline (float): Treeline elevation in feet
+        search_distance (float): Neighbourhood / horizon search distance in meters
+        directions (int): Number of horizon directions
+        
+        Returns:
+        dict: 'tpi' (meters), 'sky_view' (0-1), 'wind_exposure' and 'lightning_exposure' rasters
+        """
+        dem = np.asarray(dem, dtype=np.float64)
+        height, width = dem.shape
+        
+        # Cell size in meters at the DEM's latitude
+        cell_x, cell_y = self.cell_size_meters(transform, height)
+        cell_size = (cell_x + cell_y) / 2
+        radius = int(max(1, min(min(height, width) // 2, round(search_distance / cell_size))))
+        
+        # Topographic position index from an integral image (box mean)
+        padded = np.pad(dem, radius, mode='edge')
+        integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+        integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+        size = 2 * radius + 1
+        box_sum = (integral[size:, size:] - integral[:-size, size:] -
+                   integral[size:, :-size] + integral[:-size, :-size])
+        tpi = dem - box_sum / (size * size)
+        
+        # Sky-view factor: 1 - mean sine of the horizon elevation angle
+        horizon_sine = np.zeros_like(dem)
+        for angle in np.linspace(0, 2 * np.pi, directions, endpoint=False):
+            max_tangent = np.zeros_like(dem)
+            for step in range(1, radius + 1):
+                dr = int(round(-np.sin(angle) * step))
+                dc = int(round(np.cos(angle) * step))
+                if dr == 0 and dc == 0:
+                    continue
+                shifted = padded[radius + dr:radius + dr + height, radius + dc:radius + dc + width]
+                distance = np.hypot(dr * cell_y, dc * cell_x)
+                np.maximum(max_tangent, (shifted - dem) / distance, out=max_tangent)
+            horizon_sine += max_tangent / np.sqrt(1 + max_tangent ** 2)
+        sky_view = 1 - horizon_sine / directions
+        
+        # Exposure multipliers for wind and lightning risk
+        ridge = np.clip(tpi / 30, -1, 1)  # +1 on ridges/peaks, -1 in valleys
+        above_treeline = np.clip((meters_to_feet(dem) - treeline) / 500 + 0.5, 0, 1)
+        wind_exposure = 0.7 + 0.4 * np.maximum(ridge, 0) - 0.2 * np.maximum(-ridge, 0) + 0.2 * above_treeline
+        lightning_exposure = 0.5 + 0.4 * sky_view + 0.3 * np.maximum(ridge, 0) + 0.3 * above_treeline
+        
+        return {
+            'tpi': tpi,
+            'sky_view': sky_view,
+            'wind_exposure': wind_exposure,
+            'lightning_exposure': lightning_exposure
+        }
+    
+    def get_exposure_rasters(self, location, radius=1000, res=None):
+        """
+        Get (and cache) the exposure rasters for a DEM tile
+        
+        Exposure is static, so it is computed once per tile and stored next
+        to the DEM as a four-band GeoTIFF.
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters of the DEM tile
+        res (tuple): Optional coarser (x, y) DEM cell size in degrees
+        
+        Returns:
+        dict: Exposure rasters (see compute_exposure) plus 'transform', or None if no DEM is available
+        """
+        lat, lon = location
+        res_key = "" if res is None else "_{:.4g}x{:.4g}".format(*res)
+        cache_filename = f"{self.dem_cache_dir}/exposure_{lat:.4f}_{lon:.4f}_{radius}{res_key}.tif"
+        bands = ['tpi', 'sky_view', 'wind_exposure', 'lightning_exposure']
+        
+        if os.path.exists(cache_filename):
+            with rasterio.open(cache_filename) as src:
+                rasters = {name: src.read(i + 1) for i, name in enumerate(bands)}
+                rasters['transform'] = src.transform
+            return rasters
+        
+        dem_data = self.get_elevation_data(location, radius, res)
+        if not dem_data:
+            return None
+        
+        with rasterio.open(dem_data["filepath"]) as dem_src:
+            dem = dem_src.read(1)
+            transform = dem_src.transform
+            crs = dem_src.crs
+        
+        rasters = self.compute_exposure(dem, transform)
+        
+        stack = np.stack([rasters[name] for name in bands]).astype(np.float32)
+        write_raster(cache_filename, stack, transform, crs)
+        
+        rasters['transform'] = transform
+        return rasters
+    
+    def get_exposure(self, location, radius=1000):
+        """
+        Get terrain exposure at a location
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters of the DEM tile
+        
+        Returns:
+        dict: Exposure at the location ('tpi', 'sky_view', 'wind_exposure', 'lightning_exposure'),
+            plus the maximum lightning exposure within the radius
+        """
+        rasters = self.get_exposure_rasters(location, radius)
+        
+        if rasters is None:
+            return {'wind_exposure': 1.0, 'lightning_exposure': 1.0}
+        
+        lat, lon = location
+        exposure = {
+            name: float(sample_raster_bilinear(rasters[name], rasters['transform'], np.array([lat]), np.array([lon]))[0])
+            for name in ('tpi', 'sky_view', 'wind_exposure', 'lightning_exposure')
+        }
+        exposure['lightning_exposure_max'] = float(np.max(rasters['lightning_exposure']))
+        
+        return exposure
+    
+    def get_terrain_layers(self, location, radius=1000, res=None):
+        """
+        Get the co-registered terrain rasters of a DEM tile for sampling
+        
+        The DEM, avalanche classes and exposure rasters come from their
+        on-disk caches (see get_elevation_data, get_avalanche_classes and
+        get_exposure_rasters); slope is computed from the DEM, and the
+        avalanche terrain fraction is the share of 30-45 degree cells in a
+        box of about self.avalanche_neighbourhood meters around each cell.
+        Concurrent identical requests share one read (see self.single_flight)
+        and the same arrays, which callers must not modify.
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters of the DEM tile
+        res (tuple): Optional coarser (x, y) DEM cell size in degrees
+        
+        Returns:
+        dict: 'elevation' (meters), 'slope' (degrees), 'avalanche_terrain_fraction',
+            'wind_exposure' and 'lightning_exposure' rasters plus 'transform',
+            or None if no DEM is available
+        """
+        key = ('layers', float(location[0]), float(location[1]), radius, res)
+        layers = self.single_flight.do(key, self._get_terrain_layers, location, radius, res)
+        return dict(layers) if layers else layers
+    
+    def _get_terrain_layers(self, location, radius=1000, res=None):
+        """
+        Get terrain layers without request coalescing
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters of the DEM tile
+        res (tuple): Optional coarser (x, y) DEM cell size in degrees
+        
+        Returns:
+        dict: Terrain rasters (see get_terrain_layers), or None if no DEM is available
+        """
+        dem_data = self.get_elevation_data(location, radius, res)
+        avalanche = self.get_avalanche_classes(location, radius, res)
+        exposure = self.get_exposure_rasters(location, radius, res)
+        if not dem_data or avalanche is None or exposure is None:
+            return None
+        
+        with rasterio.open(dem_data["filepath"]) as dem_src:
+            dem = dem_src.read(1)
+            transform = dem_src.transform
+        
+        # Start-zone share over the neighbourhood, as in get_avalanche_terrain
+        classes, _ = avalanche
+        bands = self.avalanche_slope_bands
+        start_zone = [i for i in range(len(bands) - 1) if bands[i] >= 30 and bands[i + 1] <= 45]
+        cell_x, cell_y = self.cell_size_meters(transform, dem.shape[0])
+        window = (max(1, 2 * int(round(self.avalanche_neighbourhood / cell_y)) + 1),
+                  max(1, 2 * int(round(self.avalanche_neighbourhood / cell_x)) + 1))
+        avalanche_fraction = uniform_filter(np.isin(classes // 8, start_zone).astype(np.float32), window)
+        
+        return {
+            'elevation': dem,
+            'slope': self.compute_slope(dem, transform),
+            'avalanche_terrain_fraction': avalanche_fraction,
+            'wind_exposure': exposure['wind_exposure'],
+            'lightning_exposure': exposure['lightning_exposure'],
+            'transform': transform
+        }
+    
+    def get_land_cover(self, location, radius=1000):
+        """
+        Get land cover information for a location
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        
+        Returns:
+        dict: Land cover information
+        """
+        # This would normally use a land cover dataset like NLCD (National Land Cover Database)
+        # or Corine Land Cover for Europe
+        # For this example, we'll return dummy data
+        
+        land_cover_types = [
+            'forest', 'grassland', 'barren', 'developed', 'water', 'wetland', 'shrubland', 'snow'
+        ]
+        
+        # Mock different land cover distributions based on location
+        # In a real implementation, you would query a land cover dataset
+        lat, lon = location
+        
+        # Use the coordinates to seed a random generator for consistency
+        np.random.seed(int((lat + 180) * 1000) + int((lon + 360) * 1000))
+        
+        # Generate random proportions and normalize
+        proportions = np.random.rand(len(land_cover_types))
+        proportions = proportions / proportions.sum()
+        
+        land_cover = {land_type: float(prop) for land_type, prop in zip(land_cover_types, proportions)}
+        
+        # Determine dominant land cover
+        dominant_type = max(land_cover.items(), key=lambda x: x[1])[0]
+        
+        return {
+            'land_cover': land_cover,
             'dominant_type': dominant_type
         }
     
@@ -873,78 +2973,3016 @@ class GISTerrainAnalyzer:
     
     def get_trails(self, location, radius=1000):
         """
-        Get nearby trails information
-        
+        Get nearby trails information
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        
+        Returns:
+        dict: Trail information, with each trail's 'trailhead' (latitude, longitude)
+        """
+        # This would normally use a trail database like OpenStreetMap or a specialized API
+        # For this example, we'll return dummy data
+        
+        # Mock different trail difficulties
+        trail_difficulties = ['easy', 'moderate', 'difficult', 'very_difficult']
+        
+        # Use the coordinates to seed a random generator for consistency
+        lat, lon = location
+        np.random.seed(int((lat + 180) * 1000) + int((lon + 360) * 1000))
+        
+        # Generate a random number of trails (0-5)
+        num_trails = np.random.randint(0, 6)
+        
+        trails = []
+        for i in range(num_trails):
+           # Generate random trail properties
+            length = float(np.random.uniform(1, 20))  # miles
+            difficulty = np.random.choice(trail_difficulties)
+            
+            trails.append({
+                'id': f"trail_{i+1}",
+                'length_mi': length,
+                'difficulty': difficulty,
+                'name': f"Trail {i+1}"
+            })
+        
+        # Trailheads within the radius, from a separate generator so the trails above are unchanged
+        rng = np.random.default_rng(int((lat + 180) * 1000) + int((lon + 360) * 1000))
+        m_per_deg = 111320
+        for trail in trails:
+            distance = radius * np.sqrt(rng.uniform())
+            bearing = rng.uniform(0, 2 * np.pi)
+            trail['trailhead'] = (
+                round(float(lat + distance * np.cos(bearing) / m_per_deg), 5),
+                round(float(lon + distance * np.sin(bearing) / (m_per_deg * np.cos(np.radians(lat)))), 5)
+            )
+        
+        return {
+            'num_trails': num_trails,
+            'trails': trails
+        }
+    
+    def get_access_points(self, location, radius=1000):
+        """
+        Get the access points (trailheads) near a location from the trail layer
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to search around the point
+        
+        Returns:
+        list: (latitude, longitude) trailheads (empty if there are no trails nearby)
+        """
+        return [trail['trailhead'] for trail in self.get_trails(location, radius)['trails']]
+    
+    def get_terrain_context(self, location, radius=1000, sources=None):
+        """
+        Get comprehensive terrain context for a location
+        
+        Parameters:
+        location (tuple): (latitude, longitude)
+        radius (int): Radius in meters to analyze around the point
+        sources (list): (latitude, longitude) trailheads / road access points for walk-out
+                        times (defaults to get_access_points); walk-out times are left out
+                        when there are none
+        
+        Returns:
+        dict: Comprehensive terrain information
+        """
+        cached = None if sources is not None else self.context_cache.get(location, radius)
+        if cached is not None:
+            return dict(cached)
+        
+        # Get basic terrain analysis
+        terrain_analysis = self.analyze_terrain(location, radius)
+        
+        # Get wind and lightning exposure at the location
+        exposure = self.get_exposure(location, radius)
+        
+        # Get avalanche terrain (slope-angle bands and aspects)
+        avalanche_terrain = self.get_avalanche_terrain(location, radius)
+        
+        # Get land cover information
+        land_cover = self.get_land_cover(location, radius)
+        
+        # Get protected area information
+        protected_area = self.get_protected_areas(location, radius)
+        
+        # Get trails information
+        trails = self.get_trails(location, radius)
+        
+        # Get walk-out time back to the nearest access point (trailheads by default)
+        explicit_sources = sources is not None
+        if not explicit_sources:
+            sources = [trail['trailhead'] for trail in trails['trails']]
+        walkout = self.get_walkout_time(location, radius, sources)
+        
+        # Combine all information
+        terrain_context = {
+            **terrain_analysis,
+            'wind_exposure': exposure['wind_exposure'],
+            'lightning_exposure': exposure['lightning_exposure'],
+            'avalanche_terrain': avalanche_terrain,
+            'avalanche_terrain_fraction': avalanche_terrain['avalanche_terrain_fraction'] if avalanche_terrain else 0.0,
+            'land_cover': land_cover,
+            'protected_area': protected_area,
+            'trails': trails
+        }
+        if walkout:
+            terrain_context['walkout_time'] = walkout['walkout_time']
+            terrain_context['walkout_time_mean'] = walkout['walkout_time_mean']
+        
+        if not explicit_sources:
+            self.context_cache.put(location, radius, dict(terrain_context))
+        return terrain_context
+
+
+# Example locations near Colorado Springs
+LOCATION_CATALOG = {
+    'Garden of the Gods': (38.8783, -104.8719),
+    'Pikes Peak': (38.8409, -105.0423),
+    'Cheyenne Mountain': (38.7447, -104.8506),
+    'Palmer Park': (38.8937, -104.7836)
+}
+
+# Example terrain data in feet for the catalog locations (would come from GIS)
+LOCATION_TERRAIN = {
+    'Garden of the Gods': {'elevation': 6400, 'slope': 15, 'ruggedness': 0.7},
+    'Pikes Peak': {'elevation': 14115, 'slope': 30, 'ruggedness': 0.9},
+    'Cheyenne Mountain': {'elevation': 9200, 'slope': 25, 'ruggedness': 0.8},
+    'Palmer Park': {'elevation': 6250, 'slope': 10, 'ruggedness': 0.5}
+}
+
+# Default weather used when no forecast is available
+DEFAULT_WEATHER = {
+    'temperature': 68,     # Fahrenheit
+    'precipitation': 0,    # inches
+    'wind_speed': 6,       # mph
+    'thunderstorm_risk': 0 # probability 0-1
+}
+
+
+def iter_catalog_assessments(risk_system, profiles, activities=None, locations=None,
+                             weather_by_location=None, terrain_by_location=None):
+    """
+    Generate flat assessment records for every location x activity x profile
+
+    Records are produced lazily so that arbitrarily large runs can be
+    streamed straight into an AssessmentExportWriter.
+
+    Parameters:
+    risk_system (OutdoorRiskAssessment): Risk assessment system
+    profiles (list): Profile dicts with 'user_experience', 'group_size',
+        'equipment_quality_level', 'weight_carried', 'age',
+        'height_weight_ratio', 'gender' and an optional 'profile_id'
+    activities (list): Activity types to assess (defaults to all)
+    locations (dict): Location name -> (latitude, longitude) (defaults to LOCATION_CATALOG)
+    weather_by_location (dict): Location name -> weather data (defaults to DEFAULT_WEATHER)
+    terrain_by_location (dict): Location name -> terrain data (defaults to LOCATION_TERRAIN)
+
+    Yields:
+    dict: One flat assessment record
+    """
+    activities = activities or list(risk_system.activity_types.keys())
+    locations = locations or LOCATION_CATALOG
+    weather_by_location = weather_by_location or {}
+    terrain_by_location = terrain_by_location or LOCATION_TERRAIN
+    assessment_time = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    for location_name, location in locations.items():
+        weather_data = weather_by_location.get(location_name, DEFAULT_WEATHER)
+        terrain_data = terrain_by_location[location_name]
+
+        for activity_type in activities:
+            for i, profile in enumerate(profiles):
+                risk_category, risk_score, component_scores = risk_system.calculate_risk_score(
+                    location, activity_type, profile['user_experience'], profile['group_size'],
+                    weather_data, profile['equipment_quality_level'], terrain_data,
+                    profile['weight_carried'], profile['age'], profile['height_weight_ratio'],
+                    profile['gender']
+                )
+
+                yield {
+                    'location_name': location_name,
+                    'latitude': location[0],
+                    'longitude': location[1],
+                    'activity_type': activity_type,
+                    'profile_id': str(profile.get('profile_id', i)),
+                    'user_experience': profile['user_experience'],
+                    'group_size': profile['group_size'],
+                    'equipment_quality_level': profile['equipment_quality_level'],
+                    'weight_carried': float(profile['weight_carried']),
+                    'age': profile['age'],
+                    'height_weight_ratio': float(profile['height_weight_ratio']),
+                    'gender': profile['gender'],
+                    'risk_category': risk_category,
+                    'risk_score': float(risk_score),
+                    'terrain_risk': float(component_scores['terrain_risk']),
+                    'weather_risk': float(component_scores['weather_risk']),
+                    'human_risk': float(component_scores['human_risk']),
+                    'equipment_risk': float(component_scores['equipment_risk']),
+                    'weight_risk': float(component_scores['weight_risk']),
+                    'assessment_time': assessment_time
+                }
+
+
+# Columns of exported assessment records (see iter_catalog_assessments) and their Arrow types
+ASSESSMENT_EXPORT_FIELDS = [
+    ('location_name', 'string'),
+    ('latitude', 'float64'),
+    ('longitude', 'float64'),
+    ('activity_type', 'string'),
+    ('profile_id', 'string'),
+    ('user_experience', 'string'),
+    ('group_size', 'int64'),
+    ('equipment_quality_level', 'string'),
+    ('weight_carried', 'float64'),
+    ('age', 'int64'),
+    ('height_weight_ratio', 'float64'),
+    ('gender', 'string'),
+    ('risk_category', 'string'),
+    ('risk_score', 'float64'),
+    ('terrain_risk', 'float64'),
+    ('weather_risk', 'float64'),
+    ('human_risk', 'float64'),
+    ('equipment_risk', 'float64'),
+    ('weight_risk', 'float64'),
+    ('assessment_time', 'string')
+]
+
+
+class AssessmentExportWriter:
+    # File extensions recognised for each export format
+    FORMAT_EXTENSIONS = {
+        '.parquet': 'parquet',
+        '.pq': 'parquet',
+        '.arrow': 'arrow',
+        '.feather': 'arrow',
+        '.csv': 'csv'
+    }
+
+    def __init__(self, path, file_format=None, row_group_size=10000, fields=None, categories=None):
+        """
+        Initialize a streaming writer for assessment records
+
+        Records are buffered until a full row group is collected and then
+        written out, so memory use depends on row_group_size only and not
+        on the size of the run. Every row group is written with the same
+        explicit schema, so a column that happens to be empty in one group
+        keeps its type. Parquet and Arrow output need pyarrow; CSV output
+        only needs pandas.
+
+        Parameters:
+        path (str): Output file path
+        file_format (str): 'parquet', 'arrow' or 'csv' (inferred from the extension if None)
+        row_group_size (int): Number of records per row group / CSV chunk
+        fields (list): (column, Arrow type name) pairs (defaults to ASSESSMENT_EXPORT_FIELDS)
+        categories (list): Risk category names counted in the summary
+            (defaults to OutdoorRiskAssessment.DEFAULT_RISK_CATEGORIES)
+        """
+        if file_format is None:
+            file_format = self.FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if file_format not in ('parquet', 'arrow', 'csv'):
+            raise ValueError(f"Unsupported export format for {path}: {file_format}")
+
+        fields = fields or ASSESSMENT_EXPORT_FIELDS
+        self._schema = None
+        if file_format != 'csv':
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise ImportError("pyarrow is required for Parquet/Arrow export (pip install pyarrow)")
+            self._schema = pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in fields])
+
+        self.path = path
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.categories = list(categories or OutdoorRiskAssessment.DEFAULT_RISK_CATEGORIES)
+
+        self._buffer = []
+        self._columns = [name for name, _ in fields]
+        self._writer = None
+        self._row_groups = 0
+        self._rows = 0
+
+        # Incremental per-location statistics
+        self._location_stats = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, record):
+        """
+        Add one assessment record to the output
+
+        Parameters:
+        record (dict): Flat assessment record with the writer's columns
+        """
+        unknown = set(record) - set(self._columns)
+        if unknown:
+            raise ValueError(f"Record has columns outside the export schema: {sorted(unknown)}")
+
+        self._update_stats(record)
+        self._buffer.append(record)
+
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def write_all(self, records):
+        """
+        Write every record produced by an iterable and close the writer
+
+        Parameters:
+        records (iterable): Flat assessment records (e.g. a generator)
+
+        Returns:
+        dict: Export summary (see summary())
+        """
+        try:
+            for record in records:
+                self.write(record)
+        finally:
+            self.close()
+
+        return self.summary()
+
+    def _update_stats(self, record):
+        """
+        Update the running category histogram and score statistics
+
+        Parameters:
+        record (dict): Flat assessment record
+        """
+        category = record.get('risk_category')
+        if category not in self.categories:
+            raise ValueError(f"Record has no valid risk_category: {category!r}")
+
+        location_name = record.get('location_name', 'unknown')
+        stats = self._location_stats.get(location_name)
+        if stats is None:
+            stats = {
+                'count': 0,
+                'score_sum': 0.0,
+                'score_min': float('inf'),
+                'score_max': float('-inf'),
+                'categories': {name: 0 for name in self.categories}
+            }
+            self._location_stats[location_name] = stats
+
+        score = record.get('risk_score', 0.0)
+        stats['count'] += 1
+        stats['score_sum'] += score
+        stats['score_min'] = min(stats['score_min'], score)
+        stats['score_max'] = max(stats['score_max'], score)
+        stats['categories'][category] += 1
+
+    def flush(self):
+        """
+        Write the buffered records out as one row group / CSV chunk
+
+        The buffer is only cleared once the write succeeded, so a failed
+        flush can be retried without losing records.
+        """
+        if not self._buffer:
+            return
+
+        rows = len(self._buffer)
+        if self.file_format == 'csv':
+            import pandas as pd
+
+            frame = pd.DataFrame.from_records(self._buffer, columns=self._columns)
+            frame.to_csv(self.path, mode='w' if self._row_groups == 0 else 'a',
+                         header=self._row_groups == 0, index=False)
+        else:
+            import pyarrow as pa
+
+            table = pa.Table.from_pylist(self._buffer, schema=self._schema)
+            if self._writer is None:
+                if self.file_format == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self._schema)
+
+            if self.file_format == 'parquet':
+                self._writer.write_table(table, row_group_size=rows)
+            else:
+                self._writer.write_table(table, max_chunksize=rows)
+
+        self._buffer = []
+        self._row_groups += 1
+        self._rows += rows
+
+    def close(self):
+        """
+        Flush any remaining records and close the output file
+        """
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def summary(self):
+        """
+        Get summary statistics for everything written so far
+
+        Returns:
+        dict: Row counts plus per-location category histograms and score statistics
+        """
+        locations = {}
+        for location_name, stats in self._location_stats.items():
+            locations[location_name] = {
+                'count': stats['count'],
+                'mean_score': stats['score_sum'] / stats['count'],
+                'min_score': stats['score_min'],
+                'max_score': stats['score_max'],
+                'categories': dict(stats['categories'])
+            }
+
+        return {
+            'path': self.path,
+            'format': self.file_format,
+            'rows': self._rows + len(self._buffer),
+            'row_groups': self._row_groups,
+            'locations': locations
+        }
+
+
+def export_assessments(records, path, file_format=None, row_group_size=10000):
+    """
+    Stream assessment records to a Parquet, Arrow or CSV file
+
+    Parameters:
+    records (iterable): Flat assessment records (e.g. from iter_catalog_assessments)
+    path (str): Output file path
+    file_format (str): 'parquet', 'arrow' or 'csv' (inferred from the extension if None)
+    row_group_size (int): Number of records per row group / CSV chunk
+
+    Returns:
+    dict: Export summary with per-location category histograms
+    """
+    writer = AssessmentExportWriter(path, file_format=file_format, row_group_size=row_group_size)
+    return writer.write_all(records)
+
+
+# Fields read from batch request rows and the types they are converted to
+BATCH_REQUEST_FIELDS = {
+    'activity_type': str,
+    'user_experience': str,
+    'group_size': int,
+    'equipment_quality_level': str,
+    'weight_carried': float,
+    'age': int,
+    'height_weight_ratio': float,
+    'gender': str
+}
+
+# Worker-local risk system used by batch assessment processes
+_batch_risk_system = None
+
+
+def read_assessment_requests(source, input_format=None):
+    """
+    Stream assessment requests from a CSV or JSON-lines file
+
+    Parameters:
+    source (str): Input file path, or '-' for stdin
+    input_format (str): 'csv' or 'jsonl' (inferred from the extension if None; stdin defaults to jsonl)
+
+    Yields:
+    dict: One raw assessment request
+    """
+    if input_format is None:
+        input_format = 'csv' if source.lower().endswith('.csv') else 'jsonl'
+
+    stream = sys.stdin if source == '-' else open(source, newline='')
+    try:
+        if input_format == 'csv':
+            for row in csv.DictReader(stream):
+                yield row
+        else:
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _init_batch_worker():
+    """
+    Create the risk system once per batch worker process
+    """
+    global _batch_risk_system
+    _batch_risk_system = OutdoorRiskAssessment()
+
+
+def parse_assessment_request(request):
+    """
+    Convert a raw batch request into risk model inputs
+
+    The location is taken from 'latitude'/'longitude' or from a catalog
+    'location_name'. Weather fields default to DEFAULT_WEATHER and terrain
+    fields to the catalog entry for the location.
+
+    Parameters:
+    request (dict): Raw request (values may be strings when read from CSV)
+
+    Returns:
+    tuple: (location, params, weather_data, terrain_data) where params holds
+        the BATCH_REQUEST_FIELDS
+    """
+    location_name = request.get('location_name')
+    if request.get('latitude') not in (None, '') and request.get('longitude') not in (None, ''):
+        location = (float(request['latitude']), float(request['longitude']))
+    else:
+        location = LOCATION_CATALOG[location_name]
+
+    params = {field: cast(request[field]) for field, cast in BATCH_REQUEST_FIELDS.items()}
+
+    weather_data = {
+        field: float(request[field]) if request.get(field) not in (None, '') else default
+        for field, default in DEFAULT_WEATHER.items()
+    }
+
+    terrain_defaults = LOCATION_TERRAIN.get(location_name, {'elevation': 3280, 'slope': 10, 'ruggedness': 0.5})
+    terrain_data = {
+        field: float(request[field]) if request.get(field) not in (None, '') else default
+        for field, default in terrain_defaults.items()
+    }
+
+    return location, params, weather_data, terrain_data
+
+
+def assess_request(risk_system, request):
+    """
+    Run one batch assessment request through the risk model
+
+    Parameters:
+    risk_system (OutdoorRiskAssessment): Risk assessment system
+    request (dict): Raw request (see parse_assessment_request)
+
+    Returns:
+    dict: Risk report with the risk category and score
+    """
+    location, params, weather_data, terrain_data = parse_assessment_request(request)
+
+    risk_category, risk_score, component_scores = risk_system.calculate_risk_score(
+        location, params['activity_type'], params['user_experience'], params['group_size'],
+        weather_data, params['equipment_quality_level'], terrain_data, params['weight_carried'],
+        params['age'], params['height_weight_ratio'], params['gender']
+    )
+
+    report = risk_system.generate_risk_report(
+        risk_category, risk_score, component_scores,
+        location, params['activity_type'], weather_data, params['weight_carried'],
+        params['equipment_quality_level'], params['age'], params['height_weight_ratio'], params['gender']
+    )
+    report['risk_category'] = risk_category
+    report['risk_score'] = float(risk_score)
+    incident_probability = risk_system.incident_probability(risk_score)
+    if incident_probability is not None:
+        report['incident_probability'] = round(incident_probability, 4)
+    report['activity_type'] = params['activity_type']
+    report['coordinates'] = [float(location[0]), float(location[1])]
+    if request.get('location_name') not in (None, ''):
+        report['location_name'] = request['location_name']
+
+    return report
+
+
+def _assess_request_chunk(chunk):
+    """
+    Assess a chunk of (index, request) pairs in a batch worker
+
+    Parameters:
+    chunk (list): (index, request) pairs
+
+    Returns:
+    list: Result records, with an 'error' entry for requests that failed
+    """
+    if _batch_risk_system is None:
+        _init_batch_worker()
+
+    results = []
+    for index, request in chunk:
+        record = {'index': index}
+        if request.get('id') not in (None, ''):
+            record['id'] = request['id']
+        if request.get('user_id') not in (None, ''):
+            record['user_id'] = request['user_id']
+        try:
+            record['report'] = assess_request(_batch_risk_system, request)
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+        results.append(record)
+
+    return results
+
+
+def _chunked(iterable, chunksize):
+    """
+    Group an iterable of requests into lists of (index, request) pairs
+
+    Parameters:
+    iterable (iterable): Requests
+    chunksize (int): Number of requests per chunk
+
+    Yields:
+    list: (index, request) pairs
+    """
+    chunk = []
+    for index, item in enumerate(iterable):
+        chunk.append((index, item))
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch_assessment(source, output='-', input_format=None, workers=None, chunksize=500, history=None):
+    """
+    Assess a stream of requests with a worker pool, writing JSON lines as they complete
+
+    At most two chunks per worker are in flight at any time, so memory
+    stays constant regardless of the input size. Results are written in
+    completion order; each carries the 'index' of its input row.
+
+    Parameters:
+    source (str): Input file path, or '-' for stdin
+    output (str): Output file path, or '-' for stdout
+    input_format (str): 'csv' or 'jsonl' (inferred if None)
+    workers (int): Number of worker processes (defaults to the CPU count; 1 runs inline)
+    chunksize (int): Number of requests sent to a worker at a time
+    history (AssessmentHistory): Optional store that successful assessments are recorded in
+
+    Returns:
+    dict: Counts of processed and failed requests
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunked(read_assessment_requests(source, input_format), chunksize)
+    out = sys.stdout if output == '-' else open(output, 'w')
+    counts = {'processed': 0, 'failed': 0}
+
+    def write_results(results):
+        for record in results:
+            out.write(json.dumps(record) + "\n")
+            counts['processed'] += 1
+            if 'error' in record:
+                counts['failed'] += 1
+            elif history is not None:
+                report = record['report']
+                history.add(report['coordinates'], report['risk_category'], report['risk_score'],
+                            report['activity_type'], record.get('user_id'), report.get('location_name'))
+
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                write_results(_assess_request_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+                pending = set()
+                for chunk in chunks:
+                    pending.add(executor.submit(_assess_request_chunk, chunk))
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            write_results(future.result())
+                for future in as_completed(pending):
+                    write_results(future.result())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+        if history is not None:
+            history.flush()
+
+    return counts
+
+
+# Order of the component columns used by calibration
+CALIBRATION_COMPONENTS = ['terrain_risk', 'weather_risk', 'human_risk', 'equipment_risk', 'weight_risk']
+
+
+def build_calibration_features(risk_system, requests, label_field='incident'):
+    """
+    Compute the component risks of labelled trips for calibration
+
+    Requests are parsed row by row; the component risks are then computed
+    for all trips at once with the array scorers, and profile-dependent
+    components once per distinct profile. Weather risk is stored at unit
+    sensitivity so the activity weather sensitivities can be fitted as
+    multipliers.
+
+    Parameters:
+    risk_system (OutdoorRiskAssessment): Risk assessment system
+    requests (iterable): Raw requests (see parse_assessment_request) with a 0/1 label
+    label_field (str): Field holding whether the trip had an incident
+
+    Returns:
+    dict: 'components' (N, 5) in CALIBRATION_COMPONENTS order, weather at unit sensitivity,
+        'modifier', 'activity' (index into 'activities') and 'label' arrays
+    """
+    activities = list(risk_system.activity_types)
+    terrain_fields = ['elevation', 'slope', 'ruggedness']
+    columns = {name: [] for name in ['latitude', 'longitude', 'profile', 'label'] + terrain_fields}
+    weather_columns = {field: [] for field in DEFAULT_WEATHER}
+    profiles = {}
+
+    for request in requests:
+        location, params, weather_data, terrain_data = parse_assessment_request(request)
+        profile = tuple(params[field] for field in BATCH_REQUEST_FIELDS)
+        columns['profile'].append(profiles.setdefault(profile, len(profiles)))
+        columns['latitude'].append(location[0])
+        columns['longitude'].append(location[1])
+        columns['label'].append(float(request[label_field]))
+        for field in terrain_fields:
+            columns[field].append(terrain_data[field])
+        for field in weather_columns:
+            weather_columns[field].append(weather_data[field])
+
+    # Human, equipment and weight risk and the activity of each distinct profile
+    profile_risks = np.zeros((len(profiles), 3))
+    profile_activity = np.zeros(len(profiles), dtype=np.int64)
+    for profile, i in profiles.items():
+        params = dict(zip(BATCH_REQUEST_FIELDS, profile))
+        activity = params['activity_type']
+        human_risk, weight_risk = risk_system.calculate_human_risk(
+            params['user_experience'], params['group_size'], activity, params['weight_carried'],
+            params['age'], params['height_weight_ratio'], params['gender']
+        )
+        equipment_risk = risk_system.assess_equipment_risk(params['equipment_quality_level'], activity)
+        profile_risks[i] = (human_risk, equipment_risk, weight_risk)
+        profile_activity[i] = activities.index(activity)
+    profile_index = np.asarray(columns['profile'], dtype=np.int64)
+
+    terrain = risk_system.assess_terrain_difficulty_array(
+        columns['elevation'], columns['slope'], columns['ruggedness'])
+    weather = risk_system.calculate_weather_risk_array(
+        weather_columns['temperature'], weather_columns['precipitation'],
+        weather_columns['wind_speed'], weather_columns['thunderstorm_risk'], 1.0
+    )
+    human, equipment, weight = profile_risks[profile_index].T
+    components = np.column_stack([terrain, weather, human, equipment, weight]).reshape(-1, len(CALIBRATION_COMPONENTS))
+
+    return {
+        'activities': activities,
+        'components': components,
+        'modifier': risk_system.get_location_modifiers(columns['latitude'], columns['longitude']),
+        'activity': profile_activity[profile_index],
+        'label': np.asarray(columns['label'], dtype=np.float64)
+    }
+
+
+def calibration_loss(params, features, prior, regularization=0.01):
+    """
+    Logistic loss of incident labels given the risk score, with its gradient
+
+    Component weights are parameterized by a softmax so they stay positive
+    and sum to 1, keeping scores on the 0-10 scale the risk categories use.
+    The incident probability is sigmoid(scale * total_risk + offset).
+
+    Parameters:
+    params (ndarray): [5 weight logits, activity sensitivities..., scale, offset]
+    features (dict): Output of build_calibration_features
+    prior (dict): 'weights' and 'sensitivities' the fit is regularized towards
+    regularization (float): Strength of the L2 pull towards the prior
+
+    Returns:
+    tuple: (loss, gradient)
+    """
+    num_components = len(CALIBRATION_COMPONENTS)
+    num_activities = len(features['activities'])
+    logits = params[:num_components]
+    sensitivities = params[num_components:num_components + num_activities]
+    scale, offset = params[-2:]
+
+    weights = np.exp(logits - logits.max())
+    weights /= weights.sum()
+
+    components = features['components']
+    unit_weather = components[:, 1]
+    weather = unit_weather * sensitivities[features['activity']]
+    total_risk = features['modifier'] * (components @ weights + weights[1] * (weather - unit_weather))
+
+    z = scale * total_risk + offset
+    label = features['label']
+    n = len(label)
+    # log(1 + exp(z)) - y * z, computed stably
+    loss = np.sum(np.logaddexp(0, z) - label * z) / n
+
+    dz = (1 / (1 + np.exp(-z)) - label) / n
+    dtotal = dz * scale * features['modifier']
+    dweights = components.T @ dtotal
+    dweights[1] = weather @ dtotal
+    dsensitivities = np.bincount(
+        features['activity'], weights=dtotal * weights[1] * unit_weather, minlength=num_activities
+    )
+
+    # Pull towards the hand-picked configuration
+    weight_delta = weights - prior['weights']
+    sensitivity_delta = sensitivities - prior['sensitivities']
+    loss += regularization * (np.sum(weight_delta ** 2) + np.sum(sensitivity_delta ** 2))
+    dweights += 2 * regularization * weight_delta
+    dsensitivities += 2 * regularization * sensitivity_delta
+
+    # Chain rule through the softmax
+    dlogits = weights * (dweights - np.dot(weights, dweights))
+
+    gradient = np.concatenate([dlogits, dsensitivities, [np.sum(dz * total_risk), np.sum(dz)]])
+    return loss, gradient
+
+
+def calibrate_risk_model(source, risk_system=None, input_format=None, label_field='incident',
+                         regularization=0.01, output_dir="calibration"):
+    """
+    Fit component weights and activity weather sensitivities to incident data
+
+    Component risks are computed once per trip, then L-BFGS-B minimizes the
+    vectorized logistic loss (see calibration_loss). Other activity
+    sensitivities enter the scores through caps and categories and are
+    kept as configured. The fit is written as the next numbered config in
+    output_dir.
+
+    Parameters:
+    source (str): Labelled CSV or JSON-lines file of trips (see parse_assessment_request)
+    risk_system (OutdoorRiskAssessment): Risk system providing the starting configuration
+    input_format (str): 'csv' or 'jsonl' (inferred if None)
+    label_field (str): Field holding whether the trip had an incident (0/1)
+    regularization (float): Strength of the L2 pull towards the current configuration
+    output_dir (str): Directory for versioned config files
+
+    Returns:
+    tuple: (calibrated config dict, path of the written config)
+    """
+    risk_system = risk_system or OutdoorRiskAssessment()
+    features = build_calibration_features(
+        risk_system, read_assessment_requests(source, input_format), label_field)
+    activities = features['activities']
+
+    prior = {
+        'weights': np.array([risk_system.component_weights[name] for name in CALIBRATION_COMPONENTS]),
+        'sensitivities': np.array([risk_system.activity_types[a]['weather_sensitivity'] for a in activities])
+    }
+    initial = np.concatenate([np.log(prior['weights']), prior['sensitivities'], [1.0, -5.0]])
+    bounds = ([(None, None)] * len(CALIBRATION_COMPONENTS) + [(0.05, 2.0)] * len(activities)
+              + [(None, None), (None, None)])
+
+    result = minimize(calibration_loss, initial, args=(features, prior, regularization),
+                      jac=True, method='L-BFGS-B', bounds=bounds)
+
+    logits = result.x[:len(CALIBRATION_COMPONENTS)]
+    weights = np.exp(logits - logits.max())
+    weights /= weights.sum()
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    versions = [int(name[len("risk_config_v"):-len(".json")]) for name in os.listdir(output_dir)
+                if name.startswith("risk_config_v") and name.endswith(".json")]
+    version = max(versions, default=0) + 1
+
+    config = {
+        'version': version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'source': source,
+        'trips': int(len(features['label'])),
+        'incident_rate': float(features['label'].mean()),
+        'loss': {
+            'initial': float(calibration_loss(initial, features, prior, regularization)[0]),
+            'final': float(result.fun)
+        },
+        'converged': bool(result.success),
+        'component_weights': {name: round(float(w), 4) for name, w in zip(CALIBRATION_COMPONENTS, weights)},
+        'weather_sensitivity': {
+            activity: round(float(value), 4)
+            for activity, value in zip(activities, result.x[len(CALIBRATION_COMPONENTS):-2])
+        },
+        'incident_link': {'scale': float(result.x[-2]), 'offset': float(result.x[-1])}
+    }
+
+    path = os.path.join(output_dir, f"risk_config_v{version}.json")
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2)
+
+    return config, path
+
+
+def apply_calibration(risk_system, config):
+    """
+    Load calibrated weights, sensitivities and incident link into a risk system
+
+    Parameters:
+    risk_system (OutdoorRiskAssessment): Risk assessment system to update
+    config (dict or str): Calibrated config, or the path of a config file
+    """
+    if isinstance(config, str):
+        with open(config) as f:
+            config = json.load(f)
+
+    risk_system.update_thresholds('component_weights', config['component_weights'])
+    risk_system.update_thresholds('activity_types', {
+        activity: dict(risk_system.activity_types[activity], weather_sensitivity=value)
+        for activity, value in config['weather_sensitivity'].items()
+    })
+    risk_system.update_thresholds('incident_link', config['incident_link'])
+
+
+class AssessmentHistory:
+    def __init__(self, path="assessment_history.db", batch_size=1000, cell_size=0.01, categories=None):
+        """
+        Initialize the persistent assessment history store
+
+        Assessments are kept in SQLite (WAL mode, so readers never block
+        the writer) and buffered into batched inserts. Each batch also
+        updates daily per-cell rollups, so trend queries read a few
+        pre-aggregated rows instead of scanning raw assessments. Rollup
+        days are UTC dates, so they do not depend on the host's time zone.
+
+        Parameters:
+        path (str): SQLite database file
+        batch_size (int): Buffered assessments written per transaction
+        cell_size (float): Location cell size in degrees for rollups
+        categories (list): Risk category names with rollup counts
+            (defaults to OutdoorRiskAssessment.DEFAULT_RISK_CATEGORIES)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.cell_size = cell_size
+        self.categories = list(categories or OutdoorRiskAssessment.DEFAULT_RISK_CATEGORIES)
+        for category in self.categories:
+            if not category.isidentifier():
+                raise ValueError(f"Risk category names must be identifiers to name rollup columns: {category!r}")
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+        category_columns = ", ".join(f"{category}_count INTEGER NOT NULL DEFAULT 0" for category in self.categories)
+        with self.connection:
+            self.connection.executescript(f"""
+                CREATE TABLE IF NOT EXISTS assessments (
+                    id INTEGER PRIMARY KEY,
+                    user_id TEXT,
+                    assessed_at REAL NOT NULL,
+                    location_name TEXT,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    cell_row INTEGER NOT NULL,
+                    cell_col INTEGER NOT NULL,
+                    activity_type TEXT,
+                    risk_category TEXT NOT NULL,
+                    risk_score REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_assessments_user_time ON assessments (user_id, assessed_at);
+                CREATE INDEX IF NOT EXISTS idx_assessments_cell_time ON assessments (cell_row, cell_col, assessed_at);
+                CREATE INDEX IF NOT EXISTS idx_assessments_category ON assessments (risk_category, assessed_at);
+
+                CREATE TABLE IF NOT EXISTS daily_rollups (
+                    cell_row INTEGER NOT NULL,
+                    cell_col INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    score_sum REAL NOT NULL,
+                    score_min REAL NOT NULL,
+                    score_max REAL NOT NULL,
+                    {category_columns},
+                    PRIMARY KEY (cell_row, cell_col, day)
+                ) WITHOUT ROWID;
+            """)
+
+    def add(self, location, risk_category, risk_score, activity_type=None, user_id=None,
+            location_name=None, assessed_at=None):
+        """
+        Buffer an assessment, writing a batch when the buffer is full
+
+        Parameters:
+        location (tuple): (latitude, longitude)
+        risk_category (str): Risk category
+        risk_score (float): Numerical risk score
+        activity_type (str): Type of outdoor activity
+        user_id (str): User the assessment belongs to
+        location_name (str): Catalog name of the location
+        assessed_at (float): Unix time of the assessment (defaults to now)
+        """
+        if risk_category not in self.categories:
+            raise ValueError(f"Unknown risk category: {risk_category} (expected one of {', '.join(self.categories)})")
+        lat, lon = location
+        row, col = weather_cell_key(location, self.cell_size)
+        with self._lock:
+            self._pending.append((
+                user_id, time.time() if assessed_at is None else assessed_at, location_name,
+                lat, lon, row, col, activity_type, risk_category, float(risk_score)
+            ))
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def flush(self):
+        """
+        Write all buffered assessments
+        """
+        with self._lock:
+            self._write_pending()
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+
+        # Aggregate the batch per (cell, day) before touching the rollups
+        rollups = {}
+        for _, assessed_at, _, _, _, row, col, _, category, score in self._pending:
+            key = (row, col, datetime.fromtimestamp(assessed_at, timezone.utc).strftime("%Y-%m-%d"))
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = [0, 0.0, score, score] + [0] * len(self.categories)
+            rollup[0] += 1
+            rollup[1] += score
+            rollup[2] = min(rollup[2], score)
+            rollup[3] = max(rollup[3], score)
+            rollup[4 + self.categories.index(category)] += 1
+
+        category_columns = [f"{category}_count" for category in self.categories]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO assessments (user_id, assessed_at, location_name, latitude, longitude, "
+                "cell_row, cell_col, activity_type, risk_category, risk_score) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+            self.connection.executemany(
+                f"INSERT INTO daily_rollups (cell_row, cell_col, day, count, score_sum, score_min, score_max, "
+                f"{', '.join(category_columns)}) VALUES ({', '.join(['?'] * (7 + len(category_columns)))}) "
+                "ON CONFLICT (cell_row, cell_col, day) DO UPDATE SET "
+                "count = count + excluded.count, score_sum = score_sum + excluded.score_sum, "
+                "score_min = min(score_min, excluded.score_min), score_max = max(score_max, excluded.score_max), "
+                + ", ".join(f"{column} = {column} + excluded.{column}" for column in category_columns),
+                [key + tuple(values) for key, values in rollups.items()]
+            )
+        self._pending = []
+
+    def risk_trend(self, location, days=30, now=None):
+        """
+        Get the daily risk trend of a location from the rollups
+
+        Days are UTC dates (see __init__).
+
+        Parameters:
+        location (tuple or str): (latitude, longitude) or a catalog/web location name
+        days (int): Number of days back to include
+        now (float): Unix time the window ends at (defaults to now)
+
+        Returns:
+        list: One dict per day with 'day', 'count', 'mean_score', 'min_score',
+            'max_score' and 'categories' (category -> count)
+        """
+        if isinstance(location, str):
+            name = location
+            location = LOCATION_CATALOG.get(name) or WEB_LOCATIONS.get(name)
+            if location is None:
+                raise ValueError(f"Unknown location: {name} (expected one of "
+                                 f"{', '.join(sorted(set(LOCATION_CATALOG) | set(WEB_LOCATIONS)))})")
+        row, col = weather_cell_key(location, self.cell_size)
+        now = time.time() if now is None else now
+        start_day = datetime.fromtimestamp(now - days * 86400, timezone.utc).strftime("%Y-%m-%d")
+
+        self.flush()
+        category_columns = ", ".join(f"{category}_count" for category in self.categories)
+        rows = self.connection.execute(
+            f"SELECT day, count, score_sum, score_min, score_max, {category_columns} FROM daily_rollups "
+            "WHERE cell_row = ? AND cell_col = ? AND day >= ? ORDER BY day",
+            (row, col, start_day)
+        ).fetchall()
+
+        return [{
+            'day': day,
+            'count': count,
+            'mean_score': score_sum / count,
+            'min_score': score_min,
+            'max_score': score_max,
+            'categories': dict(zip(self.categories, category_counts))
+        } for day, count, score_sum, score_min, score_max, *category_counts in rows]
+
+    def user_history(self, user_id, since=None, limit=100):
+        """
+        Get a user's most recent assessments
+
+        Parameters:
+        user_id (str): User identifier
+        since (float): Only include assessments after this Unix time
+        limit (int): Maximum number of assessments
+
+        Returns:
+        list: Assessment dicts, newest first
+        """
+        self.flush()
+        cursor = self.connection.execute(
+            "SELECT assessed_at, location_name, latitude, longitude, activity_type, risk_category, risk_score "
+            "FROM assessments WHERE user_id = ? AND assessed_at >= ? ORDER BY assessed_at DESC LIMIT ?",
+            (user_id, since or 0, limit)
+        )
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def category_counts(self, since=None):
+        """
+        Count assessments per risk category
+
+        Parameters:
+        since (float): Only include assessments after this Unix time
+
+        Returns:
+        dict: Category -> number of assessments
+        """
+        self.flush()
+        counts = dict(self.connection.execute(
+            "SELECT risk_category, COUNT(*) FROM assessments WHERE assessed_at >= ? GROUP BY risk_category",
+            (since or 0,)
+        ).fetchall())
+        return {category: counts.get(category, 0) for category in self.categories}
+
+    def close(self):
+        """
+        Write buffered assessments and close the database
+        """
+        self.flush()
+        self.connection.close()
+
+
+class IncrementalRiskEngine:
+    def __init__(self, risk_system=None, cell_size=0.1):
+        """
+        Initialize an incremental risk engine for stored assessments
+
+        Terrain, human, equipment and weight risks do not depend on the
+        weather, so they are computed once when an assessment is added.
+        When a weather cell gets a new forecast only the assessments in
+        that cell are marked dirty, and rescore() recomputes their weather
+        risk and weighted total.
+
+        Parameters:
+        risk_system (OutdoorRiskAssessment): Risk assessment system (a new one if None)
+        cell_size (float): Weather cell size in degrees
+        """
+        self.risk_system = risk_system or OutdoorRiskAssessment()
+        self.cell_size = cell_size
+
+        self._assessments = {}   # assessment id -> cached components and latest result
+        self._cell_index = {}    # weather cell -> set of assessment ids
+        self._weather = {}       # weather cell -> latest weather data
+        self._dirty_ids = set()
+
+    def cell_for(self, location):
+        """
+        Get the weather cell for a location
+
+        Parameters:
+        location (tuple): (latitude, longitude)
+
+        Returns:
+        tuple: Weather cell key
+        """
+        return weather_cell_key(location, self.cell_size)
+
+    def add_assessment(self, assessment_id, location, activity_type, user_experience,
+                       group_size, equipment_quality_level, terrain_data, weight_carried,
+                       age, height_weight_ratio, gender):
+        """
+        Add (or replace) an assessment and cache its non-weather components
+
+        Parameters:
+        assessment_id (hashable): Identifier of the assessment
+        location (tuple): (latitude, longitude)
+        activity_type (str): Type of outdoor activity
+        user_experience (str): Experience level
+        group_size (int): Number of people in group
+        equipment_quality_level (str): Quality of equipment
+        terrain_data (dict): Terrain difficulty metrics
+        weight_carried (float): Weight carried in pounds
+        age (int): User age
+        height_weight_ratio (float): User height-weight ratio
+        gender (str): User gender
+        """
+        if assessment_id in self._assessments:
+            self.remove_assessment(assessment_id)
+
+        risk_system = self.risk_system
+        human_risk, weight_risk = risk_system.calculate_human_risk(
+            user_experience, group_size, activity_type, weight_carried, age, height_weight_ratio, gender
+        )
+
+        cell = self.cell_for(location)
+        self._assessments[assessment_id] = {
+            'location': location,
+            'cell': cell,
+            'activity_type': activity_type,
+            'exposure': {
+                key: terrain_data[key] for key in ('wind_exposure', 'lightning_exposure') if key in terrain_data
+            },
+            'components': {
+                'terrain_risk': risk_system.assess_terrain_difficulty(location, terrain_data, activity_type),
+                'human_risk': human_risk,
+                'equipment_risk': risk_system.assess_equipment_risk(equipment_quality_level, activity_type),
+                'weight_risk': weight_risk
+            },
+            'result': None
+        }
+        self._cell_index.setdefault(cell, set()).add(assessment_id)
+        self._dirty_ids.add(assessment_id)
+
+    def remove_assessment(self, assessment_id):
+        """
+        Remove an assessment from the engine
+
+        Parameters:
+        assessment_id (hashable): Identifier of the assessment
+        """
+        entry = self._assessments.pop(assessment_id, None)
+        if entry is None:
+            return
+
+        ids = self._cell_index.get(entry['cell'])
+        if ids is not None:
+            ids.discard(assessment_id)
+            if not ids:
+                del self._cell_index[entry['cell']]
+        self._dirty_ids.discard(assessment_id)
+
+    def update_weather(self, cell, weather_data):
+        """
+        Store a new forecast for a weather cell and mark its assessments dirty
+
+        Parameters:
+        cell (tuple): Weather cell key (see cell_for())
+        weather_data (dict): Weather forecast data
+
+        Returns:
+        int: Number of assessments marked dirty
+        """
+        self._weather[cell] = weather_data
+        ids = self._cell_index.get(cell, ())
+        self._dirty_ids.update(ids)
+        return len(ids)
+
+    def dirty_count(self):
+        """
+        Get the number of assessments waiting to be rescored
+
+        Returns:
+        int: Number of dirty assessments
+        """
+        return len(self._dirty_ids)
+
+    def rescore(self):
+        """
+        Recompute the weather risk and total for every dirty assessment
+
+        The weather risk only depends on the cell's weather, the activity and
+        the terrain exposure, so it is computed once per distinct combination
+        per pass.
+
+        Returns:
+        dict: Assessment id -> (risk_category, risk_score, component_scores) for rescored assessments
+        """
+        risk_system = self.risk_system
+        weather_risks = {}
+        updated = {}
+
+        for assessment_id in self._dirty_ids:
+            entry = self._assessments[assessment_id]
+            exposure = entry['exposure']
+            key = (entry['cell'], entry['activity_type'], tuple(sorted(exposure.items())))
+            if key not in weather_risks:
+                weather_data = self._weather.get(entry['cell'], DEFAULT_WEATHER)
+                weather_risks[key] = risk_system.calculate_weather_risk(weather_data, entry['activity_type'], exposure)
+
+            component_scores = dict(entry['components'])
+            component_scores['weather_risk'] = weather_risks[key]
+            total_risk = risk_system.combine_component_risks(component_scores, entry['location'])
+            component_scores['total_risk'] = total_risk
+
+            risk_category, risk_score = risk_system.categorize_risk(total_risk)
+            entry['result'] = (risk_category, risk_score, component_scores)
+            updated[assessment_id] = entry['result']
+
+        self._dirty_ids = set()
+        return updated
+
+    def get_result(self, assessment_id):
+        """
+        Get the latest result for an assessment
+
+        Parameters:
+        assessment_id (hashable): Identifier of the assessment
+
+        Returns:
+        tuple: (risk_category, risk_score, component_scores), or None if not scored yet
+        """
+        return self._assessments[assessment_id]['result']
+
+
+# Version of the scoring bundle format consumed by docs/script.js
+SCORING_BUNDLE_VERSION = 1
+
+
+def build_scoring_bundle(risk_system=None):
+    """
+    Build the scoring configuration and lookup tables used by the web page
+
+    Human, weight and equipment risks only depend on categorical inputs, so
+    they are precomputed by the Python engine for every combination. The
+    human risk table is stored as its distinct values plus a base64 array of
+    little-endian uint16 indices. Weather and terrain risks depend on
+    continuous inputs and are recomputed client-side from the exported
+    thresholds. A few reference assessments are included so the page can
+    verify it reproduces the Python scores exactly. Locations are the web
+    page's, keyed by their option values (see web_location_id).
+
+    Parameters:
+    risk_system (OutdoorRiskAssessment): Risk assessment system (a new one if None)
+
+    Returns:
+    dict: JSON-serializable scoring bundle
+    """
+    risk_system = risk_system or OutdoorRiskAssessment()
+
+    activities = list(risk_system.activity_types.keys())
+    experience_levels = list(risk_system.experience_levels.keys())
+    group_categories = ['solo', 'small', 'medium', 'large']
+    weight_categories = ['light', 'moderate', 'heavy', 'very_heavy']
+    age_categories = list(risk_system.physical_attributes['age'].keys())
+    height_weight_categories = list(risk_system.physical_attributes['height_weight_ratio'].keys())
+    genders = list(risk_system.physical_attributes['gender'].keys())
+    equipment_qualities = list(risk_system.equipment_quality.keys())
+
+    # Human risk for every category combination, in row-major axis order
+    axes = [activities, experience_levels, group_categories, weight_categories,
+            age_categories, height_weight_categories, genders]
+    values = []
+    value_index = {}
+    indices = np.empty(int(np.prod([len(axis) for axis in axes])), dtype='<u2')
+    for i, key in enumerate(itertools.product(*axes)):
+        human_risk = risk_system._calculate_human_risk(*key)[0]
+        if human_risk not in value_index:
+            value_index[human_risk] = len(values)
+            values.append(human_risk)
+        indices[i] = value_index[human_risk]
+
+    bundle = {
+        'version': SCORING_BUNDLE_VERSION,
+        'generated': datetime.now().strftime("%Y-%m-%d %H:%M"),
+        'config': {
+            'activity_types': risk_system.activity_types,
+            'weather_thresholds': risk_system.weather_thresholds,
+            'weight_thresholds': risk_system.weight_thresholds,
+            'component_weights': risk_system.component_weights,
+            'avalanche_terrain': risk_system.avalanche_terrain,
+            'remoteness': risk_system.remoteness,
+            'risk_categories': [
+                [category, thresholds['min'], thresholds['max']]
+                for category, thresholds in risk_system.risk_categories.items()
+            ],
+            'age_categories': [
+                [category, thresholds['min'], thresholds['max']]
+                for category, thresholds in risk_system.physical_attributes['age'].items()
+            ],
+            'location_modifiers': {
+                web_location_id(name): risk_system.get_location_modifier(location)
+                for name, location in WEB_LOCATIONS.items()
+            }
+        },
+        'tables': {
+            'weight_risk': {
+                activity: {category: risk_system._calculate_weight_risk(category, activity)
+                           for category in weight_categories}
+                for activity in activities
+            },
+            'equipment_risk': {
+                activity: {quality: risk_system._assess_equipment_risk(quality, activity)
+                           for quality in equipment_qualities}
+                for activity in activities
+            },
+            'human_risk': {
+                'axes': axes,
+                'values': values,
+                'index': base64.b64encode(indices.tobytes()).decode('ascii')
+            }
+        },
+        'locations': {
+            web_location_id(name): {'name': name, 'location': list(location), 'terrain': web_location_terrain(name)}
+            for name, location in WEB_LOCATIONS.items()
+        },
+        'checks': []
+    }
+
+    # Reference assessments for client-side parity checks
+    samples = [
+        ('Pikes Peak', 'backcountry_skiing', 'beginner', 1, 'poor', 45, 70, 31, 'male',
+         {'temperature': 5, 'precipitation': 0.5, 'wind_speed': 35, 'thunderstorm_risk': 0.8}),
+        ('Garden of the Gods', 'hiking', 'intermediate', 3, 'good', 15, 30, 22, 'female',
+         {'temperature': 72, 'precipitation': 0, 'wind_speed': 8, 'thunderstorm_risk': 0.2}),
+        ('Manitou Incline', 'trail_running', 'advanced', 6, 'basic', 12, 55, 26.5, 'other',
+         {'temperature': 98.5, 'precipitation': 0.1, 'wind_speed': 20, 'thunderstorm_risk': 0.4}),
+        ('Barr Trail', 'mountain_biking', 'expert', 12, 'excellent', 30, 17, 17.9, 'male',
+         {'temperature': 60, 'precipitation': 0.25, 'wind_speed': 12, 'thunderstorm_risk': 0}),
+        ('Cheyenne Canyon', 'rock_climbing', 'beginner', 2, 'good', 26, 36, 25, 'female',
+         {'temperature': 10, 'precipitation': 0.04, 'wind_speed': 31, 'thunderstorm_risk': 0.3})
+    ]
+    for (location_name, activity_type, user_experience, group_size, equipment_quality_level,
+         weight_carried, age, height_weight_ratio, gender, weather_data) in samples:
+        terrain_data = web_location_terrain(location_name)
+        risk_category, risk_score, component_scores = risk_system.calculate_risk_score(
+            WEB_LOCATIONS[location_name], activity_type, user_experience, group_size, weather_data,
+            equipment_quality_level, terrain_data, weight_carried, age, height_weight_ratio, gender
+        )
+        bundle['checks'].append({
+            'inputs': {
+                'location': web_location_id(location_name),
+                'activity_type': activity_type,
+                'user_experience': user_experience,
+                'group_size': group_size,
+                'equipment_quality_level': equipment_quality_level,
+                'weight_carried': weight_carried,
+                'age': age,
+                'height_weight_ratio': height_weight_ratio,
+                'gender': gender,
+                'weather': weather_data,
+                'terrain': terrain_data
+            },
+            'risk_category': risk_category,
+            'risk_score': risk_score,
+            'component_scores': component_scores
+        })
+
+    return bundle
+
+
+def export_scoring_bundle(path=os.path.join("docs", "scoring_bundle.json"), risk_system=None):
+    """
+    Write the scoring bundle loaded by the web page
+
+    Parameters:
+    path (str): Output file path
+    risk_system (OutdoorRiskAssessment): Risk assessment system (a new one if None)
+
+    Returns:
+    int: Size of the written bundle in bytes
+    """
+    bundle = build_scoring_bundle(risk_system)
+    with open(path, 'w') as f:
+        json.dump(bundle, f, separators=(',', ':'))
+
+    return os.path.getsize(path)
+
+
+# Locations offered on the web page (docs/index.html)
+WEB_LOCATIONS = {
+    'Garden of the Gods': LOCATION_CATALOG['Garden of the Gods'],
+    'Pikes Peak': LOCATION_CATALOG['Pikes Peak'],
+    'Barr Trail': (38.8553, -104.9329),
+    'Manitou Incline': (38.8574, -104.9313),
+    'Cheyenne Canyon': (38.7920, -104.8760)
+}
+
+# Terrain in feet for the web page locations outside the catalog
+WEB_LOCATION_TERRAIN = {
+    'Barr Trail': {'elevation': 6800, 'slope': 15, 'ruggedness': 0.4},
+    'Manitou Incline': {'elevation': 8600, 'slope': 40, 'ruggedness': 0.7},
+    'Cheyenne Canyon': {'elevation': 6800, 'slope': 15, 'ruggedness': 0.4}
+}
+
+
+def web_location_id(name):
+    """
+    Get the id the web page uses for a location (its <option> value)
+
+    Parameters:
+    name (str): Location name in WEB_LOCATIONS
+
+    Returns:
+    str: Location id, e.g. 'pikes-peak'
+    """
+    return name.lower().replace(' ', '-')
+
+
+def web_location_terrain(name):
+    """
+    Get the terrain data of a web page location
+
+    Parameters:
+    name (str): Location name in WEB_LOCATIONS
+
+    Returns:
+    dict: Terrain difficulty metrics
+    """
+    return LOCATION_TERRAIN.get(name) or WEB_LOCATION_TERRAIN[name]
+
+
+class ForecastService:
+    def __init__(self, api_key=None, risk_system=None, cell_size=0.1, refresh_interval=3600,
+                 days=5, cache_dir="forecast_cache", fetch=None):
+        """
+        Initialize the multi-day forecast service
+
+        Forecasts are fetched once per weather cell (at the cell centre) and
+        reused by every location in the cell until the refresh interval has
+        passed. Fetched forecasts are also cached on disk so restarts do not
+        trigger new API calls.
+
+        Parameters:
+        api_key (str): OpenWeather API key (defaults to OPENWEATHER_API_KEY)
+        risk_system (OutdoorRiskAssessment): Risk assessment system (a new one if None)
+        cell_size (float): Weather cell size in degrees
+        refresh_interval (int): Seconds before a cell's forecast is refetched
+        days (int): Number of forecast days
+        cache_dir (str): Directory for cached cell forecasts (None disables the disk cache)
+        fetch (callable): Function (location, days) -> daily forecast, replacing the OpenWeather call
+        """
+        # Cells may be requested from several threads (see TripWatchScheduler.refresh);
+        # concurrent requests for one cell share a single fetch
+        self.api_key = api_key or OPENWEATHER_API_KEY
+        self.risk_system = risk_system or OutdoorRiskAssessment()
+        self.cell_size = cell_size
+        self.refresh_interval = refresh_interval
+        self.days = days
+        self.cache_dir = cache_dir
+        self.fetch = fetch or (lambda location, days: fetch_forecast_data(self.api_key, location, days))
+
+        self._cells = {}
+        self.stats = {'fetches': 0, 'failed_fetches': 0, 'cache_hits': 0}
+        self._lock = threading.Lock()
+        self.single_flight = SingleFlight()
+
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def cell_center(self, cell):
+        """
+        Get the centre of a weather cell
+
+        Parameters:
+        cell (tuple): Weather cell key
+
+        Returns:
+        tuple: (latitude, longitude)
+        """
+        row, col = cell
+        return (round((row + 0.5) * self.cell_size, 4), round((col + 0.5) * self.cell_size, 4))
+
+    def _cache_path(self, cell):
+        return os.path.join(self.cache_dir, f"forecast_{cell[0]}_{cell[1]}.json")
+
+    def get_cell_forecast(self, cell, now=None):
+        """
+        Get the forecast for a weather cell, fetching it only when stale
+
+        Parameters:
+        cell (tuple): Weather cell key
+        now (float): Current time in seconds (defaults to time.time())
+
+        Returns:
+        dict: Cell forecast with 'center', 'fetched' and 'days', or None if unavailable
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._cells.get(cell)
+
+        # Fall back to the disk cache after a restart
+        if entry is None and self.cache_dir and os.path.exists(self._cache_path(cell)):
+            with open(self._cache_path(cell)) as f:
+                entry = json.load(f)
+            with self._lock:
+                entry = self._cells.setdefault(cell, entry)
+
+        if entry is not None and now - entry['fetched'] < self.refresh_interval:
+            with self._lock:
+                self.stats['cache_hits'] += 1
+            return entry
+
+        return self.single_flight.do(('forecast', cell), self._fetch_cell_forecast, cell, entry, now)
+
+    def _fetch_cell_forecast(self, cell, entry, now):
+        """
+        Fetch and store a cell's forecast without request coalescing
+
+        Parameters:
+        cell (tuple): Weather cell key
+        entry (dict): Stale cell forecast to keep serving if the fetch fails (or None)
+        now (float): Current time in seconds
+
+        Returns:
+        dict: Cell forecast, or the stale entry if the fetch failed
+        """
+        center = self.cell_center(cell)
+        days = self.fetch(center, self.days)
+
+        if not days:
+            # Keep serving the stale forecast rather than nothing
+            with self._lock:
+                self.stats['fetches'] += 1
+                self.stats['failed_fetches'] += 1
+            return entry
+
+        entry = {
+            'center': list(center),
+            'fetched': now,
+            'days': self.score_forecast(days)
+        }
+        with self._lock:
+            self.stats['fetches'] += 1
+            self._cells[cell] = entry
+
+        if self.cache_dir:
+            with open(self._cache_path(cell), 'w') as f:
+                json.dump(entry, f, separators=(',', ':'))
+
+        return entry
+
+    def score_forecast(self, days):
+        """
+        Add the weather risk of every activity to each forecast day
+
+        All days and activities are scored in one vectorized pass.
+
+        Parameters:
+        days (list): Daily forecast (see parse_daily_forecast)
+
+        Returns:
+        list: The same days with a 'weather_risk' dict of activity -> risk
+        """
+        activities = list(self.risk_system.activity_types.keys())
+        sensitivities = [self.risk_system.activity_types[activity]['weather_sensitivity'] for activity in activities]
+
+        def column(field):
+            return np.array([day['weather'][field] for day in days], dtype=np.float64)[:, np.newaxis]
+
+        risks = self.risk_system.calculate_weather_risk_array(
+            column('temperature'), column('precipitation'), column('wind_speed'),
+            column('thunderstorm_risk'), sensitivities
+        )
+
+        for day, day_risks in zip(days, risks):
+            day['weather_risk'] = {activity: round(float(risk), 2) for activity, risk in zip(activities, day_risks)}
+
+        return days
+
+    def build_payload(self, locations=None, now=None):
+        """
+        Build the forecast payload rendered by the web page
+
+        Parameters:
+        locations (dict): Location name -> (latitude, longitude) (defaults to WEB_LOCATIONS)
+        now (float): Current time in seconds (defaults to time.time())
+
+        Returns:
+        dict: Payload mapping each location id (see web_location_id) to its cell
+            and each cell to its forecast
+        """
+        locations = locations or WEB_LOCATIONS
+        now = time.time() if now is None else now
+
+        payload = {
+            'generated': datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M"),
+            'refresh_interval': self.refresh_interval,
+            'locations': {},
+            'cells': {}
+        }
+
+        for name, location in locations.items():
+            cell = weather_cell_key(location, self.cell_size)
+            cell_id = f"{cell[0]}_{cell[1]}"
+            if cell_id not in payload['cells']:
+                entry = self.get_cell_forecast(cell, now)
+                if entry is None:
+                    continue
+                payload['cells'][cell_id] = entry
+            payload['locations'][web_location_id(name)] = cell_id
+
+        return payload
+
+    def write_payload(self, path=os.path.join("docs", "forecast.json"), locations=None):
+        """
+        Write the forecast payload for the web page
+
+        Parameters:
+        path (str): Output file path
+        locations (dict): Location name -> (latitude, longitude) (defaults to WEB_LOCATIONS)
+
+        Returns:
+        dict: The written payload
+        """
+        payload = self.build_payload(locations)
+        with open(path, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+
+        return payload
+
+class TripWatchScheduler:
+    def __init__(self, forecast_service=None, risk_system=None, interval=None, max_concurrency=8, on_event=None):
+        """
+        Initialize an asyncio scheduler for watched trips
+
+        Watches are grouped by weather cell, so one forecast fetch serves
+        every watch in the cell. Weather-independent components are computed
+        once when a watch is added, and a cell's watches are rescored in one
+        vectorized pass, only when the cell's forecast or membership changed.
+        An event is emitted when a watch's risk category changes.
+
+        Parameters:
+        forecast_service (ForecastService): Source of cell forecasts (a new one if None)
+        risk_system (OutdoorRiskAssessment): Risk assessment system (the forecast service's if None)
+        interval (float): Seconds between refreshes (defaults to the forecast refresh interval)
+        max_concurrency (int): Most cell forecasts fetched at once
+        on_event (callable): Called with each category-change event dict
+        """
+        self.forecast_service = forecast_service or ForecastService(risk_system=risk_system)
+        self.risk_system = risk_system or self.forecast_service.risk_system
+        self.interval = interval or self.forecast_service.refresh_interval
+        self.max_concurrency = max_concurrency
+        self.on_event = on_event
+
+        self._watches = {}   # watch id -> weather cell
+        self._cells = {}     # weather cell -> members, column arrays and latest categories
+        self.stats = {'refreshes': 0, 'cells_rescored': 0, 'watches_rescored': 0, 'events': 0}
+
+    def add_watch(self, watch_id, location, date, activity_type, profile, terrain_data=None):
+        """
+        Add (or replace) a watched trip
+
+        Parameters:
+        watch_id (hashable): Identifier of the watch
+        location (tuple or str): (latitude, longitude) or a catalog location name
+        date (str or date): Trip date (YYYY-MM-DD)
+        activity_type (str): Type of outdoor activity
+        profile (dict or str): Profile dict with 'user_experience', 'group_size',
+            'equipment_quality_level', 'weight_carried', 'age', 'height_weight_ratio'
+            and 'gender', or a name in TILE_PROFILES
+        terrain_data (dict): Terrain difficulty metrics (defaults to the catalog entry for the location)
+
+        Returns:
+        tuple: Weather cell of the watch
+        """
+        if date in (None, ''):
+            raise ValueError(f"Watch {watch_id} has no trip date")
+        date = np.datetime64(date, 'D')
+        if watch_id in self._watches:
+            self.remove_watch(watch_id)
+
+        if isinstance(location, str):
+            terrain_data = terrain_data or LOCATION_TERRAIN.get(location)
+            location = LOCATION_CATALOG.get(location) or WEB_LOCATIONS[location]
+        terrain_data = terrain_data or {'elevation': 3280, 'slope': 10, 'ruggedness': 0.5}
+        if isinstance(profile, str):
+            profile = TILE_PROFILES[profile]
+
+        risk_system = self.risk_system
+        human_risk, weight_risk = risk_system.calculate_human_risk(
+            profile['user_experience'], profile['group_size'], activity_type, profile['weight_carried'],
+            profile['age'], profile['height_weight_ratio'], profile['gender']
+        )
+
+        cell = weather_cell_key(location, self.forecast_service.cell_size)
+        entry = self._cells.setdefault(cell, {'members': {}, 'columns': None, 'fetched': None})
+        self._sync_members(entry)
+        entry['members'][watch_id] = {
+            'date': date,
+            'activity_type': activity_type,
+            'terrain_risk': risk_system.assess_terrain_difficulty(location, terrain_data, activity_type),
+            'human_risk': human_risk,
+            'equipment_risk': risk_system.assess_equipment_risk(profile['equipment_quality_level'], activity_type),
+            'weight_risk': weight_risk,
+            'modifier': risk_system.get_location_modifier(location),
+            'sensitivity': risk_system.activity_types[activity_type]['weather_sensitivity'],
+            'wind_exposure': terrain_data.get('wind_exposure', 1.0),
+            'lightning_exposure': terrain_data.get('lightning_exposure', 1.0),
+            'code': -1,
+            'score': None
+        }
+        entry['columns'] = None
+        self._watches[watch_id] = cell
+        return cell
+
+    def remove_watch(self, watch_id):
+        """
+        Remove a watched trip
+
+        Parameters:
+        watch_id (hashable): Identifier of the watch
+        """
+        cell = self._watches.pop(watch_id, None)
+        if cell is None:
+            return
+
+        entry = self._cells[cell]
+        self._sync_members(entry)
+        del entry['members'][watch_id]
+        entry['columns'] = None
+        if not entry['members']:
+            del self._cells[cell]
+
+    def get_watch(self, watch_id):
+        """
+        Get the latest risk of a watched trip
+
+        Parameters:
+        watch_id (hashable): Identifier of the watch
+
+        Returns:
+        tuple: (risk_category, risk_score), or None if the trip date has no forecast yet
+        """
+        entry = self._cells[self._watches[watch_id]]
+        columns = entry['columns']
+        if columns is not None:
+            i = columns['position'][watch_id]
+            code, score = int(columns['code'][i]), float(columns['score'][i])
+        else:
+            member = entry['members'][watch_id]
+            code, score = member['code'], member['score']
+        if code < 0:
+            return None
+        return list(self.risk_system.risk_categories)[code], round(score, 2)
+
+    def watch_count(self):
+        """
+        Get the number of watched trips
+
+        Returns:
+        int: Number of watches
+        """
+        return len(self._watches)
+
+    def watch_ids(self):
+        """
+        Get the identifiers of the watched trips
+
+        Returns:
+        list: Watch ids
+        """
+        return list(self._watches)
+
+    def cell_count(self):
+        """
+        Get the number of weather cells with watched trips
+
+        Returns:
+        int: Number of cells
+        """
+        return len(self._cells)
+
+    def prune_expired(self, today=None):
+        """
+        Remove watches whose trip date has passed
+
+        Parameters:
+        today (str or date): Current date (defaults to today)
+
+        Returns:
+        int: Number of watches removed
+        """
+        today = np.datetime64(datetime.now().date() if today is None else today, 'D')
+        removed = 0
+        for cell in list(self._cells):
+            removed += self._prune_cell(cell, today)
+        return removed
+
+    def _prune_cell(self, cell, today):
+        # Drop a cell's expired watches (and the cell once it is empty)
+        entry = self._cells[cell]
+        columns = entry['columns']
+        if columns is not None:
+            ids, dates = columns['ids'], columns['date']
+        else:
+            ids = list(entry['members'])
+            dates = np.array([member['date'] for member in entry['members'].values()], dtype='datetime64[D]')
+        expired = dates < today
+        if not expired.any():
+            return 0
+
+        self._sync_members(entry)
+        for watch_id in np.array(ids, dtype=object)[expired]:
+            del entry['members'][watch_id]
+            del self._watches[watch_id]
+        entry['columns'] = None
+        if not entry['members']:
+            del self._cells[cell]
+        return int(expired.sum())
+
+    def _sync_members(self, entry):
+        # Copy the latest categories and scores from the columns back to the members
+        columns = entry['columns']
+        if columns is None:
+            return
+        for watch_id, code, score in zip(columns['ids'], columns['code'], columns['score']):
+            member = entry['members'][watch_id]
+            member['code'] = int(code)
+            member['score'] = None if code < 0 else float(score)
+
+    def _build_columns(self, entry):
+        members = entry['members']
+        columns = {'ids': list(members)}
+        columns['position'] = {watch_id: i for i, watch_id in enumerate(columns['ids'])}
+        for field, dtype in (('date', 'datetime64[D]'), ('terrain_risk', np.float64), ('human_risk', np.float64),
+                             ('equipment_risk', np.float64), ('weight_risk', np.float64), ('modifier', np.float64),
+                             ('sensitivity', np.float64), ('wind_exposure', np.float64),
+                             ('lightning_exposure', np.float64), ('code', np.int64)):
+            columns[field] = np.array([member[field] for member in members.values()], dtype=dtype)
+        columns['score'] = np.array([np.nan if member['score'] is None else member['score']
+                                     for member in members.values()], dtype=np.float64)
+        columns['activity_type'] = [member['activity_type'] for member in members.values()]
+        entry['columns'] = columns
+        return columns
+
+    def rescore_cell(self, cell, forecast, today=None):
+        """
+        Rescore every watch in a cell against a forecast
+
+        Watches whose date has passed are removed; watches beyond the
+        forecast horizon stay unscored.
+
+        Parameters:
+        cell (tuple): Weather cell
+        forecast (dict): Cell forecast (see ForecastService.get_cell_forecast)
+        today (str or date): Current date (defaults to today)
+
+        Returns:
+        list: Category-change events
+        """
+        today = np.datetime64(datetime.now().date() if today is None else today, 'D')
+        self._prune_cell(cell, today)
+        entry = self._cells.get(cell)
+        if entry is None:
+            return []
+        columns = entry['columns'] or self._build_columns(entry)
+
+        # Each watch's forecast day
+        days = forecast['days']
+        forecast_dates = np.array([day['date'] for day in days], dtype='datetime64[D]')
+        day_index = np.clip(np.searchsorted(forecast_dates, columns['date']), 0, len(days) - 1)
+        scored = forecast_dates[day_index] == columns['date']
+
+        def column(field):
+            return np.array([day['weather'][field] for day in days], dtype=np.float64)[day_index]
+
+        risk_system = self.risk_system
+        weather_risk = risk_system.calculate_weather_risk_array(
+            column('temperature'), column('precipitation'), column('wind_speed'), column('thunderstorm_risk'),
+            columns['sensitivity'], columns['wind_exposure'], columns['lightning_exposure']
+        )
+        total_risk = risk_system.combine_component_risks({
+            'terrain_risk': columns['terrain_risk'],
+            'weather_risk': weather_risk,
+            'human_risk': columns['human_risk'],
+            'equipment_risk': columns['equipment_risk'],
+            'weight_risk': columns['weight_risk']
+        }, None) * columns['modifier']
+        codes = np.where(scored, risk_system.categorize_risk_array(total_risk), -1)
+
+        # Events for watches whose category changed (first scores only set the baseline)
+        categories = list(risk_system.risk_categories)
+        changed = np.flatnonzero((codes != columns['code']) & (columns['code'] >= 0) & scored)
+        events = [{
+            'watch_id': columns['ids'][i],
+            'cell': list(cell),
+            'date': str(columns['date'][i]),
+            'activity_type': columns['activity_type'][i],
+            'previous_category': categories[columns['code'][i]],
+            'risk_category': categories[codes[i]],
+            'risk_score': round(float(total_risk[i]), 2)
+        } for i in changed]
+
+        columns['code'] = codes
+        columns['score'] = total_risk
+        entry['fetched'] = forecast['fetched']
+
+        self.stats['cells_rescored'] += 1
+        self.stats['watches_rescored'] += len(codes)
+        self.stats['events'] += len(events)
+        return events
+
+    async def refresh(self, now=None):
+        """
+        Fetch the forecast of every watched cell and rescore the affected ones
+
+        Expired watches are removed first. Forecasts are fetched in the
+        default executor, at most max_concurrency at a time. Cells whose
+        forecast is unchanged and whose watches are unchanged are skipped.
+
+        Parameters:
+        now (float): Current time in seconds (defaults to time.time())
+
+        Returns:
+        list: Category-change events (also passed to on_event)
+        """
+        now = time.time() if now is None else now
+        today = datetime.fromtimestamp(now).date()
+        self.prune_expired(today)
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(cell):
+            async with semaphore:
+                return cell, await loop.run_in_executor(None, self.forecast_service.get_cell_forecast, cell, now)
+
+        events = []
+        for cell, forecast in await asyncio.gather(*[fetch(cell) for cell in list(self._cells)]):
+            entry = self._cells.get(cell)
+            if entry is None or not forecast:
+                continue
+            if entry['columns'] is not None and entry['fetched'] == forecast['fetched']:
+                continue
+            events.extend(self.rescore_cell(cell, forecast, today))
+
+        self.stats['refreshes'] += 1
+        if self.on_event:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    async def run(self, stop=None, once=False):
+        """
+        Refresh watches on the forecast cadence until stopped
+
+        Parameters:
+        stop (asyncio.Event): Set to stop the loop
+        once (bool): Refresh a single time and return
+        """
+        stop = stop or asyncio.Event()
+        while True:
+            await self.refresh()
+            if once:
+                return
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+
+class WeatherFetchScheduler:
+    def __init__(self, api_key=None, quota=1000, window=86400, burst=None, cell_size=0.1,
+                 min_refresh=900, max_age=3600, half_life=3600, fetch=None):
+        """
+        Initialize a quota-aware scheduler for current weather
+
+        Weather is kept per weather cell (fetched at the cell centre). Calls
+        are paced by a token bucket refilled at quota/window per second, and a
+        log of call times guarantees at most quota calls in any window.
+        Refresh calls go to the cells with the highest demand (decayed
+        request count) times staleness.
+
+        Parameters:
+        api_key (str): OpenWeather API key (defaults to OPENWEATHER_API_KEY)
+        quota (int): Maximum API calls per window
+        window (float): Quota window in seconds
+        burst (int): Maximum calls made back to back (defaults to quota / 24)
+        cell_size (float): Weather cell size in degrees
+        min_refresh (float): Seconds before a cell may be fetched again
+        max_age (float): Seconds before a cell's weather counts as stale
+        half_life (float): Seconds for a cell's request count to halve
+        fetch (callable): Function location -> weather data or None, replacing the OpenWeather call
+        """
+        self.api_key = api_key or OPENWEATHER_API_KEY
+        self.quota = quota
+        self.window = window
+        self.burst = burst or max(1, quota // 24)
+        self.cell_size = cell_size
+        self.min_refresh = min_refresh
+        self.max_age = max_age
+        self.half_life = half_life
+        self.fetch = fetch or (lambda location: request_current_weather(self.api_key, location))
+
+        # Staleness credited to never-fetched cells, and demand below which cells are forgotten
+        self.max_staleness = 2.0
+        self.min_demand = 0.01
+
+        self._calls = deque()
+        self._tokens = float(self.burst)
+        self._refilled = None
+        self._cells = {}
+        self._demand = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stop = None
+        self.stats = {'requests': 0, 'fresh_hits': 0, 'stale_hits': 0, 'defaults': 0,
+                      'fetches': 0, 'failed_fetches': 0}
+
+    def cell_center(self, cell):
+        """
+        Get the centre of a weather cell
+
+        Parameters:
+        cell (tuple): Weather cell key
+
+        Returns:
+        tuple: (latitude, longitude)
+        """
+        row, col = cell
+        return (round((row + 0.5) * self.cell_size, 4), round((col + 0.5) * self.cell_size, 4))
+
+    def remaining(self, now=None):
+        """
+        Get the number of calls left in the current quota window
+
+        Parameters:
+        now (float): Current time in seconds (defaults to time.time())
+
+        Returns:
+        int: Calls that can still be made without exceeding the quota
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._prune_calls(now)
+            return self.quota - len(self._calls)
+
+    def _prune_calls(self, now):
+        while self._calls and self._calls[0] <= now - self.window:
+            self._calls.popleft()
+
+    def _available(self, now):
+        # Refill the token bucket, then cap by what is left of the quota window
+        if self._refilled is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.quota / self.window)
+        self._refilled = now
+        self._prune_calls(now)
+        return max(0, min(int(self._tokens), self.quota - len(self._calls)))
+
+    def _take_call(self, cell, now):
+        self._tokens -= 1
+        self._calls.append(now)
+        self._in_flight.add(cell)
+
+    def _demand_at(self, cell, now):
+        score, updated = self._demand.get(cell, (0.0, now))
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def _fetch_cells(self, cells, now):
+        for cell in cells:
+            weather_data = None
+            try:
+                weather_data = self.fetch(self.cell_center(cell))
+            except Exception as e:
+                print(f"Error fetching weather for cell {cell}: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.discard(cell)
+                    entry = self._cells.setdefault(cell, {'weather': None, 'fetched': None, 'attempted': None})
+                    entry['attempted'] = now
+                    self.stats['fetches'] += 1
+                    if weather_data:
+                        entry['weather'] = dict(weather_data)
+                        entry['fetched'] = now
+                    else:
+                        # Keep serving the stale weather rather than nothing
+                        self.stats['failed_fetches'] += 1
+
+    def get(self, location, now=None):
+        """
+        Get the current weather for a location and record the demand for its cell
+
+        A cell that has never been fetched is fetched immediately if the
+        budget allows; otherwise the latest (possibly stale) weather is
+        returned and refreshes are left to run_pending().
+
+        Parameters:
+        location (tuple): (latitude, longitude)
+        now (float): Current time in seconds (defaults to time.time())
+
+        Returns:
+        dict: Weather data formatted for risk assessment (DEFAULT_WEATHER if none is available)
+        """
+        now = time.time() if now is None else now
+        cell = weather_cell_key(location, self.cell_size)
+
+        with self._lock:
+            self.stats['requests'] += 1
+            self._demand[cell] = (self._demand_at(cell, now) + 1, now)
+            entry = self._cells.get(cell)
+            fetch_now = (entry is None and cell not in self._in_flight and self._available(now) > 0)
+            if fetch_now:
+                self._take_call(cell, now)
+
+        if fetch_now:
+            self._fetch_cells([cell], now)
+
+        with self._lock:
+            entry = self._cells.get(cell)
+            if entry is None or entry['weather'] is None:
+                self.stats['defaults'] += 1
+                return dict(DEFAULT_WEATHER)
+            if now - entry['fetched'] < self.max_age:
+                self.stats['fresh_hits'] += 1
+            else:
+                self.stats['stale_hits'] += 1
+            return dict(entry['weather'])
+
+    def peek(self, location):
+        """
+        Get the latest weather of a location's cell without recording demand or fetching
+
+        Parameters:
+        location (tuple): (latitude, longitude)
+
+        Returns:
+        dict: Weather data, or None if the cell has no weather yet
+        """
+        cell = weather_cell_key(location, self.cell_size)
+        with self._lock:
+            entry = self._cells.get(cell)
+            if entry is None or entry['weather'] is None:
+                return None
+            return dict(entry['weather'])
+
+    def priorities(self, now=None):
+        """
+        Rank the cells due for a refresh
+
+        Parameters:
+        now (float): Current time in seconds (defaults to time.time())
+
+        Returns:
+        list: (priority, cell) pairs, highest priority first
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._priorities(now)
+
+    def _priorities(self, now):
+        ranked = []
+        for cell in list(self._demand):
+            demand = self._demand_at(cell, now)
+            if demand < self.min_demand:
+                del self._demand[cell]
+                continue
+            if cell in self._in_flight:
+                continue
+
+            entry = self._cells.get(cell)
+            if entry is None or entry['fetched'] is None:
+                staleness = self.max_staleness
+            else:
+                staleness = min((now - entry['fetched']) / self.max_age, self.max_staleness)
+            if entry is not None and now - entry['attempted'] < self.min_refresh:
+                continue
+
+            ranked.append((demand * staleness, cell))
+
+        ranked.sort(reverse=True)
+        return ranked
+
+    def run_pending(self, now=None):
+        """
+        Spend the calls available now on the highest-priority cells
+
+        Parameters:
+        now (float): Current time in seconds (defaults to time.time())
+
+        Returns:
+        list: Cells fetched
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            available = self._available(now)
+            cells = [cell for _, cell in self._priorities(now)[:available]] if available else []
+            for cell in cells:
+                self._take_call(cell, now)
+
+        if cells:
+            self._fetch_cells(cells, now)
+        return cells
+
+    def start(self, interval=None):
+        """
+        Run run_pending() periodically in a background thread
+
+        Parameters:
+        interval (float): Seconds between runs (defaults to the time one call takes to refill)
+
+        Returns:
+        threading.Thread: The scheduler thread
+        """
+        interval = interval or max(1.0, self.window / self.quota)
+        self._stop = threading.Event()
+
+        def loop(stop):
+            while not stop.wait(interval):
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    print(f"Error refreshing weather: {e}")
+
+        thread = threading.Thread(target=loop, args=(self._stop,), daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """
+        Stop the background thread started by start()
+        """
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+
+# Risk profiles that map tiles are rendered for
+TILE_PROFILES = {
+    'beginner': {'user_experience': 'beginner', 'group_size': 2, 'equipment_quality_level': 'basic',
+                 'weight_carried': 15, 'age': 30, 'height_weight_ratio': 22, 'gender': 'other'},
+    'intermediate': {'user_experience': 'intermediate', 'group_size': 2, 'equipment_quality_level': 'good',
+                     'weight_carried': 20, 'age': 35, 'height_weight_ratio': 22, 'gender': 'other'},
+    'expert': {'user_experience': 'expert', 'group_size': 2, 'equipment_quality_level': 'excellent',
+               'weight_carried': 25, 'age': 35, 'height_weight_ratio': 22, 'gender': 'other'}
+}
+
+# Tile colours (RGBA) per risk category, matching the web page
+RISK_TILE_COLORS = {
+    'low': (76, 175, 80, 140),
+    'moderate': (255, 193, 7, 150),
+    'high': (255, 152, 0, 165),
+    'extreme': (244, 67, 54, 180)
+}
+
+
+def tile_bounds(z, x, y):
+    """
+    Get the geographic bounds of a Web Mercator (XYZ) tile
+
+    Parameters:
+    z, x, y (int): Tile zoom, column and row
+
+    Returns:
+    tuple: (xmin, ymin, xmax, ymax) in degrees
+    """
+    n = 2 ** z
+    lat_max = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    lat_min = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return (x / n * 360 - 180, float(lat_min), (x + 1) / n * 360 - 180, float(lat_max))
+
+
+def tiles_for_bounds(bounds, z):
+    """
+    List the XYZ tiles covering a bounding box at one zoom level
+
+    Parameters:
+    bounds (tuple): (xmin, ymin, xmax, ymax) in degrees
+    z (int): Zoom level
+
+    Returns:
+    list: (z, x, y) tuples
+    """
+    xmin, ymin, xmax, ymax = bounds
+    n = 2 ** z
+
+    def column(lon):
+        return min(n - 1, max(0, int((lon + 180) / 360 * n)))
+
+    def row(lat):
+        lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+        return min(n - 1, max(0, int((1 - np.arcsinh(np.tan(lat)) / np.pi) / 2 * n)))
+
+    return [(z, x, y) for x in range(column(xmin), column(xmax) + 1)
+            for y in range(row(ymax), row(ymin) + 1)]
+
+
+class RiskTileRenderer:
+    def __init__(self, risk_system=None, terrain_analyzer=None, weather=None, cache_dir="tile_cache",
+                 tile_size=256, cell_size=0.1, weather_regions=None):
+        """
+        Initialize a renderer of risk heatmap tiles
+
+        Each tile is scored pixel by pixel: terrain (with avalanche terrain
+        weighting) from the analyzer's cached terrain layers read around the
+        tile at about the tile's resolution, weather per weather cell scaled
+        by the terrain's wind and lightning exposure, and human and equipment
+        risk from a profile in TILE_PROFILES. Tiles are cached on disk under
+        activity/profile/z/x/ and named by y plus a version hash of the
+        weather they were rendered with, so a tile is re-rendered only when
+        its weather changes.
+
+        Weather is only requested from the scheduler (recording demand and
+        spending quota) inside the weather regions, and only for tiles that
+        are not already cached with the weather the scheduler holds; elsewhere
+        tiles use what the scheduler already holds for other demand, or
+        DEFAULT_WEATHER.
+
         Parameters:
-        location (tuple): (latitude, longitude)
-        radius (int): Radius in meters to analyze around the point
-        
-        Returns:
-        dict: Trail information
+        risk_system (OutdoorRiskAssessment): Risk assessment system (a new one if None)
+        terrain_analyzer (GISTerrainAnalyzer): Supplies the terrain layers (a new one if None)
+        weather (WeatherFetchScheduler): Source of current weather per cell (DEFAULT_WEATHER if None)
+        cache_dir (str): Directory for rendered tiles
+        tile_size (int): Tile width and height in pixels
+        cell_size (float): Weather cell size in degrees (the scheduler's if one is given)
+        weather_regions (list): (xmin, ymin, xmax, ymax) regions with live weather (prerender adds its bounds)
         """
-        # This would normally use a trail database like OpenStreetMap or a specialized API
-        # For this example, we'll return dummy data
-        
-        # Mock different trail difficulties
-        trail_difficulties = ['easy', 'moderate', 'difficult', 'very_difficult']
-        
-        # Use the coordinates to seed a random generator for consistency
-        lat, lon = location
-        np.random.seed(int((lat + 180) * 1000) + int((lon + 360) * 1000))
-        
-        # Generate a random number of trails (0-5)
-        num_trails = np.random.randint(0, 6)
+        self.risk_system = risk_system or OutdoorRiskAssessment()
+        self.terrain_analyzer = terrain_analyzer or GISTerrainAnalyzer()
+        self.weather = weather
+        self.cache_dir = cache_dir
+        self.tile_size = tile_size
+        self.cell_size = weather.cell_size if weather is not None else cell_size
+        self.weather_regions = [tuple(region) for region in weather_regions or []]
         
-        trails = []
-        for i in range(num_trails):
-           # Generate random trail properties
-            length = float(np.random.uniform(1, 20))  # miles
-            difficulty = np.random.choice(trail_difficulties)
-            
-            trails.append({
-                'id': f"trail_{i+1}",
-                'length_mi': length,
-                'difficulty': difficulty,
-                'name': f"Trail {i+1}"
-            })
+        # Most weather lookups per tile side; low zooms sample weather on coarser cells
+        self.max_weather_cells = 16
         
-        return {
-            'num_trails': num_trails,
-            'trails': trails
-        }
-    
-    def get_terrain_context(self, location, radius=1000):
+        # Finest DEM cell size in meters tiles are scored at (about the resolution of 3DEP 1/3")
+        self.min_terrain_resolution = 10
+        self.single_flight = SingleFlight()
+        self.stats = {'hits': 0, 'renders': 0}
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _pixel_coordinates(self, z, x, y):
+        # Pixel-centre latitudes (per row) and longitudes (per column)
+        n = 2 ** z
+        offsets = (np.arange(self.tile_size) + 0.5) / self.tile_size
+        lons = (x + offsets) / n * 360 - 180
+        lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+        return lats, lons
+
+    def _tile_weather(self, lats, lons, request=True):
+        # Weather per weather cell, with each pixel's index into the cell list
+        # (request=False only looks at what the scheduler already holds)
+        span = max(np.ptp(lats), np.ptp(lons))
+        cell_size = self.cell_size * max(1, int(np.ceil(span / (self.cell_size * self.max_weather_cells))))
+        rows = np.floor(lats / cell_size).astype(np.int64)
+        cols = np.floor(lons / cell_size).astype(np.int64)
+        unique_rows, row_index = np.unique(rows, return_inverse=True)
+        unique_cols, col_index = np.unique(cols, return_inverse=True)
+
+        weather = [self._cell_weather((col * cell_size, row * cell_size, (col + 1) * cell_size, (row + 1) * cell_size),
+                                      request)
+                   for row in unique_rows for col in unique_cols]
+
+        pixel_cells = row_index[:, np.newaxis] * len(unique_cols) + col_index[np.newaxis, :]
+        return weather, pixel_cells
+
+    def _cell_weather(self, cell_bounds, request=True):
+        # Live weather at the centre of the cell's overlap with a weather region
+        if self.weather is None:
+            return DEFAULT_WEATHER
+        xmin, ymin, xmax, ymax = cell_bounds
+        for region_xmin, region_ymin, region_xmax, region_ymax in self.weather_regions:
+            left, bottom = max(xmin, region_xmin), max(ymin, region_ymin)
+            right, top = min(xmax, region_xmax), min(ymax, region_ymax)
+            if left <= right and bottom <= top:
+                location = ((bottom + top) / 2, (left + right) / 2)
+                if request:
+                    return self.weather.get(location)
+                return self.weather.peek(location) or DEFAULT_WEATHER
+        return self.weather.peek(((ymin + ymax) / 2, (xmin + xmax) / 2)) or DEFAULT_WEATHER
+
+    def tile_path(self, activity_type, profile, z, x, y, version):
         """
-        Get comprehensive terrain context for a location
-        
+        Get the cache path of a tile
+
         Parameters:
-        location (tuple): (latitude, longitude)
-        radius (int): Radius in meters to analyze around the point
-        
+        activity_type (str): Type of outdoor activity
+        profile (str): Profile name in TILE_PROFILES
+        z, x, y (int): Tile coordinates
+        version (str): Weather version of the tile
+
         Returns:
-        dict: Comprehensive terrain information
+        str: PNG file path
         """
-        # Get basic terrain analysis
-        terrain_analysis = self.analyze_terrain(location, radius)
-        
-        # Get land cover information
-        land_cover = self.get_land_cover(location, radius)
-        
-        # Get protected area information
-        protected_area = self.get_protected_areas(location, radius)
-        
-        # Get trails information
-        trails = self.get_trails(location, radius)
-        
-        # Combine all information
-        terrain_context = {
-            **terrain_analysis,
-            'land_cover': land_cover,
-            'protected_area': protected_area,
-            'trails': trails
+        return os.path.join(self.cache_dir, activity_type, profile, str(z), str(x), f"{y}_{version}.png")
+
+    def get_tile(self, activity_type, profile, z, x, y):
+        """
+        Get a tile as PNG bytes, rendering it if the cached one is missing or outdated
+
+        Parameters:
+        activity_type (str): Type of outdoor activity
+        profile (str): Profile name in TILE_PROFILES
+        z, x, y (int): Tile coordinates
+
+        Returns:
+        bytes: RGBA PNG image
+        """
+        if activity_type not in self.risk_system.activity_types:
+            raise ValueError(f"Unknown activity type: {activity_type}")
+        if profile not in TILE_PROFILES:
+            raise ValueError(f"Unknown tile profile: {profile}")
+        if z < 0 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Tile {z}/{x}/{y} is outside the tile grid")
+
+        lats, lons = self._pixel_coordinates(z, x, y)
+
+        # A tile cached with the weather the scheduler already holds is served without
+        # requesting weather, so cache hits neither record demand nor spend quota
+        for request in (False, True):
+            weather, pixel_cells = self._tile_weather(lats, lons, request)
+            version = hashlib.md5(json.dumps(weather, sort_keys=True).encode()).hexdigest()[:10]
+            path = self.tile_path(activity_type, profile, z, x, y, version)
+
+            if os.path.exists(path):
+                self.stats['hits'] += 1
+                with open(path, 'rb') as f:
+                    return f.read()
+
+        return self.single_flight.do(path, self._render_tile, activity_type, profile, z, x, y,
+                                     lats, lons, weather, pixel_cells, path)
+
+    def _render_tile(self, activity_type, profile, z, x, y, lats, lons, weather, pixel_cells, path):
+        risk_system = self.risk_system
+        analyzer = self.terrain_analyzer
+        user = TILE_PROFILES[profile]
+        size = self.tile_size
+
+        # Terrain layers at about the tile's pixel size (no finer than min_terrain_resolution),
+        # read around the tile centre with a margin for the avalanche neighbourhood
+        xmin, ymin, xmax, ymax = tile_bounds(z, x, y)
+        m_per_deg = 111320
+        center = ((ymin + ymax) / 2, (xmin + xmax) / 2)
+        finest = self.min_terrain_resolution / m_per_deg
+        res = (max((xmax - xmin) / size, finest / np.cos(np.radians(center[0]))), max((ymax - ymin) / size, finest))
+        radius = int(np.ceil((max(xmax - xmin, ymax - ymin) / 2 + 2 * max(res)) * m_per_deg +
+                             analyzer.avalanche_neighbourhood / np.cos(np.radians(center[0]))))
+        layers = analyzer.get_terrain_layers(center, radius, res)
+        if layers is None:
+            raise RuntimeError(f"Could not get elevation data for tile {z}/{x}/{y}")
+        dem = np.asarray(layers['elevation'], dtype=np.float32)
+        transform = layers['transform']
+
+        # Local ruggedness over 3x3 windows, same definition as analyze_terrain
+        mean = uniform_filter(dem, 3)
+        std = np.sqrt(np.maximum(uniform_filter(dem * dem, 3) - mean * mean, 0))
+        elevation_range = meters_to_feet(maximum_filter(dem, 3) - minimum_filter(dem, 3))
+        ruggedness = np.minimum(1.0, np.where(elevation_range > 0, std / np.where(elevation_range > 0, elevation_range, 1), 0.5))
+
+        grid_lats = np.repeat(lats, size)
+        grid_lons = np.tile(lons, size)
+        elevation = meters_to_feet(sample_raster_bilinear(dem, transform, grid_lats, grid_lons))
+        ruggedness = sample_raster_bilinear(ruggedness, transform, grid_lats, grid_lons)
+        slope, avalanche_fraction, wind_exposure, lightning_exposure = (
+            sample_raster_bilinear(layers[name], transform, grid_lats, grid_lons)
+            for name in ('slope', 'avalanche_terrain_fraction', 'wind_exposure', 'lightning_exposure'))
+
+        # Cell weather spread to the pixels and scaled by each pixel's exposure
+        def column(field):
+            values = np.array([cell_weather.get(field, DEFAULT_WEATHER[field]) for cell_weather in weather], dtype=np.float64)
+            return values[pixel_cells.ravel()]
+
+        weather_risk = risk_system.calculate_weather_risk_array(
+            column('temperature'), column('precipitation'), column('wind_speed'), column('thunderstorm_risk'),
+            risk_system.activity_types[activity_type]['weather_sensitivity'],
+            wind_exposure=wind_exposure, lightning_exposure=lightning_exposure
+        )
+
+        human_risk, weight_risk = risk_system.calculate_human_risk(
+            user['user_experience'], user['group_size'], activity_type, user['weight_carried'],
+            user['age'], user['height_weight_ratio'], user['gender']
+        )
+        total_risk = risk_system.combine_component_risks({
+            'terrain_risk': risk_system.assess_terrain_difficulty_array(
+                elevation, slope, ruggedness, activity_type, avalanche_terrain_fraction=avalanche_fraction),
+            'weather_risk': weather_risk,
+            'human_risk': human_risk,
+            'equipment_risk': risk_system.assess_equipment_risk(user['equipment_quality_level'], activity_type),
+            'weight_risk': weight_risk
+        }, None)
+        total_risk *= risk_system.get_location_modifiers(grid_lats, grid_lons)
+
+        # Colour by risk category
+        colors = np.array([RISK_TILE_COLORS[category] for category in risk_system.risk_categories], dtype=np.uint8)
+        image = colors[risk_system.categorize_risk_array(total_risk)].reshape(size, size, 4)
+
+        # Plain PNG: the tile coordinates locate it, so no georeferencing is written
+        with warnings.catch_warnings(), MemoryFile() as memfile:
+            warnings.simplefilter('ignore', NotGeoreferencedWarning)
+            with memfile.open(driver='PNG', width=size, height=size, count=4, dtype='uint8') as dst:
+                dst.write(np.moveaxis(image, 2, 0))
+            data = memfile.read()
+
+        # Replace older weather versions of the tile
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        for filename in os.listdir(directory):
+            if filename.startswith(f"{y}_") and filename.endswith('.png'):
+                os.remove(os.path.join(directory, filename))
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        self.stats['renders'] += 1
+        return data
+
+    def prerender(self, bounds, max_zoom=8, min_zoom=0, activities=None, profiles=None, workers=4):
+        """
+        Render every tile covering a region up to a zoom level
+
+        Low zooms cover whole regions in a few tiles, so they are rendered
+        ahead of time; higher zooms are rendered on demand. The region is
+        added to the weather regions.
+
+        Parameters:
+        bounds (tuple): (xmin, ymin, xmax, ymax) in degrees
+        max_zoom (int): Highest zoom level to render
+        min_zoom (int): Lowest zoom level to render
+        activities (list): Activity types (defaults to all)
+        profiles (list): Profile names (defaults to all of TILE_PROFILES)
+        workers (int): Number of rendering threads
+
+        Returns:
+        int: Number of tiles rendered or already cached
+        """
+        activities = activities or list(self.risk_system.activity_types.keys())
+        profiles = profiles or list(TILE_PROFILES.keys())
+        if tuple(bounds) not in self.weather_regions:
+            self.weather_regions.append(tuple(bounds))
+        tiles = [tile for z in range(min_zoom, max_zoom + 1) for tile in tiles_for_bounds(bounds, z)]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.get_tile, activity_type, profile, *tile)
+                       for activity_type in activities for profile in profiles for tile in tiles]
+            for future in as_completed(futures):
+                future.result()
+
+        return len(futures)
+
+
+def serve_risk_tiles(renderer, host="127.0.0.1", port=8000):
+    """
+    Serve risk tiles at /tiles/<activity>/<profile>/<z>/<x>/<y>.png
+
+    Parameters:
+    renderer (RiskTileRenderer): Tile renderer
+    host (str): Address to listen on
+    port (int): Port to listen on
+    """
+    class TileHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.split('?')[0].strip('/').split('/')
+            try:
+                if len(parts) != 6 or parts[0] != 'tiles' or not parts[5].endswith('.png'):
+                    raise ValueError(f"Not a tile path: {self.path}")
+                z, x, y = int(parts[3]), int(parts[4]), int(parts[5][:-4])
+                data = renderer.get_tile(parts[1], parts[2], z, x, y)
+            except ValueError as e:
+                self.send_error(404, str(e))
+                return
+            except Exception as e:
+                # Elevation provider and raster errors
+                print(f"Error rendering tile {self.path}: {str(e)}")
+                self.send_error(502, f"Could not render tile: {str(e)}")
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Cache-Control', 'max-age=300')
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), TileHandler)
+    print(f"Serving risk tiles at http://{host}:{port}/tiles/<activity>/<profile>/<z>/<x>/<y>.png")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def assess_route_risk(risk_system, terrain_analyzer, route, activity_type, user_experience,
+                      group_size, weather_data, equipment_quality_level, weight_carried, age,
+                      height_weight_ratio, gender, segment_length=1000):
+    """
+    Calculate the risk profile of a route segment by segment
+    
+    Human, equipment and weight risks are the same for the whole route.
+    Terrain risk (with avalanche terrain weighting for the activity) and
+    weather risk (with wind and lightning exposure) vary per segment, and
+    each segment's total is scaled by the location modifier at its midpoint.
+    
+    Parameters:
+    risk_system (OutdoorRiskAssessment): Risk assessment system
+    terrain_analyzer (GISTerrainAnalyzer): Terrain analyzer
+    route (ndarray or str): (N, 2) (latitude, longitude) vertices, or a GPX/GeoJSON file path
+    activity_type (str): Type of outdoor activity
+    user_experience (str): Experience level
+    group_size (int): Number of people in group
+    weather_data (dict): Weather forecast data
+    equipment_quality_level (str): Quality of equipment
+    weight_carried (float): Weight carried in pounds
+    age (int): User age
+    height_weight_ratio (float): User height-weight ratio
+    gender (str): User gender
+    segment_length (float): Segment length in meters
+    
+    Returns:
+    dict: Per-segment risk profile, crux segment and route summary
+    """
+    if isinstance(route, str):
+        route = load_route(route)
+    
+    terrain = terrain_analyzer.analyze_route(route, segment_length)
+    if terrain is None:
+        return None
+    
+    # Route-wide components
+    human_risk, weight_risk = risk_system.calculate_human_risk(
+        user_experience, group_size, activity_type, weight_carried, age, height_weight_ratio, gender
+    )
+    equipment_risk = risk_system.assess_equipment_risk(equipment_quality_level, activity_type)
+    
+    # Per-segment terrain, weather and total risk
+    terrain_risk = risk_system.assess_terrain_difficulty_array(
+        terrain['elevation'], terrain['slope'], terrain['ruggedness'], activity_type,
+        avalanche_terrain_fraction=terrain['avalanche_terrain_fraction']
+    )
+    weather_risk = risk_system.calculate_weather_risk_array(
+        weather_data.get('temperature', 68), weather_data.get('precipitation', 0),
+        weather_data.get('wind_speed', 0), weather_data.get('thunderstorm_risk', 0),
+        risk_system.activity_types[activity_type]['weather_sensitivity'],
+        wind_exposure=terrain['wind_exposure'], lightning_exposure=terrain['lightning_exposure']
+    )
+    location_modifier = risk_system.get_location_modifiers(terrain['midpoint'][:, 0], terrain['midpoint'][:, 1])
+    total_risk = risk_system.combine_component_risks({
+        'terrain_risk': terrain_risk,
+        'weather_risk': weather_risk,
+        'human_risk': human_risk,
+        'equipment_risk': equipment_risk,
+        'weight_risk': weight_risk
+    }, None) * location_modifier
+    
+    segments = []
+    for i in range(len(total_risk)):
+        risk_category, risk_score = risk_system.categorize_risk(float(total_risk[i]))
+        segments.append({
+            'index': i,
+            'start_km': float(terrain['start'][i] / 1000),
+            'end_km': float(terrain['end'][i] / 1000),
+            'elevation': float(terrain['elevation'][i]),
+            'slope': float(terrain['slope'][i]),
+            'slope_max': float(terrain['slope_max'][i]),
+            'ruggedness': float(terrain['ruggedness'][i]),
+            'avalanche_terrain_fraction': float(terrain['avalanche_terrain_fraction'][i]),
+            'wind_exposure': float(terrain['wind_exposure'][i]),
+            'lightning_exposure': float(terrain['lightning_exposure'][i]),
+            'terrain_risk': float(terrain_risk[i]),
+            'weather_risk': float(weather_risk[i]),
+            'location_modifier': float(location_modifier[i]),
+            'risk_score': risk_score,
+            'risk_category': risk_category
+        })
+    
+    crux = int(np.argmax(total_risk))
+    
+    return {
+        'segments': segments,
+        'crux_segment': segments[crux],
+        'distance_km': terrain['distance'] / 1000,
+        'elevation_gain': terrain['elevation_gain'],
+        'component_risks': {
+            'human_risk': human_risk,
+            'equipment_risk': equipment_risk,
+            'weight_risk': weight_risk
         }
-        
-        return terrain_context
+    }
+
+
+def region_points(bounds, spacing=2000):
+    """
+    Generate a grid of query points covering a bounding box
+
+    Parameters:
+    bounds (tuple): (xmin, ymin, xmax, ymax) in degrees
+    spacing (float): Distance between points in meters
+
+    Returns:
+    list: (latitude, longitude) points, row by row from the south-west corner
+    """
+    xmin, ymin, xmax, ymax = bounds
+    m_per_deg = 111320
+    lat_step = spacing / m_per_deg
+    lon_step = spacing / (m_per_deg * np.cos(np.radians((ymin + ymax) / 2)))
+
+    lats = np.arange(ymin + lat_step / 2, ymax, lat_step)
+    lons = np.arange(xmin + lon_step / 2, xmax, lon_step)
+    return [(round(float(lat), 4), round(float(lon), 4)) for lat in lats for lon in lons]
+
+
+def _prefetch_terrain(terrain_analyzer, location, radius):
+    for layer in (terrain_analyzer.get_elevation_data, terrain_analyzer.get_avalanche_classes,
+                  terrain_analyzer.get_exposure_rasters):
+        if layer(location, radius) is None:
+            raise RuntimeError(f"{layer.__name__} failed for {location}")
+    sources = terrain_analyzer.get_access_points(location, radius)
+    if sources and terrain_analyzer.get_walkout_raster(location, radius, sources) is None:
+        raise RuntimeError(f"get_walkout_raster failed for {location}")
+
+
+def _prefetch_weather(forecast_service, cell):
+    if forecast_service.get_cell_forecast(cell) is None:
+        raise RuntimeError(f"No forecast for weather cell {cell}")
+
+
+def prefetch_region(points, terrain_analyzer=None, forecast_service=None, radius=1000,
+                    workers=4, state_path=None, progress=True):
+    """
+    Warm the DEM, derived terrain and weather caches for a set of locations
+
+    Terrain layers (DEM, avalanche classes, exposure, and walk-out time
+    to the trail layer's trailheads) are cached per location and weather
+    forecasts per weather cell, so each cell is fetched once however many
+    points fall in it. At most two tasks per
+    worker are in flight. Completed terrain tasks are appended to the
+    state file, so an interrupted run resumes where it stopped; weather
+    cells resume from the forecast disk cache until their refresh interval
+    has passed. Land cover and trails are derived on the fly and need no
+    warming.
+
+    Parameters:
+    points (list): (latitude, longitude) locations to warm
+    terrain_analyzer (GISTerrainAnalyzer): Terrain analyzer (a new one if None)
+    forecast_service (ForecastService): Forecast service (None skips weather)
+    radius (int): Terrain radius in meters
+    workers (int): Number of concurrent tasks
+    state_path (str): File recording completed terrain tasks (defaults to the DEM cache)
+    progress (bool): Whether to print progress to stderr
+
+    Returns:
+    dict: Coverage summary with task counts, per-layer coverage and failures
+    """
+    terrain_analyzer = terrain_analyzer or GISTerrainAnalyzer()
+    state_path = state_path or os.path.join(terrain_analyzer.dem_cache_dir, "prefetch_state.txt")
+
+    completed = set()
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            completed = set(line.strip() for line in f if line.strip())
+
+    terrain_keys = OrderedDict()
+    for lat, lon in points:
+        terrain_keys.setdefault(f"terrain:{lat:.4f},{lon:.4f},{radius}", (lat, lon))
+
+    tasks = [(key, _prefetch_terrain, terrain_analyzer, location, radius)
+             for key, location in terrain_keys.items() if key not in completed]
+    weather_cells = []
+    if forecast_service is not None:
+        weather_cells = sorted(set(weather_cell_key(point, forecast_service.cell_size) for point in points))
+        tasks += [(f"weather:{cell[0]},{cell[1]}", _prefetch_weather, forecast_service, cell)
+                  for cell in weather_cells]
+
+    summary = {
+        'tasks': len(terrain_keys) + len(weather_cells),
+        'resumed': len(terrain_keys) - sum(1 for task in tasks if task[0].startswith('terrain:')),
+        'completed': 0,
+        'failed': 0,
+        'failures': {}
+    }
+    done_keys = set(key for key in terrain_keys if key in completed)
+    start = time.time()
+
+    def report(key, future, state_file):
+        try:
+            future.result()
+        except Exception as e:
+            summary['failed'] += 1
+            summary['failures'][key] = str(e)
+        else:
+            summary['completed'] += 1
+            done_keys.add(key)
+            if key.startswith('terrain:'):
+                state_file.write(key + "\n")
+                state_file.flush()
+        if progress:
+            finished = summary['resumed'] + summary['completed'] + summary['failed']
+            print(f"Prefetched {finished}/{summary['tasks']} "
+                  f"({summary['failed']} failed, {time.time() - start:.0f}s)", file=sys.stderr)
+
+    with open(state_path, 'a') as state_file, ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for key, func, *task_args in tasks:
+            pending[executor.submit(func, *task_args)] = key
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report(pending.pop(future), future, state_file)
+        for future in as_completed(pending):
+            report(pending[future], future, state_file)
+
+    terrain_done = sum(1 for key in terrain_keys if key in done_keys)
+    weather_done = sum(1 for cell in weather_cells if f"weather:{cell[0]},{cell[1]}" in done_keys)
+    summary['coverage'] = {
+        'terrain': terrain_done / len(terrain_keys) if terrain_keys else 1.0,
+        'weather': weather_done / len(weather_cells) if weather_cells else None
+    }
+    return summary
+
+
+def benchmark_raster_storage(size=4096, window=512, overview_size=512, directory="benchmark_output"):
+    """
+    Compare plain striped GeoTIFF with the COG layout used for cached rasters
+
+    A smooth synthetic DEM of size x size cells is written in both layouts,
+    then read in full, through a window, and decimated to overview_size.
+
+    Parameters:
+    size (int): DEM rows and columns
+    window (int): Side of the windowed read in cells
+    overview_size (int): Largest side of the decimated read
+    directory (str): Directory for the benchmark files
+
+    Returns:
+    dict: Layout -> file size in MB and read times in milliseconds
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    y, x = np.mgrid[0:size, 0:size] / size
+    dem = (3000 + 800 * np.sin(6 * x) * np.cos(4 * y) + np.random.default_rng(0).normal(0, 1, (size, size))).astype(np.float32)
+    transform = rasterio.transform.from_bounds(-105.1, 38.8, -104.9, 39.0, size, size)
+
+    plain_path = os.path.join(directory, "dem_plain.tif")
+    with rasterio.open(plain_path, 'w', driver='GTiff', height=size, width=size, count=1,
+                       dtype='float32', crs=CRS.from_epsg(4326), transform=transform) as dst:
+        dst.write(dem, 1)
+    cog_path = os.path.join(directory, "dem_cog.tif")
+    write_raster(cog_path, dem, transform)
+
+    def timed(read, repeats=3):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            read()
+            best = min(best, time.perf_counter() - start)
+        return round(best * 1000, 2)
+
+    def read_full(path):
+        with rasterio.open(path) as src:
+            src.read(1)
+
+    def read_window(path):
+        with rasterio.open(path) as src:
+            src.read(1, window=rasterio.windows.Window(size // 2, size // 2, window, window))
+
+    results = {}
+    for layout, path in [('gtiff', plain_path), ('cog', cog_path)]:
+        results[layout] = {
+            'size_mb': round(os.path.getsize(path) / 1e6, 2),
+            'full_read_ms': timed(lambda: read_full(path)),
+            'window_read_ms': timed(lambda: read_window(path)),
+            'overview_read_ms': timed(lambda: read_raster_overview(path, overview_size))
+        }
+    return results
+
+
+def benchmark_slope_pipeline(size=4096, repeats=3):
+    """
+    Compare the float64 slope pipeline with the float32 in-place one
+
+    Parameters:
+    size (int): DEM rows and columns
+    repeats (int): Timed runs per pipeline (best is reported)
+
+    Returns:
+    dict: Pipeline -> best time in milliseconds and peak allocated memory in MB
+    """
+    import tracemalloc
+
+    analyzer = GISTerrainAnalyzer()
+    dem = SyntheticElevationProvider(size=size).fetch((-105.1, 38.8, -104.9, 39.0))[0]
+    transform = rasterio.transform.from_bounds(-105.1, 38.8, -104.9, 39.0, size, size)
+    cell_x, cell_y = analyzer.cell_size_meters(transform, size)
+
+    def float64_pipeline():
+        dem64 = dem.astype(np.float64)
+        dx = sobel(dem64, axis=1) / (8 * cell_x)
+        dy = sobel(dem64, axis=0) / (8 * cell_y)
+        return np.degrees(np.arctan(np.sqrt(dx**2 + dy**2)))
+
+    def float32_pipeline():
+        return analyzer.compute_slope(dem, transform, out=analyzer._work_buffer('slope', dem.shape),
+                                      work=analyzer._work_buffer('gradient', dem.shape))
+
+    results = {}
+    for name, pipeline in [('float64', float64_pipeline), ('float32', float32_pipeline)]:
+        pipeline()  # warm up (allocates the reusable buffers)
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pipeline()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        pipeline()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {'time_ms': round(best * 1000, 1), 'peak_mb': round(peak / 1e6, 1)}
+    return results
 
 
 def example_usage():
@@ -1033,12 +6071,7 @@ def real_time_assessment(api_key):
     risk_system = OutdoorRiskAssessment()
     
     # Example locations near Colorado Springs
-    locations = {
-        'Garden of the Gods': (38.8783, -104.8719),
-        'Pikes Peak': (38.8409, -105.0423),
-        'Cheyenne Mountain': (38.7447, -104.8506),
-        'Palmer Park': (38.8937, -104.7836)
-    }
+    locations = LOCATION_CATALOG
     
     print("Available locations:")
     for i, (name, _) in enumerate(locations.items(), 1):
@@ -1094,12 +6127,7 @@ def real_time_assessment(api_key):
     
     # Example terrain data in feet (would come from GIS)
     # In a full implementation, this would come from a GIS database
-    terrain_data = {
-        'Garden of the Gods': {'elevation': 6400, 'slope': 15, 'ruggedness': 0.7},
-        'Pikes Peak': {'elevation': 14115, 'slope': 30, 'ruggedness': 0.9},
-        'Cheyenne Mountain': {'elevation': 9200, 'slope': 25, 'ruggedness': 0.8},
-        'Palmer Park': {'elevation': 6250, 'slope': 10, 'ruggedness': 0.5}
-    }
+    terrain_data = LOCATION_TERRAIN
     
     # Fetch real-time weather data
     print("\nFetching real-time weather data...")
@@ -1107,12 +6135,7 @@ def real_time_assessment(api_key):
     
     if not weather_data:
         print("Failed to fetch weather data. Using default values.")
-        weather_data = {
-            'temperature': 68,     # Fahrenheit
-            'precipitation': 0,    # inches
-            'wind_speed': 6,       # mph
-            'thunderstorm_risk': 0 # probability 0-1
-        }
+        weather_data = dict(DEFAULT_WEATHER)
     
     # Calculate risk score
     risk_category, risk_score, component_scores = risk_system.calculate_risk_score(
@@ -1168,12 +6191,7 @@ def integrate_gis_terrain_analyzer():
     terrain_analyzer = GISTerrainAnalyzer()
     
     # Example locations near Colorado Springs
-    locations = {
-        'Garden of the Gods': (38.8783, -104.8719),
-        'Pikes Peak': (38.8409, -105.0423),
-        'Cheyenne Mountain': (38.7447, -104.8506),
-        'Palmer Park': (38.8937, -104.7836)
-    }
+    locations = LOCATION_CATALOG
     
     print("Available locations:")
     for i, (name, _) in enumerate(locations.items(), 1):
@@ -1235,14 +6253,18 @@ def integrate_gis_terrain_analyzer():
     terrain_metrics = {
         'elevation': terrain_data['elevation'],  # already in feet
         'slope': terrain_data['slope'],
-        'ruggedness': terrain_data['ruggedness']
+        'ruggedness': terrain_data['ruggedness'],
+        'wind_exposure': terrain_data['wind_exposure'],
+        'lightning_exposure': terrain_data['lightning_exposure'],
+        'avalanche_terrain_fraction': terrain_data['avalanche_terrain_fraction']
     }
+    if 'walkout_time' in terrain_data:
+        terrain_metrics['walkout_time'] = terrain_data['walkout_time']
     
     # Fetch real-time weather data
     print("\nFetching real-time weather data...")
     # Use the provided OpenWeatherMap API key
-    API_KEY = "4a83bd4fc2b689e8056e4bb5fe026641"
-    weather_data = fetch_weather_data(API_KEY, location)
+    weather_data = fetch_weather_data(OPENWEATHER_API_KEY, location)
     
     # Calculate risk score
     risk_category, risk_score, component_scores = risk_system.calculate_risk_score(
@@ -1314,8 +6336,10 @@ def integrate_gis_terrain_analyzer():
         print(f"  {i}. {rec}")
 
 
-# Main entry point
-if __name__ == "__main__":
+def interactive_menu():
+    """
+    Run the interactive assessment menu
+    """
     # Choose which function to run
     print("Choose an option:")
     print("1. Basic example")
@@ -1327,10 +6351,197 @@ if __name__ == "__main__":
     if choice == 1:
         example_usage()
     elif choice == 2:
-        # Use the provided OpenWeatherMap API key
-        API_KEY = "4a83bd4fc2b689e8056e4bb5fe026641"
-        real_time_assessment(API_KEY)
+        real_time_assessment(OPENWEATHER_API_KEY)
     elif choice == 3:
         integrate_gis_terrain_analyzer()
     else:
-        print("Invalid choice")
\ No newline at end of file
+        print("Invalid choice")
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Without a command the interactive menu is shown.
+
+    Parameters:
+    argv (list): Command line arguments (defaults to sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Outdoor Activity Risk Assessment System")
+    subparsers = parser.add_subparsers(dest='command')
+
+    batch_parser = subparsers.add_parser('batch', help="Assess requests from a CSV or JSON-lines file")
+    batch_parser.add_argument('input', nargs='?', default='-', help="Input file ('-' for stdin)")
+    batch_parser.add_argument('-o', '--output', default='-', help="Output JSON-lines file ('-' for stdout)")
+    batch_parser.add_argument('-f', '--format', choices=['csv', 'jsonl'], help="Input format (inferred from the extension)")
+    batch_parser.add_argument('-w', '--workers', type=int, help="Number of worker processes (defaults to the CPU count)")
+    batch_parser.add_argument('-c', '--chunksize', type=int, default=500, help="Requests sent to a worker at a time")
+    batch_parser.add_argument('--history', help="SQLite history database to record assessments in")
+
+    bundle_parser = subparsers.add_parser('bundle', help="Export the scoring bundle used by the web page")
+    bundle_parser.add_argument('-o', '--output', default=os.path.join("docs", "scoring_bundle.json"), help="Output JSON file")
+
+    forecast_parser = subparsers.add_parser('forecast', help="Write the multi-day forecast payload used by the web page")
+    forecast_parser.add_argument('-o', '--output', default=os.path.join("docs", "forecast.json"), help="Output JSON file")
+    forecast_parser.add_argument('--refresh-interval', type=int, default=3600, help="Seconds before a cell's forecast is refetched")
+
+    prefetch_parser = subparsers.add_parser('prefetch', help="Warm the terrain and weather caches for a region")
+    prefetch_parser.add_argument('--bbox', type=float, nargs=4, metavar=('XMIN', 'YMIN', 'XMAX', 'YMAX'),
+                                 help="Region to warm (defaults to the location catalog)")
+    prefetch_parser.add_argument('--spacing', type=float, default=2000, help="Distance between bbox points in meters")
+    prefetch_parser.add_argument('--radius', type=int, default=1000, help="Terrain radius in meters")
+    prefetch_parser.add_argument('-w', '--workers', type=int, default=4, help="Number of concurrent tasks")
+    prefetch_parser.add_argument('--state', help="Resume state file (defaults to dem_cache/prefetch_state.txt)")
+    prefetch_parser.add_argument('--no-weather', action='store_true', help="Skip warming the forecast cache")
+
+    calibrate_parser = subparsers.add_parser('calibrate', help="Fit component weights to labelled incident data")
+    calibrate_parser.add_argument('input', help="CSV or JSON-lines file of trips with an incident label")
+    calibrate_parser.add_argument('-f', '--format', choices=['csv', 'jsonl'], help="Input format (inferred from the extension)")
+    calibrate_parser.add_argument('-o', '--output-dir', default="calibration", help="Directory for versioned config files")
+    calibrate_parser.add_argument('--label', default='incident', help="Column holding the 0/1 incident label")
+    calibrate_parser.add_argument('--regularization', type=float, default=0.01, help="L2 pull towards the current configuration")
+
+    history_parser = subparsers.add_parser('history', help="Query the assessment history database")
+    history_parser.add_argument('--db', default="assessment_history.db", help="SQLite history database")
+    history_parser.add_argument('--location', help="Catalog location to show the daily risk trend for")
+    history_parser.add_argument('--user', help="User to list recent assessments for")
+    history_parser.add_argument('--days', type=int, default=30, help="Days of history to include")
+
+    watch_parser = subparsers.add_parser('watch', help="Watch planned trips and report risk category changes")
+    watch_parser.add_argument('input', help="CSV or JSON-lines file of trips (batch columns plus 'date' and optional 'watch_id')")
+    watch_parser.add_argument('-f', '--format', choices=['csv', 'jsonl'], help="Input format (inferred from the extension)")
+    watch_parser.add_argument('--interval', type=float, help="Seconds between refreshes (defaults to the forecast refresh interval)")
+    watch_parser.add_argument('--once', action='store_true', help="Refresh once, print the current risks and exit")
+
+    tiles_parser = subparsers.add_parser('tiles', help="Pre-render risk heatmap tiles and optionally serve them")
+    tiles_parser.add_argument('--bbox', type=float, nargs=4, metavar=('XMIN', 'YMIN', 'XMAX', 'YMAX'),
+                              help="Region to pre-render (defaults to the web page locations)")
+    tiles_parser.add_argument('--max-zoom', type=int, default=8, help="Highest zoom level to pre-render")
+    tiles_parser.add_argument('--activity', action='append', help="Activity to render (repeatable; defaults to all)")
+    tiles_parser.add_argument('--profile', action='append', choices=list(TILE_PROFILES.keys()),
+                              help="Profile to render (repeatable; defaults to all)")
+    tiles_parser.add_argument('-o', '--output-dir', default="tile_cache", help="Tile cache directory")
+    tiles_parser.add_argument('-w', '--workers', type=int, default=4, help="Number of rendering threads")
+    tiles_parser.add_argument('--no-weather', action='store_true', help="Render with default weather")
+    tiles_parser.add_argument('--serve', type=int, metavar='PORT', help="Serve tiles on this port after pre-rendering")
+
+    subparsers.add_parser('benchmark', help="Benchmark raster storage and terrain computations")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'batch':
+        history = AssessmentHistory(args.history) if args.history else None
+        counts = run_batch_assessment(args.input, args.output, args.format, args.workers, args.chunksize, history)
+        if history is not None:
+            history.close()
+        print(f"Processed {counts['processed']} requests ({counts['failed']} failed)", file=sys.stderr)
+    elif args.command == 'bundle':
+        size = export_scoring_bundle(args.output)
+        print(f"Wrote scoring bundle to {args.output} ({size / 1024:.1f} KB)")
+    elif args.command == 'forecast':
+        service = ForecastService(refresh_interval=args.refresh_interval)
+        payload = service.write_payload(args.output)
+        print(f"Wrote forecasts for {len(payload['locations'])} locations in {len(payload['cells'])} cells "
+              f"to {args.output} ({service.stats['fetches']} API calls)")
+    elif args.command == 'prefetch':
+        if args.bbox:
+            points = region_points(args.bbox, args.spacing)
+        else:
+            points = list(dict.fromkeys(list(LOCATION_CATALOG.values()) + list(WEB_LOCATIONS.values())))
+        summary = prefetch_region(
+            points,
+            forecast_service=None if args.no_weather else ForecastService(),
+            radius=args.radius,
+            workers=args.workers,
+            state_path=args.state
+        )
+        weather = summary['coverage']['weather']
+        print(f"Prefetched {summary['completed']} tasks ({summary['resumed']} already cached, "
+              f"{summary['failed']} failed); terrain coverage {summary['coverage']['terrain']:.0%}"
+              + (f", weather coverage {weather:.0%}" if weather is not None else ""))
+        for key, error in summary['failures'].items():
+            print(f"  {key}: {error}")
+    elif args.command == 'calibrate':
+        config, path = calibrate_risk_model(args.input, input_format=args.format, label_field=args.label,
+                                            regularization=args.regularization, output_dir=args.output_dir)
+        print(f"Calibrated on {config['trips']} trips (loss {config['loss']['initial']:.4f} -> "
+              f"{config['loss']['final']:.4f}); wrote version {config['version']} to {path}")
+        for name, weight in config['component_weights'].items():
+            print(f"  {name}: {weight}")
+    elif args.command == 'history':
+        history = AssessmentHistory(args.db)
+        since = time.time() - args.days * 86400
+        if args.location:
+            try:
+                trend = history.risk_trend(args.location, args.days)
+            except ValueError as e:
+                history.close()
+                parser.error(str(e))
+            for day in trend:
+                print(f"{day['day']}  {day['count']:6d} assessments  mean {day['mean_score']:.2f}  "
+                      + "  ".join(f"{category}={count}" for category, count in day['categories'].items()))
+        elif args.user:
+            for assessment in history.user_history(args.user, since):
+                print(f"{datetime.fromtimestamp(assessment['assessed_at']):%Y-%m-%d %H:%M}  "
+                      f"{assessment['location_name'] or ''}  {assessment['activity_type']}  "
+                      f"{assessment['risk_category']} ({assessment['risk_score']:.1f})")
+        else:
+            print(history.category_counts(since))
+        history.close()
+    elif args.command == 'watch':
+        watcher = TripWatchScheduler(interval=args.interval,
+                                     on_event=lambda event: print(json.dumps(event), flush=True))
+        failed = 0
+        for i, request in enumerate(read_assessment_requests(args.input, args.format)):
+            # Invalid rows are reported like failed batch requests and skipped
+            try:
+                location, params, _, terrain_data = parse_assessment_request(request)
+                profile = {field: value for field, value in params.items() if field != 'activity_type'}
+                watcher.add_watch(request.get('watch_id') or str(i), location, request.get('date'),
+                                  params['activity_type'], profile, terrain_data)
+            except Exception as e:
+                failed += 1
+                print(json.dumps({'index': i, 'error': f"{type(e).__name__}: {e}"}), file=sys.stderr)
+        print(f"Watching {watcher.watch_count()} trips in {watcher.cell_count()} weather cells"
+              + (f" ({failed} invalid rows skipped)" if failed else ""), file=sys.stderr)
+        asyncio.run(watcher.run(once=args.once))
+        if args.once:
+            for watch_id in watcher.watch_ids():
+                result = watcher.get_watch(watch_id)
+                print(json.dumps({'watch_id': watch_id, 'risk_category': result[0] if result else None,
+                                  'risk_score': result[1] if result else None}))
+    elif args.command == 'tiles':
+        if args.bbox:
+            bounds = args.bbox
+        else:
+            lats, lons = zip(*WEB_LOCATIONS.values())
+            bounds = (min(lons), min(lats), max(lons), max(lats))
+        scheduler = None if args.no_weather else WeatherFetchScheduler()
+        renderer = RiskTileRenderer(weather=scheduler, cache_dir=args.output_dir)
+        # Refresh weather in the background while pre-rendering and serving
+        if scheduler is not None:
+            scheduler.start()
+        try:
+            count = renderer.prerender(bounds, args.max_zoom, activities=args.activity, profiles=args.profile,
+                                       workers=args.workers)
+            print(f"Pre-rendered {count} tiles to {args.output_dir} "
+                  f"({renderer.stats['renders']} rendered, {renderer.stats['hits']} already cached)")
+            if args.serve:
+                serve_risk_tiles(renderer, port=args.serve)
+        finally:
+            if scheduler is not None:
+                scheduler.stop()
+    elif args.command == 'benchmark':
+        print("Raster storage:")
+        for layout, timings in benchmark_raster_storage().items():
+            print(f"  {layout:8} " + "  ".join(f"{name}={value}" for name, value in timings.items()))
+        print("Slope pipeline:")
+        for pipeline, timings in benchmark_slope_pipeline().items():
+            print(f"  {pipeline:8} " + "  ".join(f"{name}={value}" for name, value in timings.items()))
+    else:
+        interactive_menu()
+
+
+# Main entry point
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+// Drive docs/script.js processFormData() in node with a minimal DOM stub.
+// Usage: node page_parity.js <scoring_bundle.json> <forecast.json or -> < forms.json
+// Prints, for each form, the weather, terrain and risk the page computed.
+const fs = require('fs');
+const path = require('path');
+
+const [bundlePath, forecastPath] = process.argv.slice(2);
+const forms = JSON.parse(fs.readFileSync(0, 'utf8'));
+
+function makeElement() {
+    return {
+        value: '', checked: false, textContent: '', innerHTML: '', className: '',
+        style: {}, options: [], selectedIndex: 0,
+        appendChild() {}, addEventListener() {}, scrollIntoView() {}
+    };
+}
+
+const elements = {};
+global.document = {
+    getElementById: id => (elements[id] = elements[id] || makeElement()),
+    createElement: makeElement,
+    addEventListener() {}
+};
+global.alert = message => { throw new Error(message); };
+global.fetch = url => Promise.resolve({
+    json: () => {
+        if (url === 'scoring_bundle.json') {
+            return JSON.parse(fs.readFileSync(bundlePath, 'utf8'));
+        }
+        if (forecastPath && forecastPath !== '-') {
+            return JSON.parse(fs.readFileSync(forecastPath, 'utf8'));
+        }
+        throw new Error('no forecast');
+    }
+});
+// The page reports failed bundle parity checks through console.warn
+const warn = console.warn;
+console.warn = (...args) => {
+    if (String(args[0]).startsWith('Scoring bundle parity check failed')) {
+        throw new Error(JSON.stringify(args));
+    }
+    warn(...args);
+};
+
+const script = fs.readFileSync(path.join(__dirname, '..', 'docs', 'script.js'), 'utf8');
+(0, eval)(script);
+
+// Record what processFormData hands to the UI, then render as usual
+const results = [];
+const render = updateRiskAssessment;
+updateRiskAssessment = function (riskFactors, location, activityType, weatherData, terrainData) {
+    results.push({riskFactors, location, activityType, weatherData, terrainData});
+    return render.apply(this, arguments);
+};
+
+Promise.all([loadScoringBundle(), loadForecast()]).then(() => {
+    const output = forms.map(form => {
+        for (const [id, value] of Object.entries(form)) {
+            if (id === 'location') {
+                const select = document.getElementById('location');
+                select.value = value.id;
+                select.options = [{value: value.id, text: value.name}];
+                select.selectedIndex = 0;
+            } else if (typeof value === 'boolean') {
+                document.getElementById(id).checked = value;
+            } else {
+                document.getElementById(id).value = String(value);
+            }
+        }
+        document.getElementById('forecast-container').textContent = '';
+        processFormData();
+        const result = results.pop();
+        return {
+            location: result.location,
+            weather: result.weatherData,
+            terrain: result.terrainData,
+            risk_score: result.riskFactors.overallRisk,
+            risk_category: result.riskFactors.riskCategory,
+            forecast_shown: !document.getElementById('forecast-container').textContent.startsWith('Forecast currently unavailable')
+        };
+    });
+    process.stdout.write(JSON.stringify(output));
+});
@@ -0,0 +1,76 @@
+import csv
+import json
+
+import pytest
+
+import outdoor_risk_assessment as ora
+
+REQUESTS = [
+    {'id': 'a', 'user_id': 'ana', 'location_name': 'Pikes Peak', 'activity_type': 'hiking',
+     'user_experience': 'beginner', 'group_size': 1, 'equipment_quality_level': 'basic', 'weight_carried': 35,
+     'age': 62, 'height_weight_ratio': 2.0, 'gender': 'female', 'wind_speed': 30},
+    {'id': 'b', 'latitude': 38.8783, 'longitude': -104.8719, 'activity_type': 'rock_climbing',
+     'user_experience': 'expert', 'group_size': 2, 'equipment_quality_level': 'excellent', 'weight_carried': 20,
+     'age': 30, 'height_weight_ratio': 2.5, 'gender': 'male'},
+    {'id': 'c', 'location_name': 'Atlantis', 'activity_type': 'hiking'},
+]
+
+
+def write_csv(path, requests):
+    fields = sorted({field for request in requests for field in request})
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fields)
+        writer.writeheader()
+        writer.writerows(requests)
+
+
+def read_results(path):
+    with open(path) as f:
+        return sorted((json.loads(line) for line in f), key=lambda record: record['index'])
+
+
+def expected_report(request):
+    risk_system = ora.OutdoorRiskAssessment()
+    location, params, weather_data, terrain_data = ora.parse_assessment_request(request)
+    risk_category, risk_score, _ = risk_system.calculate_risk_score(
+        location, params['activity_type'], params['user_experience'], params['group_size'], weather_data,
+        params['equipment_quality_level'], terrain_data, params['weight_carried'], params['age'],
+        params['height_weight_ratio'], params['gender'])
+    return risk_category, risk_score
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch_scores_match_single_assessments(tmp_path, workers):
+    source = tmp_path / "requests.csv"
+    write_csv(source, REQUESTS)
+    output = tmp_path / "results.jsonl"
+
+    counts = ora.run_batch_assessment(str(source), str(output), workers=workers, chunksize=1)
+    assert counts == {'processed': 3, 'failed': 1}
+
+    results = read_results(output)
+    assert [record['id'] for record in results] == ['a', 'b', 'c']
+    for record, request in zip(results[:2], REQUESTS):
+        risk_category, risk_score = expected_report(request)
+        assert record['report']['risk_category'] == risk_category
+        assert record['report']['risk_score'] == pytest.approx(risk_score)
+    assert results[0]['report']['location_name'] == 'Pikes Peak'
+    assert results[1]['report']['coordinates'] == [38.8783, -104.8719]
+    # A bad row is reported in place and does not stop the batch
+    assert results[2]['error'].startswith('KeyError')
+
+
+def test_batch_cli_reads_jsonl_and_records_history(tmp_path, capsys):
+    source = tmp_path / "requests.jsonl"
+    source.write_text("\n".join(json.dumps(request) for request in REQUESTS) + "\n")
+    output = tmp_path / "results.jsonl"
+    db = tmp_path / "history.db"
+
+    ora.main(['batch', str(source), '-o', str(output), '-w', '1', '--history', str(db)])
+    assert "Processed 3 requests (1 failed)" in capsys.readouterr().err
+    assert len(read_results(output)) == 3
+
+    history = ora.AssessmentHistory(str(db))
+    assert [entry['activity_type'] for entry in history.user_history('ana')] == ['hiking']
+    assert sum(history.category_counts().values()) == 2
+    history.close()
@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+import pytest
+
+import outdoor_risk_assessment as ora
+
+
+def labelled_requests(count=300, seed=7):
+    rng = np.random.default_rng(seed)
+    risk_system = ora.OutdoorRiskAssessment()
+    names = list(ora.LOCATION_CATALOG)
+    activities = list(risk_system.activity_types)
+    requests = []
+    for _ in range(count):
+        request = dict(ora.TILE_PROFILES[rng.choice(list(ora.TILE_PROFILES))],
+                       location_name=str(rng.choice(names)), activity_type=str(rng.choice(activities)),
+                       temperature=float(rng.uniform(10, 100)), precipitation=float(rng.uniform(0, 1.2)),
+                       wind_speed=float(rng.uniform(0, 40)), thunderstorm_risk=float(rng.uniform(0, 1)))
+        _, score, _ = risk_system.calculate_risk_score(*request_inputs(risk_system, request))
+        request['incident'] = int(rng.random() < 1 / (1 + np.exp(-(2 * score - 8))))
+        requests.append(request)
+    return requests
+
+
+def request_inputs(risk_system, request):
+    location, params, weather_data, terrain_data = ora.parse_assessment_request(request)
+    return (location, params['activity_type'], params['user_experience'], params['group_size'], weather_data,
+            params['equipment_quality_level'], terrain_data, params['weight_carried'], params['age'],
+            params['height_weight_ratio'], params['gender'])
+
+
+def prior_params(risk_system, features):
+    prior = {
+        'weights': np.array([risk_system.component_weights[name] for name in ora.CALIBRATION_COMPONENTS]),
+        'sensitivities': np.array([risk_system.activity_types[a]['weather_sensitivity'] for a in features['activities']])
+    }
+    return prior, np.concatenate([np.log(prior['weights']), prior['sensitivities'], [1.0, -5.0]])
+
+
+def test_features_reproduce_risk_scores():
+    risk_system = ora.OutdoorRiskAssessment()
+    requests = labelled_requests(60)
+    features = ora.build_calibration_features(risk_system, requests)
+
+    weights = np.array([risk_system.component_weights[name] for name in ora.CALIBRATION_COMPONENTS])
+    sensitivities = np.array([risk_system.activity_types[a]['weather_sensitivity'] for a in features['activities']])
+    components = features['components'].copy()
+    components[:, 1] *= sensitivities[features['activity']]
+    expected = [risk_system.calculate_risk_score(*request_inputs(risk_system, request))[1] for request in requests]
+    assert features['modifier'] * (components @ weights) == pytest.approx(expected)
+
+
+def test_loss_gradient_matches_finite_differences():
+    risk_system = ora.OutdoorRiskAssessment()
+    features = ora.build_calibration_features(risk_system, labelled_requests(80))
+    prior, params = prior_params(risk_system, features)
+    params = params + np.random.default_rng(1).normal(0, 0.2, len(params))
+
+    _, gradient = ora.calibration_loss(params, features, prior, 0.05)
+    step = 1e-6
+    numerical = np.array([
+        (ora.calibration_loss(params + step * unit, features, prior, 0.05)[0] -
+         ora.calibration_loss(params - step * unit, features, prior, 0.05)[0]) / (2 * step)
+        for unit in np.eye(len(params))
+    ])
+    assert gradient == pytest.approx(numerical, rel=1e-4, abs=1e-7)
+
+
+def test_calibrated_link_maps_scores_to_probabilities(tmp_path):
+    source = tmp_path / "incidents.jsonl"
+    source.write_text("".join(json.dumps(request) + "\n" for request in labelled_requests()))
+
+    config, path = ora.calibrate_risk_model(str(source), output_dir=str(tmp_path / "calibration"))
+    assert config['loss']['final'] <= config['loss']['initial']
+    assert path.endswith("risk_config_v1.json")
+
+    risk_system = ora.OutdoorRiskAssessment()
+    assert risk_system.incident_probability(5.0) is None
+    ora.apply_calibration(risk_system, path)
+    link = config['incident_link']
+    assert risk_system.incident_probability(5.0) == pytest.approx(1 / (1 + np.exp(-(link['scale'] * 5 + link['offset']))))
+    assert np.all(np.diff(risk_system.incident_probability(np.array([2.0, 5.0, 8.0]))) > 0)
+
+    report = ora.assess_request(risk_system, labelled_requests(1)[0])
+    assert report['incident_probability'] == pytest.approx(risk_system.incident_probability(report['risk_score']), abs=1e-4)
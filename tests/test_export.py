@@ -0,0 +1,90 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import outdoor_risk_assessment as ora
+
+
+def catalog_records():
+    profiles = [dict(ora.TILE_PROFILES[name], profile_id=name) for name in ('beginner', 'expert')]
+    return list(ora.iter_catalog_assessments(ora.OutdoorRiskAssessment(), profiles))
+
+
+def expected_schema():
+    return pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in ora.ASSESSMENT_EXPORT_FIELDS])
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow', '.csv'])
+def test_export_round_trips(tmp_path, extension):
+    records = catalog_records()
+    path = str(tmp_path / f"assessments{extension}")
+
+    summary = ora.export_assessments(iter(records), path, row_group_size=7)
+    assert summary['rows'] == len(records)
+    assert summary['row_groups'] == -(-len(records) // 7)
+
+    if extension == '.parquet':
+        table = pq.read_table(path)
+        assert pq.ParquetFile(path).num_row_groups == summary['row_groups']
+    elif extension == '.arrow':
+        with pa.ipc.open_file(path) as reader:
+            table = reader.read_all()
+    if extension == '.csv':
+        frame = pd.read_csv(path, dtype={'profile_id': str})
+        pd.testing.assert_frame_equal(frame, pd.DataFrame.from_records(records))
+    else:
+        assert table.schema == expected_schema()
+        assert table.to_pylist() == records
+
+    # Per-location histograms match the records
+    pikes = [record for record in records if record['location_name'] == 'Pikes Peak']
+    stats = summary['locations']['Pikes Peak']
+    assert stats['count'] == len(pikes)
+    assert stats['categories'] == {category: sum(record['risk_category'] == category for record in pikes)
+                                   for category in ('low', 'moderate', 'high', 'extreme')}
+
+
+def test_empty_first_row_group_keeps_column_types(tmp_path):
+    records = catalog_records()[:6]
+    for record in records[:3]:
+        record['profile_id'] = None
+        record['weather_risk'] = None
+    path = str(tmp_path / "assessments.parquet")
+
+    ora.export_assessments(records, path, row_group_size=3)
+    table = pq.read_table(path)
+    assert table.schema == expected_schema()
+    assert table.column('profile_id').to_pylist() == [None] * 3 + [record['profile_id'] for record in records[3:]]
+
+
+def test_failed_flush_keeps_buffered_records(tmp_path):
+    records = catalog_records()[:5]
+    path = tmp_path / "missing" / "assessments.csv"
+    writer = ora.AssessmentExportWriter(str(path), row_group_size=100)
+    for record in records:
+        writer.write(record)
+
+    with pytest.raises(OSError):
+        writer.flush()
+    path.parent.mkdir()
+    writer.close()
+    assert len(pd.read_csv(path)) == len(records)
+    assert writer.summary()['rows'] == len(records)
+
+
+def test_records_need_a_known_risk_category(tmp_path):
+    record = catalog_records()[0]
+    writer = ora.AssessmentExportWriter(str(tmp_path / "out.csv"))
+    with pytest.raises(ValueError):
+        writer.write(dict(record, risk_category=None))
+    with pytest.raises(ValueError):
+        writer.write({key: value for key, value in record.items() if key != 'risk_category'})
+    with pytest.raises(ValueError):
+        writer.write(dict(record, unexpected=1))
+    assert writer.summary()['rows'] == 0
+
+    # Categories follow the configured names
+    custom = ora.AssessmentExportWriter(str(tmp_path / "custom.csv"), categories=['safe', 'unsafe'])
+    custom.write(dict(record, risk_category='unsafe'))
+    assert custom.summary()['locations'][record['location_name']]['categories'] == {'safe': 0, 'unsafe': 1}
@@ -0,0 +1,59 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import outdoor_risk_assessment as ora
+
+PIKES = ora.LOCATION_CATALOG['Pikes Peak']
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def denver_time(monkeypatch):
+    # Local time far from UTC, so local and UTC days differ in the evening
+    monkeypatch.setenv('TZ', 'America/Denver')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_rollups_by_utc_day(tmp_path, denver_time):
+    history = ora.AssessmentHistory(str(tmp_path / "history.db"), batch_size=2)
+    # 20:00 and 23:00 in Denver on Oct 10 are already Oct 11 in UTC
+    history.add(PIKES, 'high', 7.0, 'hiking', 'ana', assessed_at=utc(2026, 10, 10, 12))
+    history.add(PIKES, 'moderate', 4.0, 'hiking', 'ana', assessed_at=utc(2026, 10, 11, 2))
+    history.add(PIKES, 'extreme', 9.0, 'hiking', 'ben', assessed_at=utc(2026, 10, 11, 5))
+
+    trend = history.risk_trend('Pikes Peak', days=5, now=utc(2026, 10, 12))
+    assert [(day['day'], day['count']) for day in trend] == [('2026-10-10', 1), ('2026-10-11', 2)]
+    assert trend[1]['mean_score'] == pytest.approx(6.5)
+    assert (trend[1]['min_score'], trend[1]['max_score']) == (4.0, 9.0)
+    assert trend[1]['categories'] == {'low': 0, 'moderate': 1, 'high': 0, 'extreme': 1}
+    history.close()
+
+
+def test_queries_and_validation(tmp_path):
+    history = ora.AssessmentHistory(str(tmp_path / "history.db"))
+    for i, category in enumerate(['low', 'low', 'high']):
+        history.add(PIKES, category, 2.0 + 2 * i, 'hiking', 'ana', 'Pikes Peak', assessed_at=1000 + i)
+
+    assert history.category_counts() == {'low': 2, 'moderate': 0, 'high': 1, 'extreme': 0}
+    assert [entry['assessed_at'] for entry in history.user_history('ana', limit=2)] == [1002, 1001]
+    with pytest.raises(ValueError):
+        history.add(PIKES, 'unknown', 1.0)
+    with pytest.raises(ValueError):
+        history.risk_trend('Atlantis')
+    history.close()
+
+    # Category names come from the configuration
+    custom = ora.AssessmentHistory(str(tmp_path / "custom.db"), categories=['safe', 'unsafe'])
+    custom.add(PIKES, 'unsafe', 9.0)
+    assert custom.category_counts() == {'safe': 0, 'unsafe': 1}
+    custom.close()
+    with pytest.raises(ValueError):
+        ora.AssessmentHistory(str(tmp_path / "bad.db"), categories=['very high'])
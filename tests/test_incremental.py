@@ -0,0 +1,62 @@
+import pytest
+
+import outdoor_risk_assessment as ora
+
+PROFILE = ('intermediate', 2, 'good')
+BODY = (35, 2.2, 'female')
+TERRAIN = {'elevation': 9000, 'slope': 20, 'ruggedness': 0.6, 'wind_exposure': 1.2, 'lightning_exposure': 1.1}
+STORM = {'temperature': 45, 'precipitation': 0.4, 'wind_speed': 35, 'thunderstorm_risk': 0.7}
+
+
+def add(engine, assessment_id, location, activity_type='hiking'):
+    experience, group_size, equipment = PROFILE
+    engine.add_assessment(assessment_id, location, activity_type, experience, group_size, equipment,
+                          TERRAIN, 25, *BODY)
+
+
+def full_score(risk_system, location, weather, activity_type='hiking'):
+    experience, group_size, equipment = PROFILE
+    return risk_system.calculate_risk_score(location, activity_type, experience, group_size, weather,
+                                            equipment, TERRAIN, 25, *BODY)
+
+
+def test_only_the_updated_cell_is_rescored():
+    risk_system = ora.OutdoorRiskAssessment()
+    engine = ora.IncrementalRiskEngine(risk_system)
+    pikes, palmer = ora.LOCATION_CATALOG['Pikes Peak'], ora.LOCATION_CATALOG['Palmer Park']
+    add(engine, 'summit', pikes)
+    add(engine, 'summit-ski', pikes, 'backcountry_skiing')
+    add(engine, 'park', palmer)
+    assert engine.cell_for(pikes) != engine.cell_for(palmer)
+
+    # New assessments are scored with default weather
+    first = engine.rescore()
+    assert set(first) == {'summit', 'summit-ski', 'park'}
+    category, score, components = first['park']
+    expected = full_score(risk_system, palmer, ora.DEFAULT_WEATHER)
+    assert (category, score) == expected[:2]
+    assert components == pytest.approx(expected[2])
+    assert engine.dirty_count() == 0
+
+    # A forecast for one cell only rescores the assessments in it
+    assert engine.update_weather(engine.cell_for(pikes), STORM) == 2
+    updated = engine.rescore()
+    assert set(updated) == {'summit', 'summit-ski'}
+    for assessment_id, activity_type in (('summit', 'hiking'), ('summit-ski', 'backcountry_skiing')):
+        category, score, components = updated[assessment_id]
+        expected = full_score(risk_system, pikes, STORM, activity_type)
+        assert (category, score) == expected[:2]
+        assert components == pytest.approx(expected[2])
+    assert engine.get_result('park') == first['park']
+
+
+def test_removed_assessments_are_not_rescored():
+    engine = ora.IncrementalRiskEngine()
+    location = ora.LOCATION_CATALOG['Pikes Peak']
+    add(engine, 'summit', location)
+    engine.remove_assessment('summit')
+    engine.remove_assessment('missing')
+
+    assert engine.dirty_count() == 0
+    assert engine.update_weather(engine.cell_for(location), STORM) == 0
+    assert engine.rescore() == {}
@@ -0,0 +1,124 @@
+import itertools
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import outdoor_risk_assessment as ora
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRIVER = os.path.join(ROOT, 'tests', 'page_parity.js')
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+
+
+def page_locations():
+    # (option value, option text) pairs of the page's location <select>
+    with open(os.path.join(ROOT, 'docs', 'index.html')) as f:
+        html = f.read()
+    select = re.search(r'<select id="location".*?</select>', html, re.S).group(0)
+    return re.findall(r'<option value="([^"]+)"[^>]*>([^<]+)</option>', select)
+
+
+def run_page(forms, bundle_path, forecast_path='-'):
+    completed = subprocess.run(
+        ['node', DRIVER, str(bundle_path), str(forecast_path)],
+        input=json.dumps(forms), capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout)
+
+
+def make_form(location_id, location_name, activity, experience, equipment, group_size, use_real_weather=False):
+    return {
+        'age': 42, 'gender': 'female', 'height': 66, 'weight': 150, 'weight-carried': 18,
+        'location': {'id': location_id, 'name': location_name}, 'search-radius': 1.0,
+        'activity-type': activity, 'experience-level': experience, 'group-size': group_size,
+        'equipment-quality': equipment, 'use-real-weather': use_real_weather
+    }
+
+
+def expected_score(risk_system, form, page_result):
+    name = form['location']['name']
+    weather = page_result['weather']
+    risk_category, risk_score, _ = risk_system.calculate_risk_score(
+        ora.WEB_LOCATIONS[name], form['activity-type'].replace('-', '_'), form['experience-level'],
+        form['group-size'],
+        {'temperature': weather['temperature'], 'precipitation': weather['precipitation'],
+         'wind_speed': weather['windSpeed'], 'thunderstorm_risk': weather['thunderstormRisk'] / 10},
+        form['equipment-quality'], ora.web_location_terrain(name), form['weight-carried'], form['age'],
+        (form['weight'] / (form['height'] * form['height'])) * 703, form['gender']
+    )
+    return risk_category, risk_score
+
+
+def test_bundle_covers_page_locations():
+    bundle = ora.build_scoring_bundle()
+    for location_id, location_name in page_locations():
+        assert bundle['locations'][location_id]['name'] == location_name
+        assert location_id in bundle['config']['location_modifiers']
+
+
+def test_process_form_data_matches_python(tmp_path):
+    risk_system = ora.OutdoorRiskAssessment()
+    bundle_path = tmp_path / 'scoring_bundle.json'
+    with open(bundle_path, 'w') as f:
+        json.dump(ora.build_scoring_bundle(risk_system), f)
+
+    forms = [
+        make_form(location_id, location_name, activity, experience, equipment, group_size)
+        for (location_id, location_name), activity, (experience, equipment, group_size) in itertools.product(
+            page_locations(),
+            ['hiking', 'rock-climbing', 'mountain-biking', 'backcountry-skiing', 'kayaking', 'trail-running'],
+            [('beginner', 'poor', 1), ('intermediate', 'good', 3), ('expert', 'excellent', 9)]
+        )
+    ]
+    results = run_page(forms, bundle_path)
+
+    assert len(results) == len(forms)
+    for form, result in zip(forms, results):
+        assert result['location'] == form['location']['name']
+        # Catalog terrain from the bundle replaces the page's simulated values
+        terrain = ora.web_location_terrain(form['location']['name'])
+        assert {key: result['terrain'][key] for key in terrain} == terrain
+        # Expected scores include the polygon modifiers (the Manitou Incline corridor)
+        assert (result['risk_category'], result['risk_score']) == expected_score(risk_system, form, result)
+
+
+def test_page_uses_forecast_payload(tmp_path):
+    risk_system = ora.OutdoorRiskAssessment()
+    bundle_path = tmp_path / 'scoring_bundle.json'
+    with open(bundle_path, 'w') as f:
+        json.dump(ora.build_scoring_bundle(risk_system), f)
+
+    # Distinct weather per cell from a local fake of the OpenWeather daily forecast
+    def fetch(location, days):
+        data = {'daily': [{
+            'dt': 1790000000 + 86400 * day,
+            'temp': {'day': 5 + location[0] - 38, 'min': 0, 'max': 10},
+            'wind_speed': 4 + day + abs(location[1]) % 1,
+            'rain': 3.0,
+            'weather': [{'id': 211}]
+        } for day in range(days)]}
+        return ora.parse_daily_forecast(data, days)
+
+    service = ora.ForecastService(risk_system=risk_system, cache_dir=None, fetch=fetch)
+    forecast_path = tmp_path / 'forecast.json'
+    payload = service.write_payload(str(forecast_path))
+
+    forms = [make_form(location_id, location_name, 'hiking', 'intermediate', 'good', 2, use_real_weather=True)
+             for location_id, location_name in page_locations()]
+    results = run_page(forms, bundle_path, forecast_path)
+
+    for form, result in zip(forms, results):
+        cell = payload['cells'][payload['locations'][form['location']['id']]]
+        weather = cell['days'][0]['weather']
+        assert result['forecast_shown']
+        # Math.round rounds halves up
+        assert result['weather']['temperature'] == math.floor(weather['temperature'] + 0.5)
+        assert result['weather']['precipitation'] == weather['precipitation']
+        assert result['weather']['thunderstormRisk'] == weather['thunderstorm_risk'] * 10
+        assert (result['risk_category'], result['risk_score']) == expected_score(risk_system, form, result)
@@ -0,0 +1,45 @@
+import os
+
+import outdoor_risk_assessment as ora
+
+
+def fake_forecast(location, days):
+    data = {'daily': [{'dt': 1790000000 + 86400 * day, 'temp': {'day': 10, 'min': 5, 'max': 15},
+                       'wind_speed': 4, 'weather': [{'id': 800}]} for day in range(days)]}
+    return ora.parse_daily_forecast(data, days)
+
+
+def test_prefetch_warms_layers_and_resumes(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path / "dem"))
+    service = ora.ForecastService(risk_system=ora.OutdoorRiskAssessment(),
+                                  cache_dir=str(tmp_path / "forecast"), fetch=fake_forecast)
+    points = [(38.8409, -105.0423), (38.8783, -104.8719), (38.8783, -104.8719), (38.8650, -104.8300)]
+
+    summary = ora.prefetch_region(points, analyzer, service, workers=2, progress=False)
+    # Three distinct terrain points; the last two share a weather cell
+    assert summary['tasks'] == 5
+    assert summary['completed'] == 5
+    assert summary['failed'] == 0
+    assert summary['coverage'] == {'terrain': 1.0, 'weather': 1.0}
+
+    cached = os.listdir(tmp_path / "dem")
+    for prefix in ('dem_', 'avalanche_', 'exposure_'):
+        assert sum(name.startswith(prefix) for name in cached) == 3
+
+    # A second run skips the terrain tasks recorded in the state file
+    fetches = service.stats['fetches']
+    summary = ora.prefetch_region(points, analyzer, service, workers=2, progress=False)
+    assert summary['resumed'] == 3
+    assert summary['completed'] == 2
+    assert service.stats['fetches'] == fetches
+
+
+def test_prefetch_reports_failures(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path / "dem"))
+    service = ora.ForecastService(risk_system=ora.OutdoorRiskAssessment(), cache_dir=None,
+                                  fetch=lambda location, days: None)
+
+    summary = ora.prefetch_region([(38.8409, -105.0423)], analyzer, service, progress=False)
+    assert summary['failed'] == 1
+    assert list(summary['failures']) == ["weather:388,-1051"]
+    assert summary['coverage'] == {'terrain': 1.0, 'weather': 0.0}
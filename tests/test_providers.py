@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+import rasterio
+
+import outdoor_risk_assessment as ora
+
+CELL = 0.001
+
+
+def write_tiles(directory):
+    # Two adjacent 1 km tiles with different constant elevations
+    directory.mkdir()
+    for i, elevation in enumerate([1000, 2000]):
+        transform = rasterio.transform.from_origin(-105.0 + i * 0.1, 39.0, CELL, CELL)
+        ora.write_raster(str(directory / f"tile_{i}.tif"), np.full((100, 100), elevation, dtype=np.float32), transform)
+
+
+def test_local_provider_mosaics_tiles(tmp_path):
+    write_tiles(tmp_path / "tiles")
+    provider = ora.LocalElevationProvider(str(tmp_path / "tiles"))
+    assert len(provider.tiles) == 2
+
+    dem, transform = provider.read((-104.95, 38.95, -104.85, 38.97))
+    assert dem.shape == (20, 100)
+    assert np.array_equal(np.unique(dem), [1000, 2000])
+    assert (transform.c, transform.f) == pytest.approx((-104.95, 38.97))
+
+    # Coarser reads average the source cells
+    coarse, coarse_transform = provider.read((-104.95, 38.95, -104.85, 38.97), res=(0.005, 0.005))
+    assert coarse.shape == (4, 20)
+    assert coarse_transform.a == pytest.approx(0.005)
+
+    with pytest.raises(ValueError):
+        provider.read((-100.0, 38.0, -99.9, 38.1))
+
+
+class CountingProvider(ora.SyntheticElevationProvider):
+    def __init__(self, prefetch_dir=None):
+        super().__init__(size=50, prefetch_dir=prefetch_dir)
+        self.fetches = []
+
+    def fetch(self, bounds, res=None):
+        self.fetches.append(bounds)
+        return super().fetch(bounds, res)
+
+
+def test_prefetched_regions_are_served_from_disk(tmp_path):
+    provider = CountingProvider(prefetch_dir=str(tmp_path / "prefetch"))
+    with pytest.raises(ValueError):
+        CountingProvider().prefetch((-105.1, 38.7, -104.9, 38.9))
+
+    provider.prefetch((-105.1, 38.7, -104.9, 38.9))
+    assert len(provider.fetches) == 1
+    dem, _ = provider.read((-105.0, 38.75, -104.95, 38.8))
+    assert dem.size > 0
+    assert len(provider.fetches) == 1
+
+    # Outside the prefetched box the backend is used
+    provider.read((-104.8, 38.75, -104.7, 38.8))
+    assert len(provider.fetches) == 2
+
+    # A new provider picks up the prefetched files
+    assert len(CountingProvider(prefetch_dir=str(tmp_path / "prefetch"))._prefetched) == 1
+
+
+def test_analyzer_uses_its_provider(tmp_path):
+    provider = CountingProvider()
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path), elevation_provider=provider)
+    analyzer.get_elevation_data((38.8, -105.0))
+    analyzer.get_elevation_data((38.8, -105.0))
+    assert len(provider.fetches) == 1
+
+
+class FakeResponse:
+    def __init__(self, locations):
+        self.locations = locations
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'results': [dict(location, elevation=1000 + 1000 * location['latitude'] % 7)
+                            for location in self.locations]}
+
+
+def test_open_elevation_provider_batches_requests(monkeypatch):
+    posts = []
+
+    def fake_post(url, json=None, timeout=None):
+        posts.append((url, len(json['locations']), timeout))
+        return FakeResponse(json['locations'])
+
+    monkeypatch.setattr(ora.requests, 'post', fake_post)
+    provider = ora.OpenElevationProvider(url="http://elevation.test/lookup", resolution=100, batch_size=50)
+    dem, transform = provider.fetch((-105.0, 38.8, -104.99, 38.81))
+
+    rows, cols = dem.shape
+    assert rows == round(0.01 * 111320 / 100)
+    assert sum(count for _, count, _ in posts) == rows * cols
+    assert all(count <= 50 and timeout == 30 for _, count, timeout in posts)
+    # Rows run from the north edge
+    assert transform.f == pytest.approx(38.81)
+    lat = 38.81 - 0.5 * 0.01 / rows
+    assert dem[0, 0] == pytest.approx(1000 + 1000 * lat % 7, abs=1e-2)
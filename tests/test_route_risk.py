@@ -0,0 +1,116 @@
+import json
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+import outdoor_risk_assessment as ora
+
+LAT = 38.83
+CELL = 10.0
+WEATHER = {'temperature': 60, 'precipitation': 0, 'wind_speed': 22, 'thunderstorm_risk': 0.4}
+USER = ('intermediate', 2, WEATHER, 'good', 20, 35, 22, 'other')
+
+
+def write_slope_dem(path):
+    # 10 m DEM: a 35 degree east-facing slope for 2.5 km, then flat ground
+    m_per_deg = 111320
+    res_y = CELL / m_per_deg
+    res_x = CELL / (m_per_deg * np.cos(np.radians(LAT)))
+    rows, cols = int(0.06 / res_y), int(0.08 / res_x)
+    transform = rasterio.transform.from_origin(-105.06, LAT + 0.03, res_x, res_y)
+    east = np.arange(cols) * CELL
+    profile = 2000 + np.tan(np.radians(35)) * np.minimum(east, 2500)
+    dem = np.repeat(profile[np.newaxis, :], rows, axis=0).astype(np.float32)
+    ora.write_raster(path, dem, transform, crs='EPSG:4326')
+    return dem, transform
+
+
+def route_analyzer(tmp_path):
+    dem, transform = write_slope_dem(str(tmp_path / "dem_10m.tif"))
+    provider = ora.LocalElevationProvider(str(tmp_path / "dem_10m.tif"))
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path / "cache"), elevation_provider=provider)
+    return analyzer, dem, transform
+
+
+ROUTE = np.array([[LAT, -105.05], [LAT + 0.002, -105.02], [LAT, -104.99]])
+
+
+def expected_scores(risk_system, terrain, activity_type):
+    human_risk, weight_risk = risk_system.calculate_human_risk('intermediate', 2, activity_type, 20, 35, 22, 'other')
+    scores = []
+    for i in range(len(terrain['start'])):
+        segment = {name: float(terrain[name][i]) for name in
+                   ('elevation', 'slope', 'ruggedness', 'avalanche_terrain_fraction', 'wind_exposure', 'lightning_exposure')}
+        scores.append(risk_system.combine_component_risks({
+            'terrain_risk': risk_system.assess_terrain_difficulty(None, segment, activity_type),
+            'weather_risk': risk_system.calculate_weather_risk(WEATHER, activity_type, segment),
+            'human_risk': human_risk,
+            'equipment_risk': risk_system.assess_equipment_risk('good', activity_type),
+            'weight_risk': weight_risk
+        }, tuple(terrain['midpoint'][i])))
+    return scores
+
+
+def test_route_is_read_in_windowed_tiles(tmp_path):
+    analyzer, dem, transform = route_analyzer(tmp_path)
+    terrain = analyzer.analyze_route(ROUTE, segment_length=1000)
+
+    # Samples match the full-resolution DEM
+    points, distance = ora.densify_route(ROUTE, 30)
+    elevation = ora.meters_to_feet(ora.sample_raster_bilinear(dem, transform, points[:, 0], points[:, 1]))
+    assert np.allclose(terrain['elevation_max'][0], elevation[distance < 1000].max(), atol=10)
+    assert np.allclose(terrain['slope'][0], 35, atol=0.5)
+    assert terrain['slope_max'][-1] < 1
+
+    # Each tile read covers the tile plus the avalanche neighbourhood, whatever the route's length
+    windows = [name for name in os.listdir(tmp_path / "cache") if name.startswith('dem_')]
+    assert len(windows) >= 3
+    for name in windows:
+        with rasterio.open(tmp_path / "cache" / name) as src:
+            assert src.height <= 2 * (1000 + 1030 / np.cos(np.radians(LAT))) / CELL + 2
+            assert src.width * src.height < dem.size / 2
+
+
+def test_route_segments_score_like_points(tmp_path):
+    analyzer, _, _ = route_analyzer(tmp_path)
+    risk_system = ora.OutdoorRiskAssessment()
+
+    result = ora.assess_route_risk(risk_system, analyzer, ROUTE, 'backcountry_skiing', *USER)
+    terrain = analyzer.analyze_route(ROUTE, segment_length=1000)
+    segments = result['segments']
+    assert [segment['risk_score'] for segment in segments] == pytest.approx(
+        expected_scores(risk_system, terrain, 'backcountry_skiing'))
+
+    # Avalanche terrain is weighted on the slope for skiing only
+    assert segments[0]['avalanche_terrain_fraction'] > 0.9
+    assert segments[-1]['avalanche_terrain_fraction'] < 0.1
+    hiking = ora.assess_route_risk(risk_system, analyzer, ROUTE, 'hiking', *USER)['segments']
+    slope_only = risk_system.assess_terrain_difficulty(None, {name: segments[0][name] for name in
+                                                              ('elevation', 'slope', 'ruggedness')})
+    assert hiking[0]['terrain_risk'] == pytest.approx(slope_only)
+    assert segments[0]['terrain_risk'] > slope_only
+
+    # Exposure scales the weather risk per segment
+    assert segments[0]['weather_risk'] != pytest.approx(risk_system.calculate_weather_risk(WEATHER, 'backcountry_skiing'))
+
+
+def test_route_applies_risk_area_modifiers(tmp_path):
+    analyzer, _, _ = route_analyzer(tmp_path)
+    risk_system = ora.OutdoorRiskAssessment()
+    areas = tmp_path / "areas.geojson"
+    areas.write_text(json.dumps({'type': 'FeatureCollection', 'features': [{
+        'type': 'Feature',
+        'properties': {'name': 'West closure', 'risk_modifier': 1.5},
+        'geometry': {'type': 'Polygon', 'coordinates': [[[-105.06, 38.8], [-105.03, 38.8], [-105.03, 38.86],
+                                                          [-105.06, 38.86], [-105.06, 38.8]]]}
+    }]}))
+    baseline = ora.assess_route_risk(risk_system, analyzer, ROUTE, 'hiking', *USER)['segments']
+    risk_system.load_risk_areas(str(areas))
+    segments = ora.assess_route_risk(risk_system, analyzer, ROUTE, 'hiking', *USER)['segments']
+
+    assert segments[0]['location_modifier'] == 1.5
+    assert segments[0]['risk_score'] == pytest.approx(1.5 * baseline[0]['risk_score'])
+    assert segments[-1]['location_modifier'] == 1.0
+    assert segments[-1]['risk_score'] == pytest.approx(baseline[-1]['risk_score'])
@@ -0,0 +1,145 @@
+import json
+
+import numpy as np
+import pytest
+
+import outdoor_risk_assessment as ora
+
+LOCATION = ora.LOCATION_CATALOG['Pikes Peak']
+WEATHER = {'temperature': 50, 'precipitation': 0.1, 'wind_speed': 20, 'thunderstorm_risk': 0.5}
+TERRAIN = {'elevation': 12000, 'slope': 25, 'ruggedness': 0.7}
+INPUTS = (LOCATION, 'hiking', 'beginner', 1, WEATHER, 'basic', TERRAIN, 45, 60, 2.0, 'male')
+
+
+def test_component_memoization_reuses_categories():
+    cached = ora.OutdoorRiskAssessment()
+    uncached = ora.OutdoorRiskAssessment(component_cache_size=0)
+
+    # 30 and 32 years, 20 and 22 lb fall in the same categories
+    first = cached.calculate_human_risk('intermediate', 3, 'hiking', 20, 30, 2.2, 'female')
+    misses = cached.get_component_cache_stats()['misses']
+    second = cached.calculate_human_risk('intermediate', 3, 'hiking', 22, 32, 2.2, 'female')
+    assert first == second == uncached.calculate_human_risk('intermediate', 3, 'hiking', 20, 30, 2.2, 'female')
+    stats = cached.get_component_cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, misses)
+
+    # Changing a threshold invalidates memoized scores
+    cached.update_thresholds('activity_types', {'hiking': dict(cached.activity_types['hiking'], weight_sensitivity=2.0)})
+    assert cached.calculate_weight_risk(20, 'hiking') == 3 * 2.0  # moderate load
+    assert cached.get_component_cache_stats()['size'] == 1
+
+
+def test_uncertainty_bands():
+    risk_system = ora.OutdoorRiskAssessment()
+    category, score, _ = risk_system.calculate_risk_score(*INPUTS)
+
+    result = risk_system.calculate_risk_uncertainty(*INPUTS, samples=20000, seed=1)
+    assert (result['risk_category'], result['risk_score']) == (category, score)
+    assert result['std'] > 0
+    assert result['percentiles'][5] < result['percentiles'][50] < result['percentiles'][95]
+    assert abs(result['percentiles'][50] - score) < 0.5
+    assert sum(result['category_probabilities'].values()) == pytest.approx(1)
+    assert result == risk_system.calculate_risk_uncertainty(*INPUTS, samples=20000, seed=1)
+
+    # Calm, dry forecasts still carry uncertainty
+    calm = dict(WEATHER, precipitation=0, wind_speed=0, thunderstorm_risk=0)
+    calm_inputs = INPUTS[:4] + (calm,) + INPUTS[5:]
+    assert risk_system.calculate_risk_uncertainty(*calm_inputs, samples=2000, seed=1)['std'] > 0
+
+    # Without input uncertainty every sample is the point score
+    for name in risk_system.input_uncertainty:
+        risk_system.input_uncertainty[name] = 0
+    exact = risk_system.calculate_risk_uncertainty(*INPUTS, samples=100, seed=1)
+    assert exact['std'] == pytest.approx(0, abs=1e-9)
+    assert exact['mean'] == pytest.approx(score)
+
+
+@pytest.mark.parametrize('start_hour', [6, 9, 14])
+def test_sweep_baseline_matches_point_score(start_hour):
+    risk_system = ora.OutdoorRiskAssessment()
+    category, score, _ = risk_system.calculate_risk_score(*INPUTS)
+
+    sweep = risk_system.sensitivity_sweep(*INPUTS, start_hour=start_hour)
+    assert sweep['baseline'] == {'risk_score': pytest.approx(score), 'risk_category': category}
+
+    # Every grid cell matches a full assessment with those inputs
+    axes = sweep['axes']
+    assert sweep['risk_score'].shape == tuple(len(values) for values in axes.values())
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        index = tuple(rng.integers(len(values)) for values in axes.values())
+        weight, equipment, group_size, hour = (values[i] for values, i in zip(axes.values(), index))
+        factors = risk_system.start_hour_thunderstorm
+        factor = np.interp(hour, factors['hours'], factors['factors']) / np.interp(start_hour, factors['hours'], factors['factors'])
+        weather = dict(WEATHER, thunderstorm_risk=min(1, WEATHER['thunderstorm_risk'] * factor))
+        _, expected, _ = risk_system.calculate_risk_score(
+            LOCATION, 'hiking', 'beginner', group_size, weather, equipment, TERRAIN, weight, 60, 2.0, 'male')
+        assert sweep['risk_score'][index] == pytest.approx(expected)
+
+
+def test_sweep_cheapest_change_lowers_the_category():
+    risk_system = ora.OutdoorRiskAssessment()
+    weather = {'temperature': 60, 'precipitation': 0, 'wind_speed': 15, 'thunderstorm_risk': 0.6}
+    terrain = {'elevation': 6500, 'slope': 20, 'ruggedness': 0.4}
+    sweep = risk_system.sensitivity_sweep(ora.LOCATION_CATALOG['Palmer Park'], 'hiking', 'intermediate', 1, weather,
+                                          'poor', terrain, 40, 40, 2.0, 'male', start_hour=13)
+    assert sweep['baseline']['risk_category'] == 'moderate'
+    change = sweep['cheapest_change']
+    assert change['risk_category'] == 'low'
+
+    # Brute force over the grid: no lower-category cell is cheaper
+    axes = sweep['axes']
+    current = {'weight_carried': 40, 'equipment_quality_level': 'poor', 'group_size': 1, 'start_hour': 13}
+    equipment = axes['equipment_quality_level']
+    costs = risk_system.change_costs
+    cheapest = None
+    for index in np.ndindex(sweep['risk_score'].shape):
+        if sweep['risk_category'][index] != 'low':
+            continue
+        values = dict(zip(axes, (values[i] for values, i in zip(axes.values(), index))))
+        cost = (costs['weight_carried'] * max(0, current['weight_carried'] - values['weight_carried']) +
+                costs['equipment_quality_level'] * max(0, equipment.index(values['equipment_quality_level']) -
+                                                       equipment.index(current['equipment_quality_level'])) +
+                costs['group_size'] * abs(values['group_size'] - current['group_size']) +
+                costs['start_hour'] * abs(values['start_hour'] - current['start_hour']))
+        cheapest = cost if cheapest is None else min(cheapest, cost)
+    assert change['cost'] == pytest.approx(cheapest)
+    assert change['changes'] and all(current[name] != value for name, value in change['changes'].items())
+
+
+def square(lon, lat, half):
+    return [[[lon - half, lat - half], [lon + half, lat - half], [lon + half, lat + half],
+             [lon - half, lat + half], [lon - half, lat - half]]]
+
+
+def test_polygon_modifiers(tmp_path):
+    # Nested areas away from the built-in ones: a large closure containing a small hazard
+    areas = tmp_path / "areas.geojson"
+    areas.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'name': 'Basin', 'risk_modifier': 1.2},
+         'geometry': {'type': 'Polygon', 'coordinates': square(-106.0, 40.0, 0.1)}},
+        {'type': 'Feature', 'properties': {'name': 'Rockfall', 'risk_modifier': 1.5},
+         'geometry': {'type': 'Polygon', 'coordinates': square(-106.0, 40.0, 0.01)}}
+    ]}))
+    risk_system = ora.OutdoorRiskAssessment()
+    risk_system.load_risk_areas(str(areas))
+
+    lats = np.array([40.0, 40.05, 41.0])
+    lons = np.array([-106.0, -106.0, -106.0])
+    expected = {'max': [1.5, 1.2, 1.0], 'product': [1.8, 1.2, 1.0], 'smallest': [1.5, 1.2, 1.0]}
+    for combination, modifiers in expected.items():
+        risk_system.risk_area_combination = combination
+        assert risk_system.get_location_modifiers(lats, lons) == pytest.approx(modifiers)
+        assert [risk_system.get_location_modifier((lat, lon)) for lat, lon in zip(lats, lons)] == pytest.approx(modifiers)
+
+    # A modifier below 1 inside a riskier area: 'smallest' picks the specific area
+    risk_system.update_thresholds('location_specific_risks', {'Rockfall': dict(
+        risk_system.location_specific_risks['Rockfall'], risk_modifier=0.8)})
+    risk_system.risk_area_combination = 'smallest'
+    assert risk_system.get_location_modifier((40.0, -106.0)) == pytest.approx(0.8)
+    risk_system.risk_area_combination = 'max'
+    assert risk_system.get_location_modifier((40.0, -106.0)) == pytest.approx(1.2)
+
+    # The modifier scales the total risk
+    _, score, components = risk_system.calculate_risk_score((40.05, -106.0), *INPUTS[1:])
+    assert components['total_risk'] == pytest.approx(1.2 * risk_system.combine_component_risks(components, None))
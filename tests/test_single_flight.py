@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import outdoor_risk_assessment as ora
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = ora.SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        started.set()
+        release.wait(5)
+        return value * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', slow, 21))) for _ in range(8)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Wait until every follower has joined the in-flight call
+    while flight.stats['calls'] < 8:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [42] * 8
+    assert calls == [21]
+    assert flight.stats == {'calls': 8, 'executions': 1, 'deduplicated': 7}
+
+    # Once finished the key runs again
+    assert flight.do('key', lambda: 'fresh') == 'fresh'
+
+
+def test_errors_reach_every_caller_and_release_the_key():
+    flight = ora.SingleFlight()
+
+    def fail():
+        raise RuntimeError("backend down")
+
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
+    assert flight._calls == {}
+    assert flight.do('key', lambda: 1) == 1
+
+
+def test_async_callers_share_one_execution():
+    flight = ora.SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 'done'
+
+    async def run():
+        tasks = [asyncio.ensure_future(flight.do_async('key', slow)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(run()) == ['done'] * 5
+    assert calls == [1]
+    assert flight.stats['deduplicated'] == 4
+
+
+def test_analyzer_coalesces_concurrent_analyses(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path))
+    barrier = threading.Barrier(4)
+    results = []
+
+    def analyze():
+        barrier.wait(5)
+        results.append(analyzer.analyze_terrain((38.8409, -105.0423)))
+
+    threads = [threading.Thread(target=analyze) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(results) == 4
+    assert all(result == results[0] for result in results)
+    assert len([name for name in tmp_path.iterdir() if name.name.startswith('dem_')]) == 1
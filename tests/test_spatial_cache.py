@@ -0,0 +1,54 @@
+import outdoor_risk_assessment as ora
+
+
+def test_nearby_lookups_reuse_entries():
+    cache = ora.SpatialCache(tolerance=50)
+    cache.put((38.8409, -105.0423), 1000, 'pikes')
+
+    # About 30 m away, same radius: reused
+    assert cache.get((38.8412, -105.0421), 1000) == 'pikes'
+    # About 300 m away, or a different radius: missed
+    assert cache.get((38.8436, -105.0423), 1000) is None
+    assert cache.get((38.8409, -105.0423), 2000) is None
+    assert cache.stats == {'hits': 1, 'misses': 2, 'rebuilds': 0}
+
+
+def test_max_entries_enforced_on_insert():
+    cache = ora.SpatialCache(max_entries=10, rebuild_every=64)
+    for i in range(100):
+        cache.put((38 + i * 0.01, -105), 0, i)
+        assert len(cache) <= 10
+
+    # The newest entries survive
+    assert cache.get((38.99, -105)) == 99
+    assert cache.get((38.0, -105)) is None
+
+
+def test_max_age():
+    cache = ora.SpatialCache(max_age=600)
+    cache.put((38.8, -105.0), 0, 'weather', now=0)
+    assert cache.get((38.8, -105.0), now=599) == 'weather'
+    assert cache.get((38.8, -105.0), now=601) is None
+
+
+def test_scopes_are_separate():
+    cache = ora.SpatialCache()
+    cache.put((38.8, -105.0), 0, 'first key', scope='key-1')
+    cache.put((38.8, -105.0), 0, 'second key', scope='key-2')
+
+    assert cache.get((38.8, -105.0), scope='key-1') == 'first key'
+    assert cache.get((38.8, -105.0), scope='key-2') == 'second key'
+    assert cache.get((38.8, -105.0)) is None
+
+
+def test_terrain_context_returns_copies(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path))
+    location = (38.8409, -105.0423)
+
+    first = analyzer.get_terrain_context(location)
+    first['slope'] = -1
+    first['extra'] = True
+
+    second = analyzer.get_terrain_context(location)
+    assert second['slope'] != -1
+    assert 'extra' not in second
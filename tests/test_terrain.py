@@ -0,0 +1,183 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+import outdoor_risk_assessment as ora
+
+
+def plane_dem(analyzer, grade_east=0.1, grade_north=0.0, size=50, cell=10.0, lat=38.8):
+    # Tilted plane on a geographic grid with cells of about `cell` meters
+    m_per_deg = 111320
+    res_y = cell / m_per_deg
+    res_x = cell / (m_per_deg * np.cos(np.radians(lat)))
+    transform = rasterio.transform.from_origin(-105.0, lat + size * res_y / 2, res_x, res_y)
+    cell_x, cell_y = analyzer.cell_size_meters(transform, size)
+    east = np.arange(size) * cell_x
+    north = -np.arange(size) * cell_y
+    return (grade_east * east[np.newaxis, :] + grade_north * north[:, np.newaxis]).astype(np.float32), transform
+
+
+def test_slope_of_a_plane(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path))
+    dem, transform = plane_dem(analyzer, grade_east=0.1, grade_north=0.05)
+
+    slope = analyzer.compute_slope(dem, transform)
+    expected = np.degrees(np.arctan(np.hypot(0.1, 0.05)))
+    assert np.allclose(slope[1:-1, 1:-1], expected, atol=1e-3)
+
+
+def test_slope_results_are_not_reused_buffers(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path))
+    steep, transform = plane_dem(analyzer, grade_east=0.5)
+    flat, _ = plane_dem(analyzer, grade_east=0.01)
+
+    steep_slope = analyzer.compute_slope(steep, transform)
+    kept = steep_slope.copy()
+    flat_slope = analyzer.compute_slope(flat, transform)
+
+    assert flat_slope is not steep_slope
+    assert np.array_equal(steep_slope, kept)
+
+    # An explicit out= is written and returned
+    out = np.empty(steep.shape, dtype=np.float32)
+    assert analyzer.compute_slope(steep, transform, out=out) is out
+    assert np.array_equal(out, kept)
+
+
+def test_walkout_time_on_flat_ground(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path))
+    dem, transform = plane_dem(analyzer, grade_east=0.0, size=21)
+    cell_x, _ = analyzer.cell_size_meters(transform, 21)
+
+    # Source in the centre cell; flat ground walks at Tobler's speed off trail
+    lon, lat = transform * (10.5, 10.5)
+    times = analyzer.compute_walkout_time(dem, transform, [(lat, lon)])
+    speed = 6 * np.exp(-3.5 * 0.05) * 0.6
+    assert times[10, 10] == 0
+    assert np.isclose(times[10, 20], 10 * cell_x / 1000 / speed)
+    assert np.all(np.isfinite(times))
+
+
+def test_terrain_context_walkout_from_trailheads(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path))
+    risk_system = ora.OutdoorRiskAssessment()
+    location = ora.LOCATION_CATALOG['Palmer Park']
+
+    trailheads = analyzer.get_access_points(location)
+    assert trailheads
+    context = analyzer.get_terrain_context(location)
+    assert context['walkout_time'] == analyzer.get_walkout_time(location, 1000, trailheads)['walkout_time']
+    assert context['walkout_time'] > 0
+
+    # Remoteness feeds the terrain score
+    without_walkout = {key: value for key, value in context.items() if key != 'walkout_time'}
+    assert (risk_system.assess_terrain_difficulty(location, context, 'hiking') !=
+            risk_system.assess_terrain_difficulty(location, without_walkout, 'hiking'))
+
+    # Without access points there is no walk-out time
+    assert 'walkout_time' not in analyzer.get_terrain_context(location, sources=[])
+
+
+def plane_provider(tmp_path, grade_east, size=1200, cell=10.0, lat=38.8):
+    # GeoTIFF of a tilted plane served through the local provider
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path / "plane_cache"))
+    dem, transform = plane_dem(analyzer, grade_east=grade_east, size=size, cell=cell, lat=lat)
+    dem += 2000
+    ora.write_raster(str(tmp_path / "plane.tif"), dem, transform)
+    center = transform * (size / 2, size / 2)
+    return ora.LocalElevationProvider(str(tmp_path / "plane.tif")), (center[1], center[0])
+
+
+def test_exposure_of_a_peak_and_a_plane(tmp_path):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path))
+    flat, transform = plane_dem(analyzer, grade_east=0.0, size=61)
+    exposure = analyzer.compute_exposure(flat, transform, search_distance=100)
+    assert np.allclose(exposure['tpi'], 0)
+    assert np.allclose(exposure['sky_view'], 1)
+    assert np.allclose(exposure['wind_exposure'], 0.7)
+
+    # A cone: the summit is a ridge with an open sky, the foot sits in a hollow
+    rows, cols = np.indices((61, 61))
+    cone = (3000 - 20 * np.hypot(rows - 30, cols - 30)).astype(np.float32)
+    exposure = analyzer.compute_exposure(cone, transform, search_distance=100)
+    assert exposure['tpi'][30, 30] > 0
+    assert exposure['wind_exposure'][30, 30] > exposure['wind_exposure'][30, 5]
+    assert exposure['lightning_exposure'][30, 30] > exposure['lightning_exposure'][30, 5]
+
+    # Exposure scales the weather risk
+    risk_system = ora.OutdoorRiskAssessment()
+    weather = {'temperature': 60, 'precipitation': 0, 'wind_speed': 30, 'thunderstorm_risk': 0.5}
+    sheltered = risk_system.calculate_weather_risk(weather, 'hiking', {'wind_exposure': 0.6, 'lightning_exposure': 0.6})
+    exposed = risk_system.calculate_weather_risk(weather, 'hiking', {'wind_exposure': 1.3, 'lightning_exposure': 1.3})
+    assert sheltered < risk_system.calculate_weather_risk(weather, 'hiking') < exposed
+
+
+def test_avalanche_classes_of_a_plane(tmp_path):
+    # 37 degree slope rising to the east, so it faces west
+    provider, center = plane_provider(tmp_path, np.tan(np.radians(37)), size=300)
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path / "cache"), elevation_provider=provider)
+    slope, aspect = analyzer.compute_slope_aspect(*plane_dem(analyzer, grade_east=np.tan(np.radians(37))))
+    assert np.allclose(slope[1:-1, 1:-1], 37, atol=0.1)
+    assert np.allclose(aspect[1:-1, 1:-1], 270, atol=0.1)
+
+    terrain = analyzer.get_avalanche_terrain(center, 1000)
+    assert terrain['slope_bands']['35-40'] == pytest.approx(1)
+    assert terrain['by_aspect']['W']['35-40'] == pytest.approx(1)
+    assert terrain['avalanche_terrain_fraction'] == pytest.approx(1)
+    assert terrain['avalanche_aspect_fractions']['E'] == 0
+    assert any(name.startswith('avalanche_') for name in os.listdir(tmp_path / "cache"))
+
+    # Avalanche terrain raises the terrain risk for skiing only
+    risk_system = ora.OutdoorRiskAssessment()
+    base = {'elevation': 10000, 'slope': 37, 'ruggedness': 0.5}
+    steep = dict(base, avalanche_terrain_fraction=terrain['avalanche_terrain_fraction'])
+    assert (risk_system.assess_terrain_difficulty(None, steep, 'backcountry_skiing') >
+            risk_system.assess_terrain_difficulty(None, dict(base, avalanche_terrain_fraction=0), 'backcountry_skiing'))
+    assert (risk_system.assess_terrain_difficulty(None, steep, 'hiking') ==
+            risk_system.assess_terrain_difficulty(None, base, 'hiking'))
+
+
+def test_rasters_are_written_as_cogs(tmp_path):
+    data = np.random.default_rng(0).random((1024, 1024), dtype=np.float32)
+    transform = rasterio.transform.from_origin(-105.0, 39.0, 0.0001, 0.0001)
+    path = str(tmp_path / "dem.tif")
+    ora.write_raster(path, data, transform)
+
+    with rasterio.open(path) as src:
+        assert src.profile['tiled']
+        assert (src.profile['blockxsize'], src.profile['blockysize']) == (256, 256)
+        assert src.compression.name.lower() == 'zstd'
+        assert src.overviews(1)
+        assert np.array_equal(src.read(1), data)
+
+    overview, overview_transform = ora.read_raster_overview(path, 256)
+    assert overview.shape == (256, 256)
+    assert overview.mean() == pytest.approx(data.mean(), abs=1e-3)
+    assert overview_transform.a == pytest.approx(4 * transform.a)
+
+
+def test_large_radius_is_read_within_the_pixel_budget(tmp_path, monkeypatch):
+    provider, center = plane_provider(tmp_path, 0.3)
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path / "cache"), elevation_provider=provider)
+    analyzer.terrain_pixel_budget = 64 * 64
+    seen = []
+    read_overview = ora.read_raster_overview
+
+    def counting_read(path, max_size, indexes=1):
+        data, transform = read_overview(path, max_size, indexes)
+        seen.append(data.shape)
+        return data, transform
+
+    monkeypatch.setattr(ora, 'read_raster_overview', counting_read)
+    small = analyzer.analyze_terrain(center, 500)
+    large = analyzer.analyze_terrain(center, 5000)
+
+    assert len(seen) == 2
+    assert all(max(shape) <= 64 for shape in seen)
+    # A plane's slope does not depend on the cell size the DEM is read at
+    expected = np.degrees(np.arctan(0.3))
+    assert small['slope'] == pytest.approx(expected, abs=0.5)
+    assert large['slope'] == pytest.approx(expected, abs=0.5)
+    assert large['elevation'] == pytest.approx(small['elevation'], rel=0.01)
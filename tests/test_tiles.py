@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+import rasterio.errors
+from rasterio.io import MemoryFile
+
+import outdoor_risk_assessment as ora
+
+REGION = (-105.06, 38.83, -105.03, 38.85)
+
+
+class CountingProvider(ora.SyntheticElevationProvider):
+    # Synthetic DEMs that count backend reads, optionally failing
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fetches = 0
+        self.fail = fail
+
+    def fetch(self, bounds, res=None):
+        self.fetches += 1
+        if self.fail:
+            raise ConnectionError("elevation service unavailable")
+        return super().fetch(bounds, res)
+
+
+def make_renderer(tmp_path, provider=None, weather=None, weather_regions=None):
+    analyzer = ora.GISTerrainAnalyzer(dem_cache_dir=str(tmp_path / "dem"),
+                                      elevation_provider=provider or CountingProvider())
+    return ora.RiskTileRenderer(terrain_analyzer=analyzer, weather=weather, cache_dir=str(tmp_path / "tiles"),
+                                weather_regions=weather_regions)
+
+
+@pytest.mark.filterwarnings('ignore::rasterio.errors.NotGeoreferencedWarning')
+def test_tile_is_a_risk_coloured_png(tmp_path):
+    renderer = make_renderer(tmp_path)
+    z, x, y = ora.tiles_for_bounds(REGION, 12)[0]
+
+    with MemoryFile(renderer.get_tile('backcountry_skiing', 'intermediate', z, x, y)) as memfile:
+        with memfile.open() as src:
+            image = np.moveaxis(src.read(), 0, 2).reshape(-1, 4)
+    assert image.shape == (256 * 256, 4)
+    colors = {tuple(color) for color in ora.RISK_TILE_COLORS.values()}
+    assert {tuple(pixel) for pixel in np.unique(image, axis=0)} <= colors
+
+    with pytest.raises(ValueError):
+        renderer.get_tile('base_jumping', 'intermediate', z, x, y)
+    with pytest.raises(ValueError):
+        renderer.get_tile('hiking', 'intermediate', z, 2 ** z, y)
+
+
+def test_terrain_is_read_through_the_analyzer_cache(tmp_path):
+    provider = CountingProvider()
+    renderer = make_renderer(tmp_path, provider)
+    z, x, y = ora.tiles_for_bounds(REGION, 12)[0]
+
+    renderer.get_tile('hiking', 'beginner', z, x, y)
+    renderer.get_tile('backcountry_skiing', 'expert', z, x, y)
+    assert provider.fetches == 1
+    assert renderer.stats['renders'] == 2
+
+    # Provider failures surface as errors rather than blank tiles
+    failing = make_renderer(tmp_path / "failing", CountingProvider(fail=True))
+    with pytest.raises(RuntimeError):
+        failing.get_tile('hiking', 'beginner', z, x, y)
+
+
+def test_cache_hits_do_not_record_weather_demand(tmp_path):
+    calls = []
+
+    def fetch(location):
+        calls.append(location)
+        return {'temperature': 40, 'precipitation': 0, 'wind_speed': 20, 'thunderstorm_risk': 0.3}
+
+    scheduler = ora.WeatherFetchScheduler(fetch=fetch)
+    renderer = make_renderer(tmp_path, weather=scheduler, weather_regions=[REGION])
+    z, x, y = ora.tiles_for_bounds(REGION, 12)[0]
+
+    first = renderer.get_tile('hiking', 'intermediate', z, x, y)
+    requests, fetches = scheduler.stats['requests'], len(calls)
+    assert requests > 0 and fetches > 0
+
+    assert renderer.get_tile('hiking', 'intermediate', z, x, y) == first
+    assert renderer.stats == {'hits': 1, 'renders': 1}
+    assert scheduler.stats['requests'] == requests
+    assert len(calls) == fetches
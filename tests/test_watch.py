@@ -0,0 +1,128 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import outdoor_risk_assessment as ora
+
+CALM = {'temperature': 60, 'precipitation': 0, 'wind_speed': 5, 'thunderstorm_risk': 0}
+STORM = {'temperature': 20, 'precipitation': 1.5, 'wind_speed': 45, 'thunderstorm_risk': 0.9}
+DATES = ['2026-10-20', '2026-10-21', '2026-10-22']
+
+
+def noon(date):
+    return datetime.strptime(date, "%Y-%m-%d").replace(hour=12).timestamp()
+
+
+class FakeForecast:
+    # Daily forecasts keyed by date, standing in for the OpenWeather call
+    def __init__(self, weather=CALM):
+        self.weather = {date: dict(weather) for date in DATES}
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, location, days):
+        self.calls += 1
+        if self.fail:
+            return None
+        return [{'date': date, 'weather': dict(weather)} for date, weather in self.weather.items()]
+
+
+def make_watcher(fetch, events=None):
+    service = ora.ForecastService(cache_dir=None, fetch=fetch)
+    return ora.TripWatchScheduler(service, on_event=events.append if events is not None else None)
+
+
+def test_watch_scores_match_point_assessment():
+    watcher = make_watcher(FakeForecast())
+    risk_system = watcher.risk_system
+    profile = ora.TILE_PROFILES['intermediate']
+    watcher.add_watch('pikes', 'Pikes Peak', DATES[1], 'hiking', 'intermediate')
+    asyncio.run(watcher.refresh(now=noon(DATES[0])))
+
+    category, score, _ = risk_system.calculate_risk_score(
+        ora.LOCATION_CATALOG['Pikes Peak'], 'hiking', profile['user_experience'], profile['group_size'], CALM,
+        profile['equipment_quality_level'], ora.LOCATION_TERRAIN['Pikes Peak'], profile['weight_carried'],
+        profile['age'], profile['height_weight_ratio'], profile['gender'])
+    assert watcher.get_watch('pikes') == (category, pytest.approx(score, abs=0.01))
+    assert watcher.watch_ids() == ['pikes']
+    assert watcher.cell_count() == 1
+
+
+def test_category_changes_emit_events():
+    fetch = FakeForecast()
+    events = []
+    watcher = make_watcher(fetch, events)
+    watcher.add_watch('garden', 'Garden of the Gods', DATES[1], 'hiking', 'intermediate')
+    asyncio.run(watcher.refresh(now=noon(DATES[0])))
+    assert watcher.get_watch('garden')[0] == 'low'
+    assert events == []
+
+    # An unchanged forecast does not rescore; a stormier one moves the category
+    asyncio.run(watcher.refresh(now=noon(DATES[0]) + 60))
+    assert watcher.stats['cells_rescored'] == 1
+    fetch.weather[DATES[1]] = dict(STORM)
+    asyncio.run(watcher.refresh(now=noon(DATES[0]) + 7200))
+    category, score = watcher.get_watch('garden')
+    assert category == 'moderate'
+    assert [(event['watch_id'], event['previous_category'], event['risk_category'], event['risk_score'])
+            for event in events] == [('garden', 'low', 'moderate', score)]
+
+
+def test_expired_watches_are_pruned_every_tick():
+    fetch = FakeForecast()
+    watcher = make_watcher(fetch)
+    watcher.add_watch('past', 'Palmer Park', DATES[0], 'hiking', 'beginner')
+    watcher.add_watch('future', 'Palmer Park', DATES[2], 'hiking', 'beginner')
+    asyncio.run(watcher.refresh(now=noon(DATES[0])))
+
+    # The forecast cannot be refreshed, yet the past trip is still dropped
+    fetch.fail = True
+    asyncio.run(watcher.refresh(now=noon(DATES[1]) + 7200))
+    assert watcher.watch_ids() == ['future']
+    assert watcher.get_watch('future') is not None
+
+
+def test_watch_requires_a_date():
+    watcher = make_watcher(FakeForecast())
+    with pytest.raises(ValueError):
+        watcher.add_watch('undated', 'Palmer Park', None, 'hiking', 'beginner')
+    with pytest.raises(ValueError):
+        watcher.add_watch('bad', 'Palmer Park', 'next week', 'hiking', 'beginner')
+    assert watcher.watch_count() == 0
+
+
+def test_concurrent_cell_requests_share_one_fetch():
+    fetch = FakeForecast()
+
+    def slow_fetch(location, days):
+        time.sleep(0.05)
+        return fetch(location, days)
+
+    service = ora.ForecastService(cache_dir=None, fetch=slow_fetch)
+    threads = [threading.Thread(target=service.get_cell_forecast, args=((388, -1051),)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fetch.calls == 1
+    assert service.stats['fetches'] == 1
+
+
+def test_watch_cli_reports_invalid_rows(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ora, 'fetch_forecast_data', lambda api_key, location, days=5, timeout=10: None)
+    trips = tmp_path / "trips.jsonl"
+    row = {'location_name': 'Palmer Park', 'activity_type': 'hiking', 'user_experience': 'beginner',
+           'group_size': 2, 'equipment_quality_level': 'good', 'weight_carried': 15, 'age': 30,
+           'height_weight_ratio': 22, 'gender': 'other'}
+    trips.write_text(json.dumps(dict(row, watch_id='dated', date='2099-01-01')) + "\n" + json.dumps(row) + "\n")
+
+    ora.main(['watch', str(trips), '--once'])
+    captured = capsys.readouterr()
+    assert json.loads(captured.out.strip()) == {'watch_id': 'dated', 'risk_category': None, 'risk_score': None}
+    assert '"index": 1' in captured.err
+    assert 'Watching 1 trips in 1 weather cells (1 invalid rows skipped)' in captured.err
@@ -0,0 +1,125 @@
+import threading
+
+import outdoor_risk_assessment as ora
+
+
+class FakeProvider:
+    # Stands in for the OpenWeather current-weather call
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def __call__(self, location):
+        self.calls.append(location)
+        if location in self.fail:
+            raise ConnectionError("provider unavailable")
+        return {'temperature': 50 + location[0], 'precipitation': 0, 'wind_speed': 5, 'thunderstorm_risk': 0.1}
+
+
+def cell_location(scheduler, i):
+    return scheduler.cell_center((388 + i, -1050))
+
+
+def test_quota_window():
+    provider = FakeProvider()
+    scheduler = ora.WeatherFetchScheduler(quota=4, window=100, burst=4, fetch=provider)
+
+    for i in range(6):
+        scheduler.get(cell_location(scheduler, i), now=0)
+    assert len(provider.calls) == 4
+    assert scheduler.stats['defaults'] == 2
+    assert scheduler.remaining(now=0) == 0
+
+    # Tokens have refilled halfway through the window, but the window is still full
+    assert scheduler.run_pending(now=50) == []
+    assert len(provider.calls) == 4
+
+    # Once the first calls leave the window the unfetched cells are fetched
+    assert sorted(scheduler.run_pending(now=100)) == sorted(
+        ora.weather_cell_key(cell_location(scheduler, i), scheduler.cell_size) for i in (4, 5))
+    assert len(provider.calls) == 6
+    assert scheduler.remaining(now=100) == 2
+
+
+def test_failed_fetches():
+    location = (38.85, -105.05)
+    scheduler = ora.WeatherFetchScheduler(quota=100, window=100, burst=10, min_refresh=10, max_age=20)
+    cell = ora.weather_cell_key(location, scheduler.cell_size)
+    scheduler.fetch = FakeProvider(fail=[scheduler.cell_center(cell)])
+
+    # A raising provider is counted as a failed fetch and releases the cell
+    assert scheduler.get(location, now=0) == ora.DEFAULT_WEATHER
+    assert scheduler.stats['failed_fetches'] == 1
+    assert cell not in scheduler._in_flight
+
+    # The cell is retried after min_refresh
+    assert scheduler.run_pending(now=5) == []
+    scheduler.fetch = FakeProvider()
+    assert scheduler.run_pending(now=10) == [cell]
+    weather = scheduler.get(location, now=10)
+    assert weather['temperature'] == 50 + scheduler.cell_center(cell)[0]
+
+    # A failed refresh keeps serving the stale weather
+    scheduler.fetch = lambda location: None
+    assert scheduler.run_pending(now=40) == [cell]
+    assert scheduler.stats['failed_fetches'] == 2
+    assert scheduler.get(location, now=40) == weather
+    assert scheduler.stats['stale_hits'] == 1
+
+
+def test_priority_order():
+    provider = FakeProvider()
+    scheduler = ora.WeatherFetchScheduler(quota=5, window=1000, burst=5, min_refresh=10, max_age=100,
+                                          fetch=provider)
+    locations = [cell_location(scheduler, i) for i in range(4)]
+    cells = [ora.weather_cell_key(location, scheduler.cell_size) for location in locations]
+
+    # Cells 0-2 are fetched at t=0 with different demand; cell 3 is fetched later
+    for i, requests in enumerate([1, 3, 2]):
+        for _ in range(requests):
+            scheduler.get(locations[i], now=0)
+    for _ in range(3):
+        scheduler.get(locations[3], now=20)
+    assert len(provider.calls) == 4
+
+    # Priority is demand times staleness, highest first
+    assert [cell for _, cell in scheduler.priorities(now=50)] == [cells[1], cells[2], cells[3], cells[0]]
+
+    # With one call left in the window only the top cell is refreshed
+    assert scheduler.run_pending(now=50) == [cells[1]]
+    assert scheduler.remaining(now=50) == 0
+    assert [cell for _, cell in scheduler.priorities(now=50)] == [cells[2], cells[3], cells[0]]
+
+
+def test_background_thread_survives_errors():
+    scheduler = ora.WeatherFetchScheduler(fetch=FakeProvider())
+    runs = []
+    done = threading.Event()
+
+    def run_pending():
+        runs.append(len(runs))
+        if len(runs) == 1:
+            raise RuntimeError("refresh failed")
+        done.set()
+        return []
+
+    scheduler.run_pending = run_pending
+    thread = scheduler.start(interval=0.01)
+    try:
+        assert done.wait(5)
+    finally:
+        scheduler.stop()
+    thread.join(5)
+    assert len(runs) >= 2
+
+
+def test_current_weather_request_has_timeout(monkeypatch):
+    seen = {}
+
+    def fake_get(url, timeout=None):
+        seen['timeout'] = timeout
+        raise ora.requests.Timeout("timed out")
+
+    monkeypatch.setattr(ora.requests, 'get', fake_get)
+    assert ora.request_current_weather('key', (38.85, -105.05)) is None
+    assert seen['timeout'] == 10